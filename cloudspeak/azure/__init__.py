@@ -1,9 +1,13 @@
 from cloudspeak.azure.remote_dict import AzureDictionary
+from cloudspeak.azure.remote_packed_dict import AzurePackedDictionary
+from cloudspeak.azure.remote_frozen_dict import AzureFrozenDictionary
 from cloudspeak.azure.factory import AzureFactory
 from cloudspeak.azure.credentials import AzureCredentials
 
 __all__ = [
     "AzureDictionary",
+    "AzurePackedDictionary",
+    "AzureFrozenDictionary",
     "AzureFactory",
     "AzureCredentials"
 ]
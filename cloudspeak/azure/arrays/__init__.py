@@ -0,0 +1,11 @@
+from cloudspeak.azure.arrays.chunked_array import ChunkedArrayHeader, encode_chunked_array, decode_chunked_array, \
+    is_chunked_array
+from cloudspeak.azure.arrays.array_remote import ArrayRemote
+
+__all__ = [
+    "ChunkedArrayHeader",
+    "encode_chunked_array",
+    "decode_chunked_array",
+    "is_chunked_array",
+    "ArrayRemote",
+]
@@ -0,0 +1,170 @@
+import numpy as np
+
+from cloudspeak.azure.arrays.chunked_array import ChunkedArrayHeader
+
+
+class ArrayRemote:
+    """
+    Sliceable view of an array stored in the chunked format in a blob.
+
+    Only the header is downloaded when instanced. Indexing the first axis with an integer or a slice downloads only
+    the chunks holding the requested rows (in parallel, with ranged reads); other indexes of the remaining axes are
+    applied afterwards. For example:
+
+        ```python
+        rows = d.array("key")[1000:2000, :3]
+        ```
+
+    Arrays are built with `np.frombuffer` over the downloaded bytes, so they are read-only when no copy is needed.
+    """
+    HEADER_READ_BYTES = 64 * 1024
+
+    def __init__(self, file):
+        """
+        Instances a view of the array stored in the given file.
+
+        :param file:
+            AzureFile holding an array in the chunked format.
+
+        :raises ResourceNotFoundError: if the blob does not exist.
+        """
+        self._file = file
+
+        prefix = self._read_range(0, self.HEADER_READ_BYTES)
+        header_size = ChunkedArrayHeader.header_size(prefix)
+
+        if header_size > len(prefix):
+            prefix += self._read_range(len(prefix), header_size - len(prefix))
+
+        self._header = ChunkedArrayHeader.from_bytes(prefix)
+
+    @property
+    def file(self):
+        return self._file
+
+    @property
+    def header(self):
+        return self._header
+
+    @property
+    def shape(self):
+        return self._header.shape
+
+    @property
+    def dtype(self):
+        return self._header.dtype
+
+    @property
+    def ndim(self):
+        return len(self._header.shape)
+
+    def __len__(self):
+        if self.ndim == 0:
+            raise TypeError("len() of unsized object")
+
+        return self._header.shape[0]
+
+    def _read_range(self, offset, length):
+        client = self._file.file_raw
+        stream = client.download_blob(offset=offset, length=length,
+                                      max_concurrency=self._file.max_concurrency_download)
+        return stream.readall()
+
+    def _read_chunk(self, chunk):
+        header = self._header
+        offset, length = header.chunks[chunk]
+
+        return header.decode_chunk(self._read_range(header.data_offset + offset, length))
+
+    def read_rows(self, start, stop):
+        """
+        Retrieves the rows [start, stop) of the first axis as an ndarray.
+        """
+        header = self._header
+        shape = header.shape
+        dtype = header.dtype
+        row_shape = shape[1:]
+        row_bytes = header.row_bytes
+
+        if self.ndim == 0:
+            return self.read_all()
+
+        if stop <= start or row_bytes == 0:
+            return np.empty((max(0, stop - start),) + row_shape, dtype=dtype)
+
+        if header.compression is None:
+            # Raw chunks are contiguous: the rows are read exactly, in a single (parallelized) ranged read
+            data = self._read_range(header.data_offset + start * row_bytes, (stop - start) * row_bytes)
+            return np.frombuffer(data, dtype=dtype).reshape((stop - start,) + row_shape)
+
+        first, last = header.chunks_of(start, stop)
+        chunk_rows = header.chunk_rows
+
+        contents = self._file.service.pool.map(self._read_chunk, range(first, last))
+        parts = [np.frombuffer(c, dtype=dtype).reshape((-1,) + row_shape) for c in contents]
+
+        rows = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        offset = start - first * chunk_rows
+
+        return rows[offset:offset + stop - start]
+
+    def read_all(self):
+        """
+        Retrieves the whole array.
+        """
+        header = self._header
+
+        if self.ndim > 0:
+            return self.read_rows(0, header.shape[0])
+
+        offset, length = header.chunks[0]
+        data = header.decode_chunk(self._read_range(header.data_offset + offset, length))
+
+        return np.frombuffer(data, dtype=header.dtype).reshape(())
+
+    def __getitem__(self, item):
+        if self.ndim == 0:
+            return self.read_all()[item]
+
+        if not isinstance(item, tuple):
+            item = (item,)
+
+        if len(item) == 0:
+            return self.read_all()
+
+        first, rest = item[0], item[1:]
+        length = self._header.shape[0]
+
+        if isinstance(first, (int, np.integer)):
+            index = int(first)
+            index = index + length if index < 0 else index
+
+            if not 0 <= index < length:
+                raise IndexError(f"index {first} is out of bounds for axis 0 with size {length}")
+
+            row = self.read_rows(index, index + 1)[0]
+            return row[rest] if len(rest) > 0 else row
+
+        if isinstance(first, slice):
+            indexes = range(*first.indices(length))
+
+            if len(indexes) == 0:
+                rows = self.read_rows(0, 0)
+            else:
+                low, high = min(indexes[0], indexes[-1]), max(indexes[0], indexes[-1]) + 1
+                rows = self.read_rows(low, high)[indexes[0] - low::indexes.step]
+
+            return rows[(slice(None),) + rest] if len(rest) > 0 else rows
+
+        # Other indexes (arrays, ellipsis, new axes) are applied over the whole array
+        return self.read_all()[item]
+
+    def __array__(self, dtype=None):
+        result = self.read_all()
+        return result if dtype is None else result.astype(dtype)
+
+    def __str__(self):
+        return f"[Remote array {self._file.name}; {self.dtype} {self.shape}]"
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,209 @@
+import json
+import struct
+
+import lz4.frame
+import numpy as np
+
+_MAGIC = b"CSCA\x01"
+_HEADER_LENGTH = struct.Struct("<Q")
+_PREFIX_SIZE = len(_MAGIC) + _HEADER_LENGTH.size
+
+
+def is_chunked_array(data):
+    """
+    Returns whether the given bytes are an array in the chunked format.
+    """
+    return data is not None and data[:len(_MAGIC)] == _MAGIC
+
+
+class ChunkedArrayHeader:
+    """
+    Header of an array in the chunked format.
+
+    The array is split along its first axis in chunks of `chunk_rows` rows. Each chunk is stored as the raw bytes of
+    its rows (C order), optionally compressed, so it can be read independently with a ranged read. The header holds the
+    dtype, shape and the location of each chunk, relative to the end of the header.
+
+    Layout: magic (5 bytes) + header length (8 bytes) + header (JSON) + chunks.
+    """
+
+    def __init__(self, dtype, shape, chunk_rows, compression, chunks):
+        self._dtype = np.dtype(dtype)
+        self._shape = tuple(shape)
+        self._chunk_rows = chunk_rows
+        self._compression = compression
+        self._chunks = chunks
+        self._data_offset = None
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def chunk_rows(self):
+        return self._chunk_rows
+
+    @property
+    def compression(self):
+        return self._compression
+
+    @property
+    def chunks(self):
+        """
+        Retrieves the list of (offset, length) of each chunk, relative to `data_offset`.
+        """
+        return self._chunks
+
+    @property
+    def data_offset(self):
+        """
+        Retrieves the byte offset where the chunks start.
+        """
+        return self._data_offset
+
+    @property
+    def row_bytes(self):
+        """
+        Retrieves the number of bytes of each row (an element of the first axis) once decompressed.
+        """
+        return int(np.prod(self._shape[1:], dtype=np.int64)) * self._dtype.itemsize
+
+    def to_bytes(self):
+        header = json.dumps({
+            "dtype": self._dtype.str,
+            "shape": list(self._shape),
+            "chunk_rows": self._chunk_rows,
+            "compression": self._compression,
+            "chunks": self._chunks,
+        }).encode("utf-8")
+
+        return _MAGIC + _HEADER_LENGTH.pack(len(header)) + header
+
+    @staticmethod
+    def header_size(prefix):
+        """
+        Retrieves the total size (prefix included) of the header, from the first bytes of the data.
+
+        :param prefix:
+            At least the first 13 bytes of the data.
+        """
+        if not is_chunked_array(prefix):
+            raise ValueError("Data is not an array in the chunked format.")
+
+        header_length, = _HEADER_LENGTH.unpack_from(prefix, len(_MAGIC))
+        return _PREFIX_SIZE + header_length
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Decodes the header from the first bytes of the data (at least `header_size()` bytes).
+        """
+        size = cls.header_size(data)
+        header = json.loads(bytes(data[_PREFIX_SIZE:size]).decode("utf-8"))
+
+        result = cls(header["dtype"], header["shape"], header["chunk_rows"], header["compression"], header["chunks"])
+        result._data_offset = size
+        return result
+
+    def chunks_of(self, start, stop):
+        """
+        Retrieves the range of chunk numbers [first, last) holding the rows [start, stop).
+        """
+        if stop <= start:
+            return 0, 0
+
+        return start // self._chunk_rows, (stop - 1) // self._chunk_rows + 1
+
+    def decode_chunk(self, data):
+        """
+        Retrieves the raw bytes of the rows of a chunk from its stored bytes.
+        """
+        if self._compression == "lz4":
+            return lz4.frame.decompress(data)
+
+        return data
+
+    def __str__(self):
+        return f"[Chunked array; {self._dtype} {self._shape}; {len(self._chunks)} chunks of {self._chunk_rows} rows]"
+
+    def __repr__(self):
+        return str(self)
+
+
+def encode_chunked_array(array, chunk_rows=None, compression="lz4", chunk_bytes=4 * 1024 * 1024):
+    """
+    Encodes an array in the chunked format.
+
+    :param array:
+        numpy ndarray to encode. Object dtypes are not supported.
+
+    :param chunk_rows:
+        Number of rows (elements of the first axis) per chunk. By default, as many as fit in `chunk_bytes`.
+
+    :param compression:
+        "lz4" to compress each chunk, None to store them raw. Raw chunks allow reading any range of rows exactly.
+
+    :param chunk_bytes:
+        Target size of each chunk (uncompressed) if `chunk_rows` is not set.
+
+    :return:
+        Bytes of the encoded array.
+    """
+    # The shape is taken before, as contiguous arrays have at least one dimension
+    shape = np.shape(array)
+    array = np.ascontiguousarray(array).reshape(shape if len(shape) > 0 else (1,))
+
+    if array.dtype.hasobject:
+        raise ValueError("Arrays of python objects can't be stored in the chunked format.")
+
+    if compression not in (None, "lz4"):
+        raise ValueError(f"Unsupported compression \"{compression}\". Use \"lz4\" or None.")
+
+    row_bytes = max(1, array.itemsize * int(np.prod(array.shape[1:], dtype=np.int64)))
+
+    if chunk_rows is None:
+        chunk_rows = max(1, chunk_bytes // row_bytes)
+
+    chunks = []
+    blobs = []
+    offset = 0
+
+    for start in range(0, max(1, array.shape[0]), chunk_rows):
+        raw = array[start:start + chunk_rows].tobytes()
+        stored = lz4.frame.compress(raw) if compression == "lz4" else raw
+
+        chunks.append([offset, len(stored)])
+        blobs.append(stored)
+        offset += len(stored)
+
+    header = ChunkedArrayHeader(array.dtype, shape, chunk_rows, compression, chunks)
+
+    return b"".join([header.to_bytes()] + blobs)
+
+
+def decode_chunked_array(data):
+    """
+    Decodes a whole array from its chunked format.
+
+    :param data:
+        Bytes of the encoded array.
+
+    :return:
+        numpy ndarray.
+    """
+    header = ChunkedArrayHeader.from_bytes(data)
+    data_offset = header.data_offset
+    view = memoryview(data)
+
+    if header.compression is None:
+        raw = view[data_offset:]
+    else:
+        raw = b"".join(header.decode_chunk(view[data_offset + o:data_offset + o + n]) for o, n in header.chunks)
+
+    count = int(np.prod(header.shape, dtype=np.int64))
+
+    return np.frombuffer(raw, dtype=header.dtype, count=count).reshape(header.shape)
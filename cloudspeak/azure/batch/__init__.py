@@ -0,0 +1,5 @@
+from cloudspeak.azure.batch.batch_writer import BatchWriter
+
+__all__ = [
+    "BatchWriter",
+]
@@ -0,0 +1,210 @@
+import logging
+from threading import Lock, Timer
+
+
+class BatchWriter:
+    """
+    Write-back buffer of a remote dictionary.
+
+    Writes are serialized and kept locally until flushed. Repeated writes to the same key are collapsed, so only the
+    last value is uploaded. A flush uploads all the buffered keys in parallel in the service pool and then updates the
+    index once.
+
+    Use it through `AzureDictionary.batch()`.
+    """
+
+    def __init__(self, dictionary, max_items=None, max_bytes=None, max_delay=None):
+        """
+        Instances a new write-back buffer.
+
+        :param dictionary:
+            AzureDictionary where the writes are flushed.
+
+        :param max_items:
+            Number of buffered keys that triggers a flush. None for no limit.
+
+        :param max_bytes:
+            Number of buffered bytes (serialized) that triggers a flush. None for no limit.
+
+        :param max_delay:
+            Maximum number of seconds a write is kept buffered before being flushed. None for no limit.
+        """
+        self._logger = logging.getLogger("cs-batch")
+        self._dictionary = dictionary
+        self._max_items = max_items
+        self._max_bytes = max_bytes
+        self._max_delay = max_delay
+
+        self._lock = Lock()
+        self._flush_lock = Lock()
+
+        self._pending = {}
+        self._pending_bytes = 0
+        self._timer = None
+
+        self._failed = []
+
+    @property
+    def dictionary(self):
+        return self._dictionary
+
+    def __setitem__(self, key, value):
+        serializer = self._dictionary.service.serializer
+        data = serializer.serialize(value) if serializer is not None else value
+
+        with self._lock:
+            previous = self._pending.pop(key, None)
+
+            if previous is not None:
+                self._pending_bytes -= len(previous[1])
+
+            self._pending[key] = (value, data)
+            self._pending_bytes += len(data)
+
+            threshold_met = (self._max_items is not None and len(self._pending) >= self._max_items) or \
+                            (self._max_bytes is not None and self._pending_bytes >= self._max_bytes)
+
+            if not threshold_met:
+                self._schedule()
+
+        if threshold_met:
+            self.flush()
+
+    def __len__(self):
+        """
+        Retrieves the number of keys pending to be flushed.
+        """
+        return len(self._pending)
+
+    @property
+    def pending_bytes(self):
+        """
+        Retrieves the number of bytes pending to be flushed.
+        """
+        return self._pending_bytes
+
+    def _schedule(self):
+        """
+        Starts the timer of the delayed flush, if not running. Must be called with the lock acquired.
+        """
+        if self._max_delay is not None and self._timer is None:
+            self._timer = Timer(self._max_delay, self._flush_delayed)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _restore(self, pending):
+        """
+        Puts back in the buffer the given writes that could not be flushed, unless the keys were written again
+        meanwhile (the newer values are kept).
+        """
+        with self._lock:
+            for key, (value, data) in pending.items():
+                if key not in self._pending:
+                    self._pending[key] = (value, data)
+                    self._pending_bytes += len(data)
+
+            self._schedule()
+
+    def _flush_delayed(self):
+        try:
+            self._flush()
+
+        except KeyError as e:
+            # Reported in the next explicit flush
+            with self._lock:
+                self._failed.extend(e.keys)
+
+        except Exception as e:
+            # The writes were put back in the buffer: they are retried by the next flush, which raises if it fails too
+            self._logger.warning(f"Delayed flush failed ({e}); {len(self)} keys kept pending")
+
+    def _flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = {}
+                self._pending_bytes = 0
+
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            if len(pending) == 0:
+                return
+
+            try:
+                self._flush_pending(pending)
+
+            except KeyError:
+                # Only the keys reported failed, the rest were written
+                raise
+
+            except Exception:
+                # It is unknown which ones were written: all are kept, as writing them again is harmless
+                self._restore(pending)
+                raise
+
+    def _flush_pending(self, pending):
+        dictionary = self._dictionary
+        container = dictionary.container
+        context = dictionary.context
+
+        keys = list(pending)
+        values = [pending[k][0] for k in keys]
+        progresses = []
+
+        if dictionary.bloom_filter is not None:
+            dictionary.bloom_filter.add(keys)
+
+        stored = dictionary._stored_data([pending[k][1] for k in keys])
+
+        for k, data in zip(keys, stored):
+            file = container[dictionary.get_url(k)]
+            file.data_raw = data
+            progresses.append(file.upload(overwrite=True, allow_changed=True, context=context))
+
+        self._logger.debug(f"Flushing {len(keys)} keys")
+
+        dictionary._join_writes(keys, values, progresses, is_list=True)
+
+    def flush(self):
+        """
+        Uploads all the buffered writes and updates the index.
+
+        :raises KeyError:
+            If any of the keys could not be written (in this flush or in a previous one triggered by `max_delay`).
+            The attribute `.keys` of the exception contains a list of tuples (key, reason) for each key not written.
+
+        Other errors (e.g. network errors or failures updating the index) are raised as they are. The writes are kept
+        in the buffer in that case, to be retried by the next flush. The same is done when a flush triggered by
+        `max_delay` fails, so no buffered write is lost silently.
+        """
+        failed = []
+
+        try:
+            self._flush()
+
+        except KeyError as e:
+            failed.extend(e.keys)
+
+        with self._lock:
+            failed = self._failed + failed
+            self._failed = []
+
+        if len(failed) > 0:
+            error = KeyError(f"There were {len(failed)} keys that couldn't be written. Access the .keys attribute of "
+                             f"this exception to know which keys could not be written and the reason.")
+            error.keys = failed
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def __str__(self):
+        return f"[Batch writer of {self._dictionary}; {len(self)} keys pending ({self._pending_bytes} bytes)]"
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,9 @@
+from cloudspeak.azure.bloom.bloom_filter import BloomFilter
+from cloudspeak.azure.bloom.bloom_remote import BloomRemote
+from cloudspeak.azure.bloom.bloom_sharded import BloomSharded
+
+__all__ = [
+    "BloomFilter",
+    "BloomRemote",
+    "BloomSharded",
+]
@@ -0,0 +1,157 @@
+import hashlib
+import math
+
+
+def bloom_filter_from_bytes(data):
+    """
+    Builds a BloomFilter from its wire format. Used for unpickling.
+    """
+    return BloomFilter.from_bytes(data)
+
+
+class BloomFilter:
+    """
+    Approximate membership set of string keys.
+
+    A key that was added is always reported as contained. A key that was not added is reported as not contained,
+    except for a fraction of false positives bounded by the error rate (as long as no more keys than the capacity are
+    added). Keys can't be removed.
+
+    Positions of the keys in the bit array are computed by double hashing of a BLAKE2b digest.
+    """
+    _MAGIC = b"CSBF\x01"
+
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Instances a new empty filter.
+
+        :param capacity:
+            Number of keys expected to be added.
+
+        :param error_rate:
+            Target false positive rate once `capacity` keys are added.
+        """
+        if capacity < 1:
+            raise ValueError("The capacity of the filter must be at least 1.")
+
+        if not 0 < error_rate < 1:
+            raise ValueError("The error rate of the filter must be between 0 and 1.")
+
+        num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._num_bits = num_bits
+        self._num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self._bits = bytearray((num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        num_bits = self._num_bits
+
+        return [(h1 + i * h2) % num_bits for i in range(self._num_hashes)]
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def error_rate(self):
+        return self._error_rate
+
+    @property
+    def count(self):
+        """
+        Retrieves the number of keys added (keys that were already reported as contained are not counted).
+        """
+        return self._count
+
+    @property
+    def saturated(self):
+        """
+        Returns whether more keys than the capacity were added, so the error rate is no longer guaranteed.
+        """
+        return self._count > self._capacity
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+    def add(self, key):
+        """
+        Adds the given key to the filter.
+
+        :return:
+            True if the filter changed. False if the key was already reported as contained.
+        """
+        bits = self._bits
+        changed = False
+
+        for p in self._positions(key):
+            mask = 1 << (p & 7)
+
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                changed = True
+
+        if changed:
+            self._count += 1
+
+        return changed
+
+    def update(self, keys):
+        """
+        Adds the given keys to the filter.
+
+        :return:
+            True if the filter changed. False otherwise.
+        """
+        changed = False
+
+        for k in keys:
+            changed = self.add(k) or changed
+
+        return changed
+
+    def __contains__(self, key):
+        if not isinstance(key, str):
+            return False
+
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def to_bytes(self):
+        header = f"{self._capacity} {self._error_rate!r} {self._count}\n".encode("utf-8")
+        return self._MAGIC + header + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic = cls._MAGIC
+
+        if data[:len(magic)] != magic:
+            raise ValueError("Data is not a BloomFilter in a supported format.")
+
+        header_end = data.index(b"\n", len(magic))
+        capacity, error_rate, count = data[len(magic):header_end].decode("utf-8").split(" ")
+
+        result = cls(int(capacity), float(error_rate))
+        bits = data[header_end + 1:]
+
+        if len(bits) != len(result._bits):
+            raise ValueError("The BloomFilter data is truncated.")
+
+        result._bits = bytearray(bits)
+        result._count = int(count)
+        return result
+
+    def __reduce__(self):
+        return bloom_filter_from_bytes, (self.to_bytes(),)
+
+    def __str__(self):
+        return f"[BloomFilter; {self._count}/{self._capacity} keys; {self.nbytes} bytes]"
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,197 @@
+import logging
+import time
+from threading import Lock
+
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+
+from cloudspeak.azure.bloom.bloom_filter import BloomFilter
+
+
+class BloomRemote:
+    """
+    Bloom filter of the keys of a remote dictionary, persisted in a blob.
+
+    A local copy of the filter is kept and refreshed by ETag (a conditional download that transfers nothing if the blob
+    didn't change) once it is older than the staleness window. Keys are added to the filter before their values are
+    written, so the filter never reports as missing a key that exists. Additions are merged with optimistic
+    concurrency: the keys are added to the local copy, which is uploaded only if the blob still has the version it
+    came from (a single request); otherwise, the latest filter is downloaded and the process is retried.
+    """
+
+    def __init__(self, file, capacity, error_rate=0.01, staleness_seconds=10, seed=None):
+        """
+        Instances a new remote Bloom filter.
+
+        :param file:
+            AzureFile where the filter is stored.
+
+        :param capacity:
+            Number of keys expected in the dictionary. Used when the filter blob is created.
+
+        :param error_rate:
+            Target false positive rate of the filter. Used when the filter blob is created.
+
+        :param staleness_seconds:
+            Number of seconds the local copy of the filter is used without checking its ETag.
+            Use 0 to check always and -1 to never check after the first download.
+
+        :param seed:
+            Callable retrieving the keys that already exist, used to fill the filter when the blob is created.
+        """
+        self._logger = logging.getLogger("cs-bloom")
+        self._file = file
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._staleness_seconds = staleness_seconds
+        self._seed = seed
+
+        self._lock = Lock()
+        self._local = None
+        self._local_etag = None
+        self._timestamp = None
+
+    @property
+    def file(self):
+        return self._file
+
+    @property
+    def filter(self):
+        """
+        Retrieves the local copy of the filter, refreshed if stale. None if the filter blob does not exist.
+        """
+        with self._lock:
+            staleness_seconds = self._staleness_seconds
+            timestamp = self._timestamp
+
+            if timestamp is None or (staleness_seconds != -1 and time.time() - timestamp >= staleness_seconds):
+                self._refresh()
+
+            return self._local
+
+    def _refresh(self):
+        """
+        Downloads the filter if it changed in the backend. Must be called with the lock held.
+        """
+        file = self._file
+
+        try:
+            file.download().join(tqdm_bar=False)
+
+        except ResourceNotFoundError:
+            pass
+
+        etag = file.etag
+
+        if etag is None:
+            self._local = None
+
+        elif etag != self._local_etag:
+            self._local = file.data
+
+        self._local_etag = etag
+        self._timestamp = time.time()
+
+    def invalidate(self):
+        """
+        Marks the local copy of the filter as stale, so it is revalidated in the next lookup.
+        """
+        with self._lock:
+            self._timestamp = None
+
+    def might_contain(self, key):
+        """
+        Returns False only if the given key is known not to exist. True if it may exist.
+        """
+        bloom_filter = self.filter
+        return bloom_filter is None or key in bloom_filter
+
+    def add(self, keys):
+        """
+        Adds the given keys to the filter in the backend.
+
+        If the filter blob does not exist yet, it is created with the existing keys (retrieved from the seed).
+
+        :param keys:
+            List of keys to add.
+        """
+        if len(keys) == 0:
+            return
+
+        file = self._file
+
+        with self._lock:
+            # The local copy is used even if stale: the upload is conditional to its version
+            if self._local is None:
+                self._refresh()
+
+            while True:
+                bloom_filter = self._local
+                create = bloom_filter is None
+
+                if create:
+                    bloom_filter = BloomFilter(self._capacity, self._error_rate)
+                    bloom_filter.update(self._seed() if self._seed is not None else [])
+
+                # The backend filter only grows, so keys in the local copy are in the backend too
+                if not bloom_filter.update(keys) and not create:
+                    return
+
+                file.data = bloom_filter
+
+                try:
+                    if create:
+                        file.upload(overwrite=False).join(tqdm_bar=False)
+
+                    else:
+                        file.upload(overwrite=True, etag=self._local_etag).join(tqdm_bar=False)
+
+                except (ResourceModifiedError, ResourceExistsError):
+                    # Other process updated the filter. We merge with its version.
+                    self._local_etag = None
+                    self._refresh()
+                    continue
+
+                break
+
+            self._local = bloom_filter
+            self._local_etag = file.etag
+            self._timestamp = time.time()
+
+        if bloom_filter.saturated:
+            self._logger.warning(f"The Bloom filter {file.name} holds more keys than its capacity "
+                                 f"({bloom_filter.count}/{bloom_filter.capacity}). Consider rebuilding it.")
+
+    def rebuild(self, keys, capacity=None):
+        """
+        Replaces the filter in the backend by a new one holding only the given keys.
+
+        Keys written by other processes while the filter is rebuilt may be missing from it, so this should be used
+        while no other process writes to the dictionary.
+
+        :param keys:
+            Iterable of keys to fill the filter with.
+
+        :param capacity:
+            Number of keys expected in the new filter. By default, the capacity of the current one.
+        """
+        file = self._file
+
+        with self._lock:
+            if capacity is not None:
+                self._capacity = capacity
+
+            bloom_filter = BloomFilter(self._capacity, self._error_rate)
+            bloom_filter.update(keys)
+
+            file.data = bloom_filter
+            file.upload(overwrite=True, allow_changed=True).join(tqdm_bar=False)
+
+            self._local = bloom_filter
+            self._local_etag = file.etag
+            self._timestamp = time.time()
+
+    def __str__(self):
+        return f"[Remote Bloom filter; {self._file.name}]"
+
+    def __repr__(self):
+        return str(self)
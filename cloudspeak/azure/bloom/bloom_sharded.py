@@ -0,0 +1,161 @@
+import math
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from cloudspeak.azure.bloom.bloom_remote import BloomRemote
+
+
+class BloomSharded:
+    """
+    Bloom filter of the keys of a remote dictionary split in several hash-partitioned blobs (shards).
+
+    Every key belongs to exactly one shard, so adding a key only uploads the (small) shard that owns it, and writers of
+    keys of different shards don't compete for the same blob. Lookups only refresh the shard of the key looked up.
+    """
+
+    def __init__(self, files, capacity, error_rate=0.01, staleness_seconds=10, seed=None):
+        """
+        Instances a new sharded remote Bloom filter.
+
+        :param files:
+            List of AzureFile, one per shard. The order of the list determines the shard of each key, so every
+            instance sharing the filter must use the same files in the same order.
+
+        :param capacity:
+            Number of keys expected in the dictionary, split evenly between the shards.
+
+        :param error_rate:
+            Target false positive rate of the filter.
+
+        :param staleness_seconds:
+            Number of seconds the local copy of each shard is used without checking its ETag.
+
+        :param seed:
+            Callable retrieving the keys that already exist, used to fill the shards when their blobs are created.
+            It is called once at most, for all the shards.
+        """
+        if len(files) == 0:
+            raise ValueError("A sharded Bloom filter requires at least one shard.")
+
+        self._seed = seed
+        self._seed_lock = Lock()
+        self._seed_keys = None
+
+        shard_capacity = max(1, math.ceil(capacity / len(files)))
+
+        self._shards = [BloomRemote(f, shard_capacity, error_rate=error_rate, staleness_seconds=staleness_seconds,
+                                    seed=self._shard_seed(i) if seed is not None else None)
+                        for i, f in enumerate(files)]
+
+    @property
+    def shards(self):
+        """
+        Retrieves the list of BloomRemote that compose this filter, in shard order.
+        """
+        return self._shards
+
+    @property
+    def filters(self):
+        """
+        Retrieves the local copies of the shards, refreshed if stale. None for the shards whose blob does not exist.
+        """
+        return [s.filter for s in self._shards]
+
+    @property
+    def files(self):
+        """
+        Retrieves the list of files that compose this filter.
+        """
+        return [s.file for s in self._shards]
+
+    def shard_of(self, key):
+        """
+        Retrieves the shard number that owns the given key.
+
+        The hash is stable across processes (unlike python's `hash()`), so all the instances agree on it.
+        """
+        return zlib.crc32(key.encode("utf-8")) % len(self._shards)
+
+    def _split(self, keys):
+        """
+        Groups the given keys by shard number.
+        """
+        groups = {}
+
+        for k in keys:
+            groups.setdefault(self.shard_of(k), []).append(k)
+
+        return groups
+
+    def _shard_seed(self, shard):
+        def seed():
+            with self._seed_lock:
+                if self._seed_keys is None:
+                    self._seed_keys = self._split(self._seed())
+
+            return self._seed_keys.get(shard, [])
+
+        return seed
+
+    def invalidate(self):
+        """
+        Marks the local copies of the shards as stale, so they are revalidated in the next lookups.
+        """
+        for shard in self._shards:
+            shard.invalidate()
+
+    def might_contain(self, key):
+        """
+        Returns False only if the given key is known not to exist. True if it may exist.
+        """
+        return self._shards[self.shard_of(key)].might_contain(key)
+
+    def add(self, keys):
+        """
+        Adds the given keys to the filter in the backend. Only the shards owning them are uploaded, in parallel.
+
+        :param keys:
+            List of keys to add.
+        """
+        groups = self._split(keys)
+
+        if len(groups) == 0:
+            return
+
+        if len(groups) == 1:
+            (shard, shard_keys), = groups.items()
+            self._shards[shard].add(shard_keys)
+            return
+
+        # A pool of its own, as each shard joins transfers of the service pool
+        with ThreadPoolExecutor(max_workers=max(1, min(len(self._shards), len(groups)))) as executor:
+            promises = [executor.submit(self._shards[shard].add, shard_keys) for shard, shard_keys in groups.items()]
+
+            for promise in promises:
+                promise.result()
+
+    def rebuild(self, keys, capacity=None):
+        """
+        Replaces the shards in the backend by new ones holding only the given keys.
+
+        Keys written by other processes while the filter is rebuilt may be missing from it, so this should be used
+        while no other process writes to the dictionary.
+
+        :param keys:
+            Iterable of keys to fill the filter with.
+
+        :param capacity:
+            Number of keys expected in the new filter. By default, the capacity of the current one.
+        """
+        groups = self._split(keys)
+        shard_capacity = max(1, math.ceil(capacity / len(self._shards))) if capacity is not None else None
+
+        for i, shard in enumerate(self._shards):
+            shard.rebuild(groups.get(i, []), capacity=shard_capacity)
+
+    def __str__(self):
+        return f"[Remote Bloom filter sharded in {len(self._shards)} blobs]"
+
+    def __repr__(self):
+        return str(self)
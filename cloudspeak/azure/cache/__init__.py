@@ -0,0 +1,5 @@
+from cloudspeak.azure.cache.value_cache import ValueCache
+
+__all__ = [
+    "ValueCache",
+]
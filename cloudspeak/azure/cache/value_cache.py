@@ -0,0 +1,177 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class ValueCache:
+    """
+    In-process LRU cache of dictionary values, bounded by a byte budget.
+
+    Entries are stored along with the ETag of the blob they were read from (or written to). Within the staleness window
+    an entry is served without any round trip; afterwards it must be revalidated against the backend ETag before being
+    served again (see `needs_revalidation()`).
+
+    Note that cached values are returned by reference: mutating a value retrieved from the cache mutates the cache.
+    """
+
+    def __init__(self, max_bytes, staleness_seconds=10):
+        """
+        Instances a new value cache.
+
+        :param max_bytes:
+            Budget of the cache, in bytes of serialized values. Least recently used entries are evicted when exceeded.
+
+        :param staleness_seconds:
+            Number of seconds an entry is served without revalidating it against the backend.
+            Use 0 to revalidate always and -1 to never revalidate.
+        """
+        self._max_bytes = max_bytes
+        self._staleness_seconds = staleness_seconds
+
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @property
+    def staleness_seconds(self):
+        return self._staleness_seconds
+
+    @property
+    def size(self):
+        """
+        Retrieves the number of bytes currently cached.
+        """
+        return self._size
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def evictions(self):
+        return self._evictions
+
+    def get(self, key):
+        """
+        Retrieves the entry of the given key, if cached.
+
+        :return:
+            A dict {"value", "etag", "size", "timestamp"}, or None if not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        return entry
+
+    def needs_revalidation(self, entry):
+        """
+        Checks whether the given entry is older than the staleness window.
+        """
+        staleness_seconds = self._staleness_seconds
+        return staleness_seconds > -1 and (time.time() - entry['timestamp']) >= staleness_seconds
+
+    def touch(self, key):
+        """
+        Marks the entry of the given key as just validated against the backend.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                entry['timestamp'] = time.time()
+
+    def hit(self):
+        with self._lock:
+            self._hits += 1
+
+    def miss(self):
+        with self._lock:
+            self._misses += 1
+
+    def put(self, key, value, etag, size):
+        """
+        Caches the value of the given key.
+
+        :param key:
+            Key of the dictionary.
+
+        :param value:
+            Deserialized value.
+
+        :param etag:
+            ETag of the blob version the value corresponds to.
+
+        :param size:
+            Size in bytes of the serialized value. Values larger than the budget are not cached.
+        """
+        with self._lock:
+            self._pop(key)
+
+            if size > self._max_bytes:
+                return
+
+            self._entries[key] = {
+                'value': value,
+                'etag': etag,
+                'size': size,
+                'timestamp': time.time(),
+            }
+            self._size += size
+
+            while self._size > self._max_bytes:
+                self._pop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._size -= entry['size']
+
+        return entry
+
+    def invalidate(self, key):
+        """
+        Removes the given key (or list of keys) from the cache.
+        """
+        keys = key if isinstance(key, list) else [key]
+
+        with self._lock:
+            for k in keys:
+                self._pop(k)
+
+    def clear(self):
+        """
+        Removes all the entries from the cache. Counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return f"[Value cache; {len(self)} entries; {self._size}/{self._max_bytes} bytes; hits: {self._hits}; " \
+               f"misses: {self._misses}; evictions: {self._evictions}]"
+
+    def __repr__(self):
+        return str(self)
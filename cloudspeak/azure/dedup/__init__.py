@@ -0,0 +1,9 @@
+from cloudspeak.azure.dedup.object_store import ObjectStore, POINTER_SIZE, is_pointer, encode_pointer, decode_pointer
+
+__all__ = [
+    "ObjectStore",
+    "POINTER_SIZE",
+    "is_pointer",
+    "encode_pointer",
+    "decode_pointer",
+]
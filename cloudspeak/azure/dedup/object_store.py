@@ -0,0 +1,156 @@
+import hashlib
+import logging
+
+from azure.core.exceptions import ResourceExistsError
+
+from cloudspeak.utils.basics import removeprefix
+from cloudspeak.utils.time import now, to_datetime
+
+_MAGIC = b"CSDP\x01"
+POINTER_SIZE = len(_MAGIC) + 64
+
+
+def is_pointer(data):
+    """
+    Returns whether the given bytes are a pointer to a content-addressed object.
+    """
+    return data is not None and len(data) == POINTER_SIZE and data[:len(_MAGIC)] == _MAGIC
+
+
+def encode_pointer(digest):
+    """
+    Encodes a pointer to the object with the given digest.
+    """
+    return _MAGIC + digest.encode("ascii")
+
+
+def decode_pointer(data):
+    """
+    Retrieves the digest of the object referenced by the given pointer.
+    """
+    return bytes(data[len(_MAGIC):]).decode("ascii")
+
+
+class ObjectStore:
+    """
+    Content-addressed store of values, where each value is stored once in a blob named after the SHA-256 of its bytes.
+
+    Objects are immutable: storing a value whose object already exists only costs an existence check, so repeated
+    values are uploaded and stored once. Keys of a dictionary reference the objects with small pointers.
+    """
+
+    def __init__(self, container, prefix):
+        """
+        Instances a new object store.
+
+        :param container:
+            Container where the objects are stored.
+
+        :param prefix:
+            Prefix of the names of the object blobs.
+        """
+        self._logger = logging.getLogger("cs-dedup")
+        self._container = container
+        self._prefix = prefix
+
+    @property
+    def container(self):
+        return self._container
+
+    @property
+    def prefix(self):
+        return self._prefix
+
+    @staticmethod
+    def digest(data):
+        """
+        Retrieves the content address (hexadecimal SHA-256) of the given bytes.
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    def file_of(self, digest):
+        """
+        Retrieves the AzureFile of the object with the given digest.
+        """
+        return self._container[f"{self._prefix}{digest}"]
+
+    def _put(self, digest, data):
+        """
+        Uploads the given object unless it already exists. Returns whether it was uploaded.
+        """
+        file = self.file_of(digest)
+        client = file.file_raw
+
+        if client.exists():
+            return False
+
+        try:
+            client.upload_blob(data, overwrite=False, max_concurrency=file.max_concurrency_upload)
+
+        except ResourceExistsError:
+            # Other process stored the same value meanwhile
+            return False
+
+        return True
+
+    def put_many(self, datas):
+        """
+        Stores the given values as objects, uploading in parallel only those that don't exist yet.
+
+        :param datas:
+            List of bytes.
+
+        :return:
+            List of digests, one per value.
+        """
+        digests = [self.digest(d) for d in datas]
+        unique = dict(zip(digests, datas))
+
+        uploaded = self._container.service.pool.map(lambda item: self._put(*item), unique.items())
+        uploaded = sum(1 for u in uploaded if u)
+
+        self._logger.debug(f"Stored {len(datas)} values: {uploaded} objects uploaded, "
+                           f"{len(datas) - uploaded} already existing")
+
+        return digests
+
+    def collect(self, referenced, grace_seconds=3600):
+        """
+        Removes the objects not referenced anymore.
+
+        Objects newer than the grace period are kept, as they may belong to writes in progress (objects are uploaded
+        before the pointers to them).
+
+        :param referenced:
+            Set of digests still referenced.
+
+        :param grace_seconds:
+            Minimum age of the objects to remove.
+
+        :return:
+            Number of objects removed.
+        """
+        container = self._container
+        prefix = self._prefix
+        current_time = now()
+        files = []
+
+        for blob in container.walk(prefix, delimiter="/"):
+            if hasattr(blob, 'prefix') or removeprefix(blob['name'], prefix) in referenced:
+                continue
+
+            age = (current_time - to_datetime(blob['last_modified'])).total_seconds()
+
+            if age >= grace_seconds:
+                files.append(container[blob['name']])
+
+        if len(files) > 0:
+            container.delete_many_files(files, changed_ok=True, raise_errors=False)
+
+        return len(files)
+
+    def __str__(self):
+        return f"[Object store at {self._container}/{self._prefix}]"
+
+    def __repr__(self):
+        return str(self)
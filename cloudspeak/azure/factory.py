@@ -1,6 +1,8 @@
 from azure.core.exceptions import ResourceExistsError
 
 from cloudspeak.azure.remote_dict import AzureDictionary
+from cloudspeak.azure.remote_packed_dict import AzurePackedDictionary
+from cloudspeak.azure.remote_frozen_dict import AzureFrozenDictionary
 from cloudspeak.serializers import JoblibSerializer
 from cloudspeak.storage.azure import AzureService
 from cloudspeak.storage.azure.queue.queue import AzureQueue
@@ -19,9 +21,18 @@ class AzureFactory:
         context (Any, optional): Additional context data to be passed to AzureService.
 
     Methods:
-        dictionary(container, folder_name, indexed=True, create_container=True, context=None):
+        dictionary(container, folder_name, indexed=True, create_container=True, context=None, index_shards=1,
+                   index_journal=False, cache_bytes=None, cache_staleness_seconds=10, listing_prefixes=None,
+                   bloom_filter=False, notification_queues=None, track_stats=False, dedup=False):
             Generates a remote dictionary based on the specified Azure Blob Storage container and folder.
 
+        packed_dictionary(container, folder_name, create_container=True, segment_items=None, segment_bytes=None,
+                          compaction_segments=None, staleness_seconds=None):
+            Generates a remote dictionary for small values, packed in segment blobs.
+
+        frozen_dictionary(container, folder_name):
+            Opens a read-only dictionary over a table written by `AzureDictionary.freeze()`.
+
         queue(queue_name, create_queue=True):
             Retrieves or creates an Azure Queue Storage queue with the specified name.
 
@@ -80,7 +91,11 @@ class AzureFactory:
         self._context = context
         self._operations_pool = operations_pool
 
-    def dictionary(self, container_name, folder_name, indexed=True, create_container=True, context=None) -> AzureDictionary:
+    def dictionary(self, container_name, folder_name, indexed=True, create_container=True, context=None,
+                   index_shards=1, index_journal=False, cache_bytes=None,
+                   cache_staleness_seconds=10, listing_prefixes=None,
+                   bloom_filter=False, notification_queues=None, track_stats=False,
+                   dedup=False) -> AzureDictionary:
         """
         Generates a remote dictionary based on the specified Azure Blob Storage container and folder.
 
@@ -91,6 +106,26 @@ class AzureFactory:
                 If False, indexing is disabled (faster writes/reads but no list of keys).
             create_container (bool, optional): If True, the container is created if it doesn't exist.
             context (Any, optional): Additional context data to be passed to AzureDictionary.
+            index_shards (int, optional): Number of hash-partitioned blobs the index is split into (default is 1).
+                More shards reduce the transfer and lock contention of each write on large indexed dictionaries.
+            index_journal (bool, optional): If True, the index is kept as a checkpoint plus an append-only journal of
+                key additions and removals, compacted in background (default is False). Not combinable with shards.
+            cache_bytes (int, optional): Byte budget of an in-process LRU cache of values validated by ETag
+                (default is None, no cache).
+            cache_staleness_seconds (float, optional): Seconds a cached value is served without checking its ETag in
+                the backend (default is 10).
+            listing_prefixes (Iterable[str], optional): Key prefixes used to list a non-indexed dictionary
+                concurrently, one range per prefix (e.g. "0123456789abcdef"). Every key must start with one of them
+                (default is None, sequential listing).
+            bloom_filter (bool, optional): If True, a Bloom filter of the keys is kept next to the index so that
+                lookups of missing keys are answered without a round trip (default is False).
+            notification_queues (list, optional): Queues (names or AzureQueue instances) where change events of the
+                keys written or removed are published, one per subscriber process (default is None, no events).
+            track_stats (bool, optional): If True, the number of keys and total bytes of the values are kept in a tiny
+                blob (updated with the changes of the writes every 'dictionary.stats.flush_seconds'), so that `len()`
+                and `stats()` are O(1) (default is False).
+            dedup (bool, optional): If True, values are stored once per distinct content (by SHA-256) in an objects
+                area, and keys hold pointers to them, so repeated values are not uploaded again (default is False).
 
         Returns:
             AzureDictionary: An AzureDictionary instance representing the remote dictionary.
@@ -108,7 +143,76 @@ class AzureFactory:
         if create_container:
             container_name.create(exists_ok=True)
 
-        return AzureDictionary(container=container_name, folder_name=folder_name, indexed=indexed, context=context)
+        if notification_queues is not None:
+            if not isinstance(notification_queues, list):
+                notification_queues = [notification_queues]
+
+            notification_queues = [self.queue(q) if type(q) is str else q for q in notification_queues]
+
+        return AzureDictionary(container=container_name, folder_name=folder_name, indexed=indexed, context=context,
+                               index_shards=index_shards, index_journal=index_journal, cache_bytes=cache_bytes,
+                               cache_staleness_seconds=cache_staleness_seconds,
+                               listing_prefixes=listing_prefixes, bloom_filter=bloom_filter,
+                               notification_queues=notification_queues, track_stats=track_stats, dedup=dedup)
+
+    def packed_dictionary(self, container_name, folder_name, create_container=True, segment_items=None,
+                          segment_bytes=None, compaction_segments=None,
+                          staleness_seconds=None, flush_seconds=None) -> AzurePackedDictionary:
+        """
+        Generates a remote dictionary for small values, packed in segment blobs of many records each.
+
+        Writes are buffered and flushed as one blob per segment, and reads fetch each record with a ranged download.
+        Buffered writes are not durable until flushed (by size, after `flush_seconds`, on `flush()` or at exit).
+        Thresholds not set are retrieved from the config parameters 'dictionary.packed.*'.
+
+        Args:
+            container_name (str or ContainerClient): The name of the Azure Blob Storage container or a Container instance retrieved from the ServiceStorage.
+            folder_name (str): The name of the folder within the container where the segments will be stored.
+            create_container (bool, optional): If True, the container is created if it doesn't exist.
+            segment_items (int, optional): Number of buffered writes that triggers a flush into a new segment.
+            segment_bytes (int, optional): Number of buffered bytes that triggers a flush into a new segment.
+            compaction_segments (int, optional): Number of segments that triggers a background compaction.
+            staleness_seconds (float, optional): Seconds the list of segments is used without checking for new ones.
+            flush_seconds (float, optional): Maximum seconds a write is kept buffered before being flushed.
+
+        Returns:
+            AzurePackedDictionary: An AzurePackedDictionary instance representing the remote dictionary.
+
+        Raises:
+            None
+        """
+        service_storage = self.service_storage
+
+        if type(container_name) is str:
+            container_name = service_storage.containers[container_name]
+
+        if create_container:
+            container_name.create(exists_ok=True)
+
+        return AzurePackedDictionary(container=container_name, folder_name=folder_name, segment_items=segment_items,
+                                     segment_bytes=segment_bytes, compaction_segments=compaction_segments,
+                                     staleness_seconds=staleness_seconds, flush_seconds=flush_seconds)
+
+    def frozen_dictionary(self, container_name, folder_name) -> AzureFrozenDictionary:
+        """
+        Opens a read-only dictionary over an immutable sorted table written by `AzureDictionary.freeze()`.
+
+        Args:
+            container_name (str or ContainerClient): The name of the Azure Blob Storage container or a Container instance retrieved from the ServiceStorage.
+            folder_name (str): The name of the folder within the container where the table is stored.
+
+        Returns:
+            AzureFrozenDictionary: An AzureFrozenDictionary instance representing the table.
+
+        Raises:
+            None
+        """
+        service_storage = self.service_storage
+
+        if type(container_name) is str:
+            container_name = service_storage.containers[container_name]
+
+        return AzureFrozenDictionary(container=container_name, folder_name=folder_name)
 
     def queue(self, queue_name, create=True) -> AzureQueue:
         """
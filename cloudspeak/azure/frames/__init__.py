@@ -0,0 +1,9 @@
+from cloudspeak.azure.frames.parquet_frame import encode_parquet_frame, decode_parquet_frame, is_parquet_frame
+from cloudspeak.azure.frames.frame_remote import FrameRemote
+
+__all__ = [
+    "encode_parquet_frame",
+    "decode_parquet_frame",
+    "is_parquet_frame",
+    "FrameRemote",
+]
@@ -0,0 +1,247 @@
+import io
+from bisect import bisect_right
+from itertools import accumulate
+
+from cloudspeak.azure.frames.parquet_frame import _require_pyarrow, pq
+
+
+class _BlobRangeReader(io.RawIOBase):
+    """
+    Seekable read-only file over a blob, where each read is a ranged download.
+
+    Ranges known in advance can be prefetched in parallel with `prefetch()`; reads falling within them are served from
+    memory.
+    """
+
+    def __init__(self, file, size):
+        super().__init__()
+        self._file = file
+        self._size = size
+        self._position = 0
+        self._buffers = []
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence}).")
+
+        self._position = max(0, position)
+        return self._position
+
+    def _read_range(self, offset, length):
+        client = self._file.file_raw
+        stream = client.download_blob(offset=offset, length=length,
+                                      max_concurrency=self._file.max_concurrency_download)
+        return stream.readall()
+
+    def prefetch(self, ranges):
+        """
+        Downloads the given ranges in parallel, merging the contiguous ones.
+
+        :param ranges:
+            List of tuples (offset, length).
+        """
+        merged = []
+
+        for offset, length in sorted(ranges):
+            if len(merged) > 0 and offset <= merged[-1][0] + merged[-1][1]:
+                last_offset, last_length = merged[-1]
+                merged[-1] = (last_offset, max(last_length, offset + length - last_offset))
+            else:
+                merged.append((offset, length))
+
+        contents = self._file.service.pool.map(lambda r: self._read_range(*r), merged)
+        self._buffers.extend((offset, memoryview(data)) for (offset, _), data in zip(merged, contents))
+
+    def release(self):
+        """
+        Drops the prefetched ranges.
+        """
+        self._buffers = []
+
+    def readinto(self, b):
+        position = self._position
+        length = min(len(b), self._size - position)
+
+        if length <= 0:
+            return 0
+
+        data = None
+
+        for offset, buffer in self._buffers:
+            if offset <= position and position + length <= offset + len(buffer):
+                data = buffer[position - offset:position - offset + length]
+                break
+
+        if data is None:
+            data = self._read_range(position, length)
+
+        b[:length] = data
+        self._position = position + length
+
+        return length
+
+
+class FrameRemote:
+    """
+    Queryable view of a DataFrame stored in the columnar (Parquet) format in a blob.
+
+    Only the footer is downloaded when instanced. Reading a subset of the columns and rows downloads only the column
+    chunks of those columns in the row groups holding those rows (in parallel, with ranged reads). For example:
+
+        ```python
+        frame = d.frame("key", columns=["price", "volume"], rows=slice(1000, 2000))
+        ```
+    """
+
+    def __init__(self, file):
+        """
+        Instances a view of the DataFrame stored in the given file.
+
+        :param file:
+            AzureFile holding a DataFrame in the columnar format.
+
+        :raises ResourceNotFoundError: if the blob does not exist.
+        :raises ValueError: if the blob does not hold a DataFrame in the columnar format.
+        """
+        _require_pyarrow()
+
+        size = file.file_raw.get_blob_properties().size
+
+        self._file = file
+        self._reader = _BlobRangeReader(file, size)
+        self._parquet = pq.ParquetFile(self._reader)
+
+        metadata = self._parquet.metadata
+        self._row_group_starts = [0] + list(accumulate(metadata.row_group(g).num_rows
+                                                       for g in range(metadata.num_row_groups)))
+
+        pandas_metadata = self._parquet.schema_arrow.pandas_metadata or {}
+        self._index_columns = [c for c in pandas_metadata.get("index_columns", []) if isinstance(c, str)]
+
+    @property
+    def file(self):
+        return self._file
+
+    @property
+    def metadata(self):
+        """
+        Retrieves the Parquet metadata (schema, row groups and column chunks) of the frame.
+        """
+        return self._parquet.metadata
+
+    @property
+    def columns(self):
+        """
+        Retrieves the names of the columns of the frame (the index excluded).
+        """
+        return [c for c in self._parquet.schema_arrow.names if c not in self._index_columns]
+
+    @property
+    def num_row_groups(self):
+        return self._parquet.metadata.num_row_groups
+
+    def __len__(self):
+        return self._parquet.metadata.num_rows
+
+    def _column_chunk_ranges(self, row_groups, columns):
+        """
+        Retrieves the byte ranges (offset, length) of the column chunks of the given columns in the given row groups.
+        """
+        metadata = self._parquet.metadata
+        wanted = None if columns is None else set(columns) | set(self._index_columns)
+        ranges = []
+
+        for g in row_groups:
+            row_group = metadata.row_group(g)
+
+            for i in range(row_group.num_columns):
+                chunk = row_group.column(i)
+
+                if wanted is not None and chunk.path_in_schema.split(".")[0] not in wanted:
+                    continue
+
+                offset = chunk.data_page_offset
+
+                if chunk.has_dictionary_page and chunk.dictionary_page_offset is not None:
+                    offset = min(offset, chunk.dictionary_page_offset)
+
+                ranges.append((offset, chunk.total_compressed_size))
+
+        return ranges
+
+    def read(self, columns=None, rows=None):
+        """
+        Retrieves the given columns and rows of the frame.
+
+        :param columns:
+            List of column names to read. None to read all the columns. The index is always read.
+
+        :param rows:
+            Slice of the row positions to read. None to read all the rows.
+
+        :return:
+            pandas DataFrame.
+        """
+        total = len(self)
+
+        if rows is None:
+            rows = slice(None)
+
+        if not isinstance(rows, slice):
+            raise TypeError(f"Rows must be a slice of row positions, not {type(rows).__name__}.")
+
+        if columns is not None:
+            columns = list(columns)
+            missing = [c for c in columns if c not in self.columns]
+
+            if len(missing) > 0:
+                raise KeyError(f"Columns {missing} do not exist in the frame.")
+
+        indexes = range(*rows.indices(total))
+
+        if len(indexes) == 0:
+            table = self._parquet.schema_arrow.empty_table()
+
+            if columns is not None:
+                table = table.select(columns + self._index_columns)
+
+            return table.to_pandas()
+
+        low, high = min(indexes[0], indexes[-1]), max(indexes[0], indexes[-1]) + 1
+        starts = self._row_group_starts
+        row_groups = list(range(bisect_right(starts, low) - 1, bisect_right(starts, high - 1)))
+
+        try:
+            self._reader.prefetch(self._column_chunk_ranges(row_groups, columns))
+            table = self._parquet.read_row_groups(row_groups, columns=columns, use_pandas_metadata=True)
+
+        finally:
+            self._reader.release()
+
+        frame = table.to_pandas()
+        offset = low - starts[row_groups[0]]
+        frame = frame.iloc[offset:offset + high - low]
+
+        return frame.iloc[indexes[0] - low::indexes.step]
+
+    def __str__(self):
+        return f"[Remote frame {self._file.name}; {len(self)} rows x {len(self.columns)} columns; " \
+               f"{self.num_row_groups} row groups]"
+
+    def __repr__(self):
+        return str(self)
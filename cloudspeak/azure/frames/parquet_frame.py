@@ -0,0 +1,70 @@
+import io
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+except ImportError:
+    pa = None
+    pq = None
+
+_MAGIC = b"PAR1"
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("Storing DataFrames in the columnar format requires pyarrow. "
+                          "Install it with `pip install pyarrow`.")
+
+
+def is_parquet_frame(data):
+    """
+    Returns whether the given bytes are a DataFrame in the columnar (Parquet) format.
+    """
+    return data is not None and len(data) >= 2 * len(_MAGIC) and \
+        data[:len(_MAGIC)] == _MAGIC and data[-len(_MAGIC):] == _MAGIC
+
+
+def encode_parquet_frame(frame, row_group_rows=None, compression="lz4"):
+    """
+    Encodes a DataFrame in the columnar (Parquet) format.
+
+    Rows are split in row groups and, within each group, every column is stored in its own column chunk, so a subset
+    of the columns and row groups can be read with ranged reads. The footer at the end of the data holds the location
+    of each column chunk. The index of the frame is stored as a regular column.
+
+    :param frame:
+        pandas DataFrame to encode.
+
+    :param row_group_rows:
+        Number of rows per row group. By default, the one of pyarrow.
+
+    :param compression:
+        Compression codec of the column chunks ("lz4", "snappy", "zstd", ...). None to store them uncompressed.
+
+    :return:
+        Bytes of the encoded frame.
+    """
+    _require_pyarrow()
+
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+    sink = io.BytesIO()
+
+    pq.write_table(table, sink, row_group_size=row_group_rows, compression=compression or "none")
+
+    return sink.getvalue()
+
+
+def decode_parquet_frame(data):
+    """
+    Decodes a whole DataFrame from its columnar (Parquet) format.
+
+    :param data:
+        Bytes of the encoded frame.
+
+    :return:
+        pandas DataFrame.
+    """
+    _require_pyarrow()
+
+    return pq.read_table(pa.BufferReader(data), use_pandas_metadata=True).to_pandas()
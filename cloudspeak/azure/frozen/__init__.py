@@ -0,0 +1,6 @@
+from cloudspeak.azure.frozen.frozen_table import FrozenTableWriter, parse_block
+
+__all__ = [
+    "FrozenTableWriter",
+    "parse_block",
+]
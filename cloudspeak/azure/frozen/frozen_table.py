@@ -0,0 +1,238 @@
+import struct
+import time
+
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+
+_LENGTH = struct.Struct("<I")
+
+
+def parse_block(data):
+    """
+    Decodes the records of a block of a frozen table.
+
+    :param data:
+        Bytes of the block.
+
+    :return:
+        List of tuples (key, serialized value), sorted by key.
+    """
+    records = []
+    position = 0
+    view = memoryview(data)
+
+    while position < len(data):
+        key_length, = _LENGTH.unpack_from(data, position)
+        position += _LENGTH.size
+        key = bytes(view[position:position + key_length]).decode("utf-8")
+        position += key_length
+
+        value_length, = _LENGTH.unpack_from(data, position)
+        position += _LENGTH.size
+        records.append((key, bytes(view[position:position + value_length])))
+        position += value_length
+
+    return records
+
+
+class FrozenTableWriter:
+    """
+    Writer of an immutable sorted table of records, to be read by `AzureFrozenDictionary`.
+
+    Records are added in increasing order of key and grouped in blocks of about `block_bytes`. Blocks are concatenated
+    in part blobs of about `part_bytes`, uploaded as soon as they are full. Once closed, an index blob is uploaded with
+    the first key and the location of each block, the number of records and an optional Bloom filter of the keys.
+
+    Part names include a generation, so that writing a table again over the same folder doesn't alter the parts
+    referenced by the previous index while it is being replaced. The index is replaced only if it is still the one read
+    before (by ETag), and only the parts it lists are removed afterwards, so concurrent writers of the same folder never
+    remove the parts of each other's tables.
+    """
+    INDEX_NAME = "__--FROZEN--INDEX--__"
+    PART_PREFIX = "__--FROZEN--PART--__."
+
+    def __init__(self, container, folder_name, block_bytes, part_bytes, bloom_filter=None):
+        """
+        Instances a new writer.
+
+        :param container:
+            Container where the table is stored.
+
+        :param folder_name:
+            Folder within the container that holds the table.
+
+        :param block_bytes:
+            Approximate size of each block (the unit of a lookup read).
+
+        :param part_bytes:
+            Approximate size of each part blob.
+
+        :param bloom_filter:
+            Empty BloomFilter to fill with the keys and store in the index. None to not store a filter.
+        """
+        if not folder_name.endswith("/"):
+            folder_name += "/"
+
+        self._container = container
+        self._folder_name = folder_name
+        self._block_bytes = block_bytes
+        self._part_bytes = part_bytes
+        self._bloom_filter = bloom_filter
+
+        self._generation = f"{time.time_ns():020d}"
+
+        self._parts = []
+        self._first_keys = []
+        self._block_parts = []
+        self._block_offsets = []
+        self._block_lengths = []
+
+        self._part = bytearray()
+        self._block = bytearray()
+        self._block_first_key = None
+        self._last_key = None
+        self._count = 0
+
+        self._upload_progress = None
+
+    @property
+    def count(self):
+        return self._count
+
+    def add(self, key, data):
+        """
+        Adds a record to the table.
+
+        :param key:
+            Key of the record. Must be greater than the key of the previous record.
+
+        :param data:
+            Serialized value of the record (bytes).
+        """
+        if self._last_key is not None and key <= self._last_key:
+            raise ValueError(f"Keys must be added in increasing order (\"{key}\" after \"{self._last_key}\").")
+
+        encoded_key = key.encode("utf-8")
+        record = b"".join([_LENGTH.pack(len(encoded_key)), encoded_key, _LENGTH.pack(len(data)), data])
+
+        if len(self._block) > 0 and len(self._block) + len(record) > self._block_bytes:
+            self._close_block()
+
+        if self._block_first_key is None:
+            self._block_first_key = key
+
+        self._block += record
+        self._last_key = key
+        self._count += 1
+
+        if self._bloom_filter is not None:
+            self._bloom_filter.add(key)
+
+    def _close_block(self):
+        if len(self._block) == 0:
+            return
+
+        self._first_keys.append(self._block_first_key)
+        self._block_parts.append(len(self._parts))
+        self._block_offsets.append(len(self._part))
+        self._block_lengths.append(len(self._block))
+
+        self._part += self._block
+        self._block = bytearray()
+        self._block_first_key = None
+
+        if len(self._part) >= self._part_bytes:
+            self._close_part()
+
+    def _part_file(self, name):
+        return self._container[f"{self._folder_name}{name}"]
+
+    def _join_upload(self):
+        if self._upload_progress is not None:
+            self._upload_progress.join(tqdm_bar=False)
+            self._upload_progress = None
+
+    def _close_part(self):
+        if len(self._part) == 0:
+            return
+
+        # Only one part is uploaded at a time, to bound the memory taken by the writer
+        self._join_upload()
+
+        name = f"{self.PART_PREFIX}{self._generation}.{len(self._parts):05d}"
+        file = self._part_file(name)
+        file.data_raw = bytes(self._part)
+
+        self._upload_progress = file.upload(overwrite=True, allow_changed=True)
+        self._parts.append(name)
+        self._part = bytearray()
+
+    @staticmethod
+    def _read_index(index_file):
+        """
+        Downloads the index of the table currently stored in the folder.
+
+        :return:
+            Tuple (index, ETag) of the current index. (None, None) if there is no table.
+        """
+        # The file may hold the data of a failed upload, which a conditional download would not replace
+        index_file.reset_status()
+
+        try:
+            index_file.download().join(tqdm_bar=False)
+
+        except ResourceNotFoundError:
+            return None, None
+
+        etag = index_file.etag
+
+        return (index_file.data, etag) if etag is not None else (None, None)
+
+    def close(self):
+        """
+        Uploads the pending records and the index of the table. The parts of the table it replaces are removed.
+
+        :return:
+            The content of the index.
+        """
+        self._close_block()
+        self._close_part()
+        self._join_upload()
+
+        index = {
+            "count": self._count,
+            "parts": self._parts,
+            "first_keys": self._first_keys,
+            "block_parts": self._block_parts,
+            "block_offsets": self._block_offsets,
+            "block_lengths": self._block_lengths,
+            "bloom": self._bloom_filter,
+        }
+
+        while True:
+            index_file = self._part_file(self.INDEX_NAME)
+            previous, etag = self._read_index(index_file)
+
+            index_file.data = index
+
+            try:
+                if etag is None:
+                    index_file.upload(overwrite=False).join(tqdm_bar=False)
+
+                else:
+                    index_file.upload(overwrite=True, etag=etag).join(tqdm_bar=False)
+
+            except (ResourceModifiedError, ResourceExistsError):
+                # Other writer replaced the index meanwhile. Ours replaces its one instead.
+                continue
+
+            break
+
+        # Readers of the previous index reload it when they don't find its parts
+        if previous is not None:
+            current = set(self._parts)
+            stale = [self._part_file(name) for name in previous["parts"] if name not in current]
+
+            if len(stale) > 0:
+                self._container.delete_many_files(stale, changed_ok=True, raise_errors=False)
+
+        return index
@@ -0,0 +1,11 @@
+from cloudspeak.azure.index.key_set import KeySet
+from cloudspeak.azure.index.index_single import IndexSingle
+from cloudspeak.azure.index.index_sharded import IndexSharded
+from cloudspeak.azure.index.index_journal import IndexJournal
+
+__all__ = [
+    "KeySet",
+    "IndexSingle",
+    "IndexSharded",
+    "IndexJournal",
+]
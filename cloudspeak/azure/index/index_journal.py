@@ -0,0 +1,438 @@
+import json
+import logging
+from threading import Lock, Thread
+
+from azure.core.exceptions import HttpResponseError, ResourceExistsError, ResourceNotFoundError
+
+from cloudspeak.azure.index.index_single import apply_delta, to_key_set
+from cloudspeak.azure.index.key_set import KeySet
+from cloudspeak.config import get_config
+from cloudspeak.utils.basics import removeprefix
+
+
+class IndexJournal:
+    """
+    Index of keys of a remote dictionary stored as a checkpoint plus an append-only journal.
+
+    Additions and removals of keys are appended as small records to an append blob (the journal), so writing a key
+    costs O(1) bytes regardless of the size of the index. Once the journal grows beyond a threshold, it is folded into
+    the checkpoint by a compaction step, which runs in background.
+
+    Journals are numbered by generation. The checkpoint stores the generation of the first journal that is not folded
+    into it. A compaction seals the current journal (so that no more records can be appended), creates the next one,
+    folds the sealed one into a new checkpoint and finally removes it.
+
+    Writes are appended in blocks of up to 4 MiB (the limit of Azure for an append). A journal close to the limit of
+    50,000 appends is sealed and the next one is used, even if compactions keep failing; the sealed journals are folded
+    one by one by the next compactions.
+    """
+    # Limits of Azure append blobs
+    APPEND_BLOCK_BYTES = 4 * 1024 * 1024
+    MAX_APPENDS = 50000
+
+    # Journals are sealed these appends before the limit, which leaves room to the appends of concurrent writers
+    SEAL_MARGIN = 1000
+
+    def __init__(self, container, checkpoint_name, journal_prefix, context=None, compaction_bytes=None,
+                 compaction_appends=None):
+        """
+        Instances a new journaled index.
+
+        :param container:
+            Container where the index blobs are stored.
+
+        :param checkpoint_name:
+            Name of the blob holding the checkpoint.
+
+        :param journal_prefix:
+            Prefix of the names of the journal blobs. The generation number is appended to it.
+
+        :param context:
+            Context used to lock the checkpoint while it is being compacted.
+
+        :param compaction_bytes:
+            Size in bytes of the journal that triggers a compaction.
+            If not set, retrieved from config parameter 'dictionary.index.journal.compaction_bytes'.
+
+        :param compaction_appends:
+            Number of appends to the journal that triggers a compaction.
+            If not set, retrieved from config parameter 'dictionary.index.journal.compaction_appends'.
+        """
+        config = get_config()
+
+        self._logger = logging.getLogger("cs-index-journal")
+        self._container = container
+        self._checkpoint_file = container[checkpoint_name]
+        self._journal_prefix = journal_prefix
+        self._context = context
+
+        self._compaction_bytes = compaction_bytes if compaction_bytes is not None \
+            else config.get('dictionary.index.journal.compaction_bytes')
+        self._compaction_appends = compaction_appends if compaction_appends is not None \
+            else config.get('dictionary.index.journal.compaction_appends')
+
+        self._lock = Lock()
+        self._generation = None
+        self._journals_read = {}
+
+        self._compaction_thread = None
+
+    @property
+    def files(self):
+        """
+        Retrieves the list of files that compose this index.
+        """
+        journals = [self._journal_file(g) for g in self._list_generations()]
+        return [self._checkpoint_file] + journals
+
+    def _journal_file(self, generation):
+        return self._container[f"{self._journal_prefix}{generation:010d}"]
+
+    def _list_generations(self):
+        """
+        Lists the generations of the journals available in the backend, sorted.
+        """
+        journal_prefix = self._journal_prefix
+        generations = []
+
+        for f in self._container.get_files(journal_prefix):
+            generation = removeprefix(f.name, journal_prefix)
+
+            if not generation.isdigit():
+                self._logger.debug(f"Unexpected journal blob found: {f.name}")
+                continue
+
+            generations.append(int(generation))
+
+        return sorted(generations)
+
+    def _read_checkpoint(self):
+        """
+        Retrieves the latest checkpoint as a tuple (generation, keys).
+        """
+        checkpoint_file = self._checkpoint_file
+
+        try:
+            checkpoint_file.download().join(tqdm_bar=False)
+            checkpoint = checkpoint_file.data
+
+        except ResourceNotFoundError:
+            checkpoint = None
+
+        if checkpoint is None:
+            return 0, KeySet()
+
+        return checkpoint["generation"], to_key_set(checkpoint["keys"])
+
+    def _read_journal(self, generation):
+        """
+        Retrieves the full content of the journal of the given generation.
+        Only the tail that was not read before is downloaded.
+
+        :raises ResourceNotFoundError: if the journal does not exist.
+        """
+        client = self._journal_file(generation).file_raw
+        content = self._journals_read.get(generation, b"")
+
+        try:
+            stream = client.download_blob(offset=len(content) if len(content) > 0 else None)
+            content += stream.readall()
+
+        except ResourceNotFoundError:
+            self._journals_read.pop(generation, None)
+            raise
+
+        except HttpResponseError as e:
+            # Nothing new has been appended since the last read
+            if e.status_code != 416:
+                raise
+
+        self._journals_read[generation] = content
+
+        return content
+
+    @staticmethod
+    def _encode(added=None, removed=None):
+        """
+        Encodes additions and removals of keys as journal records (one per line).
+        """
+        records = [f"-{json.dumps(k)}\n" for k in (removed if removed is not None else [])]
+        records.extend([f"+{json.dumps(k)}\n" for k in (added if added is not None else [])])
+        return "".join(records).encode("utf-8")
+
+    @staticmethod
+    def _replay(operations, journal):
+        """
+        Collects the records of the journal into the given operations.
+
+        :param operations:
+            Dictionary {key: op} with the last operation ("+" or "-") found for each key. Modified in place.
+
+        :param journal:
+            Bytes of the journal.
+        """
+        for record in journal.decode("utf-8").splitlines():
+            operations[json.loads(record[1:])] = record[0]
+
+        return operations
+
+    @staticmethod
+    def _apply(keys, operations):
+        """
+        Applies the operations collected from the journals to the keys of a checkpoint.
+        """
+        added = [k for k, op in operations.items() if op == "+"]
+        removed = [k for k, op in operations.items() if op == "-"]
+
+        return apply_delta(keys, added=added, removed=removed)
+
+    def read(self):
+        """
+        Retrieves the latest version of the index, rebuilt from the checkpoint and the journals after it.
+        """
+        previous_generation = None
+
+        with self._lock:
+            while True:
+                generation, keys = self._read_checkpoint()
+                generations = [g for g in self._list_generations() if g >= generation]
+
+                if len(generations) > 0 and generations[0] != generation and generation != previous_generation:
+                    # A compaction finished between reading the checkpoint and listing the journals.
+                    previous_generation = generation
+                    continue
+
+                operations = {}
+
+                try:
+                    for g in generations:
+                        self._replay(operations, self._read_journal(g))
+
+                except ResourceNotFoundError:
+                    # A compaction removed a journal while it was being read.
+                    previous_generation = generation
+                    continue
+
+                return self._apply(keys, operations)
+
+    def write(self, new_content):
+        """
+        Sets the content of the index.
+
+        The differences with the latest version of the index are appended to the journal.
+        """
+        content = self.read()
+        new_content = to_key_set(new_content)
+
+        self.update(added=new_content.difference(content), removed=content.difference(new_content))
+
+    def update(self, added=None, removed=None):
+        """
+        Adds and removes the given keys from the index by appending records to the journal.
+
+        :param added:
+            Keys to add to the index.
+
+        :param removed:
+            Keys to remove from the index.
+        """
+        records = self._encode(added=added, removed=removed)
+
+        if len(records) == 0:
+            return
+
+        with self._lock:
+            generation = self._generation
+
+        if generation is None:
+            generations = self._list_generations()
+            generation = generations[-1] if len(generations) > 0 else None
+
+        for block in self._split_blocks(records):
+            generation, result = self._append(generation, block)
+
+        journal_appends = int(result.get('blob_committed_block_count', 0))
+
+        if journal_appends >= self.MAX_APPENDS - self.SEAL_MARGIN:
+            generation = self._roll(generation)
+
+        with self._lock:
+            self._generation = generation
+
+        journal_size = int(result.get('blob_append_offset', 0)) + len(block)
+
+        if journal_size > self._compaction_bytes or journal_appends > self._compaction_appends:
+            self.compact_background()
+
+    @classmethod
+    def _split_blocks(cls, records):
+        """
+        Splits encoded records into blocks of up to APPEND_BLOCK_BYTES, at record boundaries.
+        """
+        limit = cls.APPEND_BLOCK_BYTES
+        blocks = []
+        start = 0
+
+        while start < len(records):
+            end = start + limit
+
+            if end < len(records):
+                end = records.rindex(b"\n", start, end) + 1
+
+            blocks.append(records[start:end])
+            start = end
+
+        return blocks
+
+    def _append(self, generation, block):
+        """
+        Appends a block of records to the current journal, starting with the one of the given generation.
+
+        :return:
+            Tuple (generation of the journal where the block was appended, result of the append).
+        """
+        while True:
+            if generation is None:
+                # Fresh index: the first journal is created.
+                generation, _ = self._read_checkpoint()
+                self._create_journal(generation)
+
+            client = self._journal_file(generation).file_raw
+
+            try:
+                return generation, client.append_block(block)
+
+            except ResourceNotFoundError:
+                # The journal was compacted and removed. We look for the current one.
+                generations = [g for g in self._list_generations() if g > generation]
+                generation = generations[-1] if len(generations) > 0 else None
+
+            except HttpResponseError as e:
+                error_code = getattr(e, "error_code", None)
+
+                if error_code == "BlockCountExceedsLimit":
+                    # Concurrent writers filled the journal before it was sealed
+                    generation = self._roll(generation)
+
+                elif error_code == "BlobIsSealed":
+                    # A compaction sealed the journal. Records go to the next generation.
+                    generation += 1
+                    self._create_journal(generation)
+
+                else:
+                    raise
+
+    def _roll(self, generation):
+        """
+        Seals the journal of the given generation and creates the next one, where the next records are appended.
+
+        :return:
+            The generation of the new journal.
+        """
+        try:
+            self._journal_file(generation).file_raw.seal_append_blob()
+
+        except ResourceNotFoundError:
+            # Already compacted
+            pass
+
+        self._logger.debug(f"Journal {generation} is full: records go to the next one")
+        self._create_journal(generation + 1)
+
+        return generation + 1
+
+    def _create_journal(self, generation):
+        """
+        Creates the journal of the given generation if it doesn't exist yet.
+        """
+        client = self._journal_file(generation).file_raw
+
+        try:
+            client.create_append_blob(if_none_match="*")
+
+        except ResourceExistsError:
+            pass
+
+    def compact_background(self):
+        """
+        Starts a compaction in a background thread, unless one is already running for this instance.
+        """
+        with self._lock:
+            thread = self._compaction_thread
+
+            if thread is not None and thread.is_alive():
+                return
+
+            thread = Thread(target=self._compact_silent, daemon=True)
+            self._compaction_thread = thread
+
+        thread.start()
+
+    def _compact_silent(self):
+        try:
+            self.compact(wait_seconds=1)
+
+        except TimeoutError:
+            self._logger.debug("Compaction skipped: other process is compacting the index.")
+
+        except Exception as e:
+            self._logger.warning(f"Compaction of the index failed: {e}")
+
+    def compact(self, wait_seconds=-1):
+        """
+        Folds the current journal into the checkpoint.
+
+        :param wait_seconds:
+            Number of seconds to wait for the checkpoint lock in case other process is compacting.
+            Use the value -1 to block indefinitely.
+        """
+        context = self._context
+        checkpoint_file = self._checkpoint_file
+
+        try:
+            checkpoint_file.lock(duration_seconds=60, wait_seconds=wait_seconds, changed_ok=True, context=context)
+
+        except ResourceNotFoundError:
+            try:
+                checkpoint_file.data = {"generation": 0, "keys": KeySet()}
+                checkpoint_file.upload(overwrite=False).join(tqdm_bar=False)
+
+            except ResourceExistsError:
+                pass
+
+            checkpoint_file.lock(duration_seconds=60, wait_seconds=wait_seconds, changed_ok=True, context=context)
+
+        try:
+            generation, keys = self._read_checkpoint()
+            journal_client = self._journal_file(generation).file_raw
+
+            try:
+                journal_client.seal_append_blob()
+
+            except ResourceNotFoundError:
+                # No journal to compact
+                return
+
+            self._create_journal(generation + 1)
+
+            with self._lock:
+                content = self._apply(keys, self._replay({}, self._read_journal(generation)))
+
+            checkpoint_file.data = {"generation": generation + 1, "keys": content}
+            checkpoint_file.upload(overwrite=True, allow_changed=True, context=context).join(tqdm_bar=False)
+
+            journal_client.delete_blob()
+
+            with self._lock:
+                self._journals_read.pop(generation, None)
+
+            self._logger.debug(f"Compacted journal {generation} into the checkpoint ({len(content)} keys)")
+
+        finally:
+            checkpoint_file.unlock(context=context)
+
+    def __str__(self):
+        return f"[Journal index; {self._checkpoint_file.name}]"
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,116 @@
+import zlib
+
+from cloudspeak.azure.index.index_single import IndexSingle, apply_delta
+from cloudspeak.azure.index.key_set import KeySet
+
+
+class IndexSharded:
+    """
+    Index of keys of a remote dictionary split in several hash-partitioned blobs (shards).
+
+    Every key belongs to exactly one shard, so writing a key only requires downloading, locking and uploading the shard
+    that owns it. Reading the full index downloads all the shards in parallel.
+    """
+
+    def __init__(self, files, context=None):
+        """
+        Instances a new sharded index.
+
+        :param files:
+            List of AzureFile, one per shard. The order of the list determines the shard of each key, so every
+            instance sharing the index must use the same files in the same order.
+
+        :param context:
+            Context used to lock the shards while they are being written.
+        """
+        if len(files) == 0:
+            raise ValueError("A sharded index requires at least one shard.")
+
+        self._shards = [IndexSingle(f, context=context) for f in files]
+
+    @property
+    def shards(self):
+        return self._shards
+
+    @property
+    def files(self):
+        """
+        Retrieves the list of files that compose this index.
+        """
+        return [s.file for s in self._shards]
+
+    def shard_of(self, key):
+        """
+        Retrieves the shard number that owns the given key.
+
+        The hash is stable across processes (unlike python's `hash()`), so all the instances agree on it.
+        """
+        return zlib.crc32(key.encode("utf-8")) % len(self._shards)
+
+    def _split(self, keys):
+        """
+        Groups the given keys by shard number.
+        """
+        groups = {}
+
+        for k in keys:
+            groups.setdefault(self.shard_of(k), []).append(k)
+
+        return groups
+
+    def read(self):
+        """
+        Retrieves the latest version of the index.
+        All the shards are downloaded in parallel.
+        """
+        shards = self._shards
+        progresses = [s.async_read() for s in shards]
+
+        contents = [shard.join_read(progress) for shard, progress in zip(shards, progresses)]
+
+        return KeySet().union(*contents)
+
+    def write(self, new_content):
+        """
+        Sets the content of the index.
+
+        Each shard is written with its own lock, merging the modifications with the ones in the backend.
+        """
+        groups = self._split(new_content)
+
+        for shard_number, shard in enumerate(self._shards):
+            shard.write(groups.get(shard_number, []))
+
+    def update(self, added=None, removed=None):
+        """
+        Adds and removes the given keys from the index.
+        Only the shards owning the given keys are downloaded and uploaded.
+
+        :param added:
+            Keys to add to the index.
+
+        :param removed:
+            Keys to remove from the index.
+        """
+        added = self._split(added if added is not None else [])
+        removed = self._split(removed if removed is not None else [])
+
+        shards = self._shards
+        shard_numbers = sorted(set(added).union(removed))
+
+        # Downloads of the affected shards are done in parallel
+        progresses = [shards[i].async_read() for i in shard_numbers]
+
+        for shard_number, progress in zip(shard_numbers, progresses):
+            shard = shards[shard_number]
+            content = shard.join_read(progress)
+
+            shard.write(apply_delta(content,
+                                    added=added.get(shard_number),
+                                    removed=removed.get(shard_number)))
+
+    def __str__(self):
+        return f"[Sharded index; {len(self._shards)} shards]"
+
+    def __repr__(self):
+        return str(self)
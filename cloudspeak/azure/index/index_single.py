@@ -0,0 +1,194 @@
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+
+from cloudspeak.azure.index.key_set import KeySet
+
+
+def apply_delta(content, added=None, removed=None):
+    """
+    Applies a delta of keys to the given index content.
+
+    :param content:
+        KeySet of the index.
+
+    :param added:
+        Keys to add to the index.
+
+    :param removed:
+        Keys to remove from the index.
+
+    :return:
+        New KeySet of keys.
+    """
+    if removed:
+        content = content.difference(removed)
+
+    if added:
+        content = content.union(added)
+
+    return content
+
+
+def to_key_set(content):
+    """
+    Converts the content of an index blob into a KeySet.
+    Older versions of the index were stored as plain lists of keys.
+    """
+    if content is None:
+        return KeySet()
+
+    return content if isinstance(content, KeySet) else KeySet(content)
+
+
+class IndexSingle:
+    """
+    Index of keys of a remote dictionary stored in a single blob.
+    """
+
+    def __init__(self, file, context=None):
+        """
+        Instances a new single-blob index.
+
+        :param file:
+            AzureFile where the list of keys is stored.
+
+        :param context:
+            Context used to lock the index file while it is being written.
+        """
+        self._file = file
+        self._context = context
+
+    @property
+    def file(self):
+        return self._file
+
+    @property
+    def files(self):
+        """
+        Retrieves the list of files that compose this index.
+        """
+        return [self._file]
+
+    def async_read(self):
+        """
+        Starts the download of the latest version of the index.
+
+        :return:
+            A Progress object. Use `join_read()` with it to retrieve the content.
+        """
+        return self._file.download()
+
+    def join_read(self, progress):
+        """
+        Waits for a download started with `async_read()` and retrieves the content.
+
+        :param progress:
+            Progress object returned by `async_read()`.
+
+        :return:
+            KeySet with the keys in the index.
+        """
+        try:
+            progress.join(tqdm_bar=False)
+            content = to_key_set(self._file.data)
+
+        except ResourceNotFoundError:
+            content = KeySet()
+
+        return content
+
+    def read(self):
+        """
+        Retrieves the latest version of the index.
+        """
+        return self.join_read(self.async_read())
+
+    def write(self, new_content):
+        """
+        Sets the content of the index.
+
+        If content was updated, before setting, this method will merge the modifications with the ones in the backend.
+        """
+        context = self._context
+        index_file = self._file
+        idx_old_content = to_key_set(index_file.data)
+        new_content = to_key_set(new_content)
+
+        # We try to upload the new index.
+        try:
+            self._lock()
+            index_file.data = new_content
+            index_file.upload(overwrite=True,
+                              allow_changed=False,
+                              context=context).join(tqdm_bar=False)
+
+        except ResourceModifiedError:
+            # If the content has changed we need to merge changes.
+            index_file.download().join(tqdm_bar=False)
+            idx_latest_content = to_key_set(index_file.data)
+
+            # We take which elements new content added w.r.t. old content:
+            elements_added = new_content.difference(idx_old_content)
+
+            # We take which elements new content removed w.r.t. old content:
+            elements_removed = idx_old_content.difference(new_content)
+
+            # We take which elements other instances removed w.r.t. old content
+            elements_other_removed = idx_old_content.difference(idx_latest_content)
+
+            merged_content = idx_latest_content.difference(elements_removed)
+
+            # We add elements added if they were not removed by others:
+            elements_to_append = elements_added.difference(elements_other_removed)
+
+            merged_content = merged_content.union(elements_to_append)
+
+            # The index is locked before last download. We are going to have the last version till this line for sure.
+
+            # Recursive assignment: A new attempt is performed until allowed.
+            # Since the lock is done within the same context, cascading locks is safe (only first is taken into account)
+            index_file.data = merged_content
+            index_file.upload(overwrite=True, allow_changed=True, context=context).join(tqdm_bar=False)
+
+        finally:
+            index_file.unlock(context=context)
+
+    def _lock(self):
+        """
+        Locks the index file, creating it empty if it didn't exist yet (a lease can't be acquired on a missing blob).
+
+        The lease is taken regardless of changes in the backend: conflicts are detected afterwards by the conditional
+        upload of the new content.
+        """
+        index_file = self._file
+
+        try:
+            index_file.lock(duration_seconds=60, changed_ok=True, context=self._context)
+
+        except ResourceNotFoundError:
+            try:
+                index_file.data = KeySet()
+                index_file.upload(overwrite=False).join(tqdm_bar=False)
+
+            except ResourceExistsError:
+                # Other instance created it first. We keep track of its version so that the merge is done.
+                index_file.download().join(tqdm_bar=False)
+
+            index_file.lock(duration_seconds=60, changed_ok=True, context=self._context)
+
+    def update(self, added=None, removed=None):
+        """
+        Adds and removes the given keys from the index.
+
+        :param added:
+            Keys to add to the index.
+
+        :param removed:
+            Keys to remove from the index.
+        """
+        self.write(apply_delta(self.read(), added=added, removed=removed))
+
+    def __str__(self):
+        return f"[Single index; {self._file.name}]"
+
+    def __repr__(self):
+        return str(self)
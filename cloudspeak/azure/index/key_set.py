@@ -0,0 +1,328 @@
+from array import array
+from heapq import merge
+
+
+def _encode_varint(value, buffer):
+    """
+    Appends the unsigned LEB128 representation of the value to the buffer.
+    """
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    buffer.append(value)
+
+
+def _decode_varint(data, position):
+    """
+    Decodes an unsigned LEB128 value from data at the given position.
+
+    :return:
+        Tuple (value, new_position).
+    """
+    value = 0
+    shift = 0
+
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+
+        if byte < 0x80:
+            return value, position
+
+        shift += 7
+
+
+def _unique(sorted_iterable):
+    """
+    Drops consecutive duplicates of a sorted iterable.
+    """
+    previous = None
+
+    for item in sorted_iterable:
+        if item != previous:
+            yield item
+            previous = item
+
+
+def key_set_from_bytes(data):
+    """
+    Builds a KeySet from its wire format. Used for unpickling.
+    """
+    return KeySet.from_bytes(data)
+
+
+class KeySet:
+    """
+    Immutable sorted set of string keys with a compact memory layout.
+
+    Keys are kept UTF-8 encoded and concatenated in a single bytes object, along with an array of offsets. This takes
+    the size of the keys plus 8 bytes per key, instead of the ~60 bytes of overhead of each python string in a list.
+
+    UTF-8 byte order matches the code point order of python strings, so keys are iterated sorted as `sorted()` would.
+    Membership is resolved by binary search and set operations are linear merges of the sorted keys.
+
+    The wire format (used when pickled) is front-coded: each key only stores the suffix that differs from the previous
+    one, which compresses well the usual keys sharing prefixes.
+    """
+    _MAGIC = b"CSKS\x01"
+
+    def __init__(self, keys=None):
+        """
+        Instances a new set of keys.
+
+        :param keys:
+            Iterable of string keys, in any order and possibly with duplicates.
+        """
+        if isinstance(keys, KeySet):
+            self._blob = keys._blob
+            self._offsets = keys._offsets
+            return
+
+        encoded = sorted(set(k.encode("utf-8") for k in (keys if keys is not None else [])))
+        self._blob, self._offsets = self._pack(encoded)
+
+    @staticmethod
+    def _pack(sorted_encoded_keys):
+        blob = bytearray()
+        offsets = array('Q', [0])
+
+        for k in sorted_encoded_keys:
+            blob += k
+            offsets.append(len(blob))
+
+        return bytes(blob), offsets
+
+    @classmethod
+    def _from_sorted_encoded(cls, sorted_encoded_keys):
+        """
+        Builds a KeySet from an iterable of UTF-8 encoded keys already sorted and without duplicates.
+        """
+        result = cls.__new__(cls)
+        result._blob, result._offsets = cls._pack(sorted_encoded_keys)
+        return result
+
+    def _encoded(self, i):
+        offsets = self._offsets
+        return self._blob[offsets[i]:offsets[i + 1]]
+
+    def _iter_encoded(self):
+        blob = self._blob
+        offsets = self._offsets
+
+        for i in range(len(offsets) - 1):
+            yield blob[offsets[i]:offsets[i + 1]]
+
+    def bisect_left(self, key):
+        """
+        Retrieves the position where the given key is (or would be inserted to keep the set sorted).
+        """
+        encoded = key.encode("utf-8")
+        lo, hi = 0, len(self)
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+
+            if self._encoded(mid) < encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def bisect_prefix_end(self, prefix):
+        """
+        Retrieves the position after the last key that starts with the given prefix (or where it would be).
+        """
+        encoded = prefix.encode("utf-8")
+        length = len(encoded)
+        lo, hi = 0, len(self)
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+
+            if self._encoded(mid)[:length] <= encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def key_range(self, prefix=None, start=None, stop=None):
+        """
+        Retrieves the positions [lo, hi) of the keys that start with the given prefix and are within [start, stop).
+        Found by binary search, so a range of keys is retrieved in O(log n + k) with `self[lo:hi]`.
+
+        :param prefix:
+            Prefix the keys must start with. None for any.
+
+        :param start:
+            First key of the range (inclusive). None for no lower bound.
+
+        :param stop:
+            Last key of the range (exclusive). None for no upper bound.
+        """
+        lo, hi = 0, len(self)
+
+        if prefix is not None:
+            lo, hi = self.bisect_left(prefix), self.bisect_prefix_end(prefix)
+
+        if start is not None:
+            lo = max(lo, self.bisect_left(start))
+
+        if stop is not None:
+            hi = min(hi, self.bisect_left(stop))
+
+        return lo, max(lo, hi)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __contains__(self, key):
+        if not isinstance(key, str):
+            return False
+
+        i = self.bisect_left(key)
+        return i < len(self) and self._encoded(i) == key.encode("utf-8")
+
+    def __iter__(self):
+        for k in self._iter_encoded():
+            yield k.decode("utf-8")
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+
+        if item < 0:
+            item += len(self)
+
+        if not 0 <= item < len(self):
+            raise IndexError("KeySet index out of range")
+
+        return self._encoded(item).decode("utf-8")
+
+    def __eq__(self, other):
+        if not isinstance(other, KeySet):
+            return NotImplemented
+
+        return self._blob == other._blob and self._offsets == other._offsets
+
+    def union(self, *others):
+        """
+        Retrieves a new KeySet with the keys of this set and all the others.
+        """
+        others = [o if isinstance(o, KeySet) else KeySet(o) for o in others]
+        iterables = [self._iter_encoded()] + [o._iter_encoded() for o in others]
+        return self._from_sorted_encoded(_unique(merge(*iterables)))
+
+    def difference(self, other):
+        """
+        Retrieves a new KeySet with the keys of this set that are not in the other.
+        """
+        other = other if isinstance(other, KeySet) else KeySet(other)
+        return self._from_sorted_encoded(self._difference_encoded(other))
+
+    def _difference_encoded(self, other):
+        other_keys = other._iter_encoded()
+        other_key = next(other_keys, None)
+
+        for k in self._iter_encoded():
+            while other_key is not None and other_key < k:
+                other_key = next(other_keys, None)
+
+            if k != other_key:
+                yield k
+
+    def intersection(self, other):
+        """
+        Retrieves a new KeySet with the keys of this set that are also in the other.
+        """
+        other = other if isinstance(other, KeySet) else KeySet(other)
+        return self._from_sorted_encoded(self._intersection_encoded(other))
+
+    def _intersection_encoded(self, other):
+        other_keys = other._iter_encoded()
+        other_key = next(other_keys, None)
+
+        for k in self._iter_encoded():
+            while other_key is not None and other_key < k:
+                other_key = next(other_keys, None)
+
+            if k == other_key:
+                yield k
+
+    @property
+    def nbytes(self):
+        """
+        Retrieves the number of bytes taken by the keys in memory.
+        """
+        return len(self._blob) + self._offsets.itemsize * len(self._offsets)
+
+    def to_bytes(self):
+        """
+        Encodes the set in its front-coded wire format.
+        """
+        buffer = bytearray(self._MAGIC)
+        _encode_varint(len(self), buffer)
+
+        previous = b""
+
+        for k in self._iter_encoded():
+            shared = 0
+            limit = min(len(previous), len(k))
+
+            while shared < limit and previous[shared] == k[shared]:
+                shared += 1
+
+            _encode_varint(shared, buffer)
+            _encode_varint(len(k) - shared, buffer)
+            buffer += k[shared:]
+            previous = k
+
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Decodes a set from its front-coded wire format.
+        """
+        magic = cls._MAGIC
+
+        if data[:len(magic)] != magic:
+            raise ValueError("Data is not a KeySet in a supported format.")
+
+        count, position = _decode_varint(data, len(magic))
+
+        blob = bytearray()
+        offsets = array('Q', [0])
+        previous_start = 0
+
+        for _ in range(count):
+            shared, position = _decode_varint(data, position)
+            suffix_length, position = _decode_varint(data, position)
+
+            start = len(blob)
+            blob += blob[previous_start:previous_start + shared]
+            blob += data[position:position + suffix_length]
+            position += suffix_length
+
+            offsets.append(len(blob))
+            previous_start = start
+
+        result = cls.__new__(cls)
+        result._blob = bytes(blob)
+        result._offsets = offsets
+        return result
+
+    def __reduce__(self):
+        return key_set_from_bytes, (self.to_bytes(),)
+
+    def __str__(self):
+        return f"[KeySet; {len(self)} keys; {self.nbytes} bytes]"
+
+    def __repr__(self):
+        return str(self)
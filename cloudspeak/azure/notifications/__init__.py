@@ -0,0 +1,7 @@
+from cloudspeak.azure.notifications.change_publisher import ChangePublisher
+from cloudspeak.azure.notifications.change_subscriber import ChangeSubscriber
+
+__all__ = [
+    "ChangePublisher",
+    "ChangeSubscriber",
+]
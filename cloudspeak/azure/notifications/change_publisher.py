@@ -0,0 +1,89 @@
+import json
+import logging
+
+
+class ChangePublisher:
+    """
+    Publisher of change events of a remote dictionary to one or many queues.
+
+    Queue messages are consumed only once, so each subscriber process must consume its own queue: the publisher pushes
+    every event to all the queues (fan-out).
+
+    Events are JSON objects {"folder": folder_name, "op": "set" | "del", "keys": [[key, etag], ...]}. Keys are split in
+    several events so that each message stays below the size limit of the queues.
+    """
+    MAX_MESSAGE_CHARS = 48 * 1024
+
+    def __init__(self, queues):
+        """
+        Instances a new publisher.
+
+        :param queues:
+            AzureQueue or list of AzureQueue where the events are pushed.
+        """
+        self._logger = logging.getLogger("cs-notifications")
+        self._queues = queues if isinstance(queues, list) else [queues]
+
+    @property
+    def queues(self):
+        return self._queues
+
+    def _encode(self, folder_name, op, entries):
+        """
+        Encodes the given entries as a list of JSON events, each one below the size limit.
+        """
+        messages = []
+        chunk = []
+        chunk_chars = 0
+
+        for entry in entries:
+            entry_chars = len(json.dumps(entry)) + 2
+
+            if len(chunk) > 0 and chunk_chars + entry_chars > self.MAX_MESSAGE_CHARS:
+                messages.append(json.dumps({"folder": folder_name, "op": op, "keys": chunk}))
+                chunk = []
+                chunk_chars = 0
+
+            chunk.append(entry)
+            chunk_chars += entry_chars
+
+        if len(chunk) > 0:
+            messages.append(json.dumps({"folder": folder_name, "op": op, "keys": chunk}))
+
+        return messages
+
+    def publish(self, folder_name, op, entries):
+        """
+        Publishes a change event to all the queues.
+
+        Failures are logged but not raised: the change is already stored, and subscribers still revalidate their
+        state after their staleness window.
+
+        :param folder_name:
+            Folder of the dictionary that changed.
+
+        :param op:
+            "set" for written keys, "del" for removed keys.
+
+        :param entries:
+            List of tuples (key, etag). The etag is None for removed keys.
+        """
+        entries = [[k, etag] for k, etag in entries]
+
+        if len(entries) == 0:
+            return
+
+        messages = self._encode(folder_name, op, entries)
+
+        for queue in self._queues:
+            try:
+                queue.push(messages)
+
+            except Exception as e:
+                self._logger.warning(f"Could not publish {len(entries)} changes to {queue}: {e}")
+
+    def __str__(self):
+        return f"[Change publisher; {len(self._queues)} queues]"
+
+    def __repr__(self):
+        return str(self)
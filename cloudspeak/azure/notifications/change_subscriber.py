@@ -0,0 +1,112 @@
+import json
+import logging
+from threading import Event, Thread
+
+
+class ChangeSubscriber:
+    """
+    Consumer of change events of remote dictionaries, in a background thread.
+
+    Each event read from the queue is passed to the handler and then removed from the queue.
+    """
+
+    def __init__(self, queue, handler, batch_size=32, poll_interval_seconds=1):
+        """
+        Instances a new subscriber. Use `start()` to begin consuming events.
+
+        :param queue:
+            AzureQueue from which the events are consumed. It must not be shared with other subscribers.
+
+        :param handler:
+            Callable receiving each event, as a dict {"folder", "op", "keys"}.
+
+        :param batch_size:
+            Maximum number of messages retrieved per request.
+
+        :param poll_interval_seconds:
+            Seconds waited for new messages in each poll when the queue is empty.
+        """
+        self._logger = logging.getLogger("cs-notifications")
+        self._queue = queue
+        self._handler = handler
+        self._batch_size = batch_size
+        self._poll_interval_seconds = poll_interval_seconds
+
+        self._stop_event = Event()
+        self._thread = None
+
+    @property
+    def queue(self):
+        return self._queue
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts consuming events in a background thread (if not running yet).
+        """
+        if self.running:
+            return self
+
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self, wait=True):
+        """
+        Stops consuming events.
+
+        :param wait:
+            True to block until the background thread finishes.
+        """
+        self._stop_event.set()
+        thread = self._thread
+
+        if wait and thread is not None:
+            thread.join()
+
+    def poll(self):
+        """
+        Consumes the events available in the queue.
+
+        :return:
+            Number of events consumed.
+        """
+        messages = self._queue.pop(count=self._batch_size, wait_time=self._poll_interval_seconds,
+                                   check_interval=min(0.1, self._poll_interval_seconds))
+
+        if not isinstance(messages, list):
+            messages = [messages]
+
+        for message in messages:
+            try:
+                event = json.loads(message.content)
+
+            except ValueError:
+                self._logger.warning(f"Discarded malformed change event: {message.content[:100]}")
+
+            else:
+                self._handler(event)
+
+            message.delete()
+
+        return len(messages)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+
+            except Exception as e:
+                self._logger.warning(f"Failed to consume change events from {self._queue}: {e}")
+                self._stop_event.wait(self._poll_interval_seconds)
+
+    def __str__(self):
+        return f"[Change subscriber of {self._queue}; {'running' if self.running else 'stopped'}]"
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,6 @@
+from cloudspeak.azure.packed.packed_segment import PackedSegment, PackedSegmentWriter
+
+__all__ = [
+    "PackedSegment",
+    "PackedSegmentWriter",
+]
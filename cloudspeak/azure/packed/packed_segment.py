@@ -0,0 +1,176 @@
+import json
+
+
+class PackedSegment:
+    """
+    Immutable blob holding many key/value records of a packed dictionary.
+
+    The blob is the concatenation of the serialized values followed by an offset table (JSON) with the position and
+    length of the record of each key. Removed keys are kept in the table as tombstones (length -1), so that they hide
+    the records of older segments.
+
+    The location of the table is stored in the manifest of the dictionary, so a reader only needs a ranged read of the
+    table (once, as segments are immutable) and a ranged read per record.
+    """
+
+    def __init__(self, name, table_offset, table_length, count):
+        """
+        Instances a reference to a segment stored in the backend.
+
+        :param name:
+            Name of the blob of the segment.
+
+        :param table_offset:
+            Byte offset of the offset table within the blob.
+
+        :param table_length:
+            Byte length of the offset table.
+
+        :param count:
+            Number of records (including tombstones) in the segment.
+        """
+        self._name = name
+        self._table_offset = table_offset
+        self._table_length = table_length
+        self._count = count
+        self._table = None
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def table_offset(self):
+        return self._table_offset
+
+    @property
+    def table_length(self):
+        return self._table_length
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def table(self):
+        """
+        Retrieves the offset table {key: (offset, length)} if it was loaded. None otherwise.
+        """
+        return self._table
+
+    def load_table(self, data):
+        """
+        Decodes the offset table from its bytes.
+        """
+        table = json.loads(data.decode("utf-8"))
+        self._table = {k: (o, n) for k, o, n in zip(table["keys"], table["offsets"], table["lengths"])}
+        return self._table
+
+    @classmethod
+    def build(cls, name, records):
+        """
+        Encodes the given records as a new segment.
+
+        :param name:
+            Name of the blob of the segment.
+
+        :param records:
+            Iterable of tuples (key, data), where data are the serialized bytes of the value or None for removed keys.
+
+        :return:
+            Tuple (segment, bytes of the blob).
+        """
+        writer = PackedSegmentWriter(name)
+        chunks = [writer.add(k, data) for k, data in records]
+        segment, table = writer.close()
+        chunks.append(table)
+
+        return segment, b"".join(chunks)
+
+    def to_dict(self):
+        return {"name": self._name, "table_offset": self._table_offset, "table_length": self._table_length,
+                "count": self._count}
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(entry["name"], entry["table_offset"], entry["table_length"], entry["count"])
+
+    def __str__(self):
+        return f"[Packed segment {self._name}; {self._count} records]"
+
+    def __repr__(self):
+        return str(self)
+
+
+class PackedSegmentWriter:
+    """
+    Incremental encoder of a segment, for records that are not held in memory all at once.
+
+    Each record added returns the bytes to append to the blob; the offset table, returned on close, goes after them.
+    """
+
+    def __init__(self, name):
+        """
+        Instances a new writer.
+
+        :param name:
+            Name of the blob of the segment.
+        """
+        self._name = name
+        self._keys = []
+        self._offsets = []
+        self._lengths = []
+        self._position = 0
+        self._segment = None
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def segment(self):
+        """
+        Retrieves the segment written, with its table loaded. None until the writer is closed.
+        """
+        return self._segment
+
+    def add(self, key, data):
+        """
+        Adds a record to the segment.
+
+        :param key:
+            Key of the record.
+
+        :param data:
+            Serialized bytes of the value, or None for a removed key.
+
+        :return:
+            The bytes to append to the blob (empty for removed keys).
+        """
+        self._keys.append(key)
+        self._offsets.append(self._position)
+
+        if data is None:
+            self._lengths.append(-1)
+            return b""
+
+        self._lengths.append(len(data))
+        self._position += len(data)
+
+        return data
+
+    def close(self):
+        """
+        Encodes the offset table of the records added.
+
+        :return:
+            Tuple (segment, bytes of the offset table), where the segment has its table already loaded.
+        """
+        keys, offsets, lengths = self._keys, self._offsets, self._lengths
+        table = json.dumps({"keys": keys, "offsets": offsets, "lengths": lengths}).encode("utf-8")
+
+        segment = PackedSegment(self._name, table_offset=self._position, table_length=len(table), count=len(keys))
+        segment._table = {k: (o, n) for k, o, n in zip(keys, offsets, lengths)}
+        self._segment = segment
+
+        return segment, table
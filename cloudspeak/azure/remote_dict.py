@@ -1,24 +1,185 @@
+import math
+import os
 import warnings
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED, ThreadPoolExecutor
 
-from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError, HttpResponseError
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError, \
+    HttpResponseError
 from azure.storage.blob import PartialBatchErrorException
 
+from cloudspeak.azure.arrays import ArrayRemote, decode_chunked_array, encode_chunked_array, is_chunked_array
+from cloudspeak.azure.batch import BatchWriter
+from cloudspeak.azure.bloom import BloomFilter, BloomRemote, BloomSharded
+from cloudspeak.azure.cache import ValueCache
+from cloudspeak.azure.dedup import ObjectStore, POINTER_SIZE, decode_pointer, encode_pointer, is_pointer
+from cloudspeak.azure.frames import FrameRemote, decode_parquet_frame, encode_parquet_frame, is_parquet_frame
+from cloudspeak.azure.frozen import FrozenTableWriter
+from cloudspeak.azure.index import IndexSingle, IndexSharded, IndexJournal
+from cloudspeak.azure.notifications import ChangePublisher, ChangeSubscriber
+from cloudspeak.azure.remote_frozen_dict import AzureFrozenDictionary
+from cloudspeak.azure.stats import StatsRemote
+from cloudspeak.config import get_config
 from cloudspeak.serializers import JoblibSerializer
 from cloudspeak.storage.azure import AzureService
-from cloudspeak.utils.basics import removeprefix
+from cloudspeak.utils.basics import removeprefix, len_nan
+from cloudspeak.utils.time import to_datetime
+
+
+_MISSING = object()
 
 
 class AzureDictionary:
     INDEX_NAME = "__--REMOTE_DICT--INDEX--__"
 
-    def __init__(self, container, folder_name, indexed=True, context=None):
+    def __init__(self, container, folder_name, indexed=True, context=None, index_shards=1, index_journal=False,
+                 cache_bytes=None, cache_staleness_seconds=10, listing_prefixes=None,
+                 bloom_filter=False, notification_queues=None, track_stats=False, dedup=False):
+        """
+        Instances a new remote dictionary.
+
+        :param container:
+            Container where the dictionary is stored.
+
+        :param folder_name:
+            Folder within the container that holds the keys of the dictionary.
+
+        :param indexed:
+            True to maintain an index with the keys of the dictionary. False otherwise.
+
+        :param context:
+            The context level of the locks taken by this dictionary.
+
+        :param index_shards:
+            Number of blobs the index is split into (only if indexed). Keys are hash-partitioned among them, so that
+            writing a key only requires updating the shard that owns it. By default, 1 (a single index blob).
+            All the instances of the same dictionary must use the same number of shards.
+
+        :param index_journal:
+            True to store the index as a checkpoint plus an append-only journal of key additions and removals (only if
+            indexed). Writing a key then costs O(1) bytes instead of rewriting the whole index. The journal is folded
+            into the checkpoint in background once it passes the thresholds 'dictionary.index.journal.*' of the config.
+            Can't be combined with `index_shards`. All the instances of the same dictionary must use the same layout.
+
+        :param cache_bytes:
+            Budget in bytes (of serialized values) of an in-process LRU cache of values. None to disable the cache.
+            Cached values are validated against the ETag of their blobs and returned by reference.
+
+        :param cache_staleness_seconds:
+            Number of seconds a cached value is served without any round trip. Afterwards, it is revalidated with a
+            conditional download (If-None-Match), which transfers the value only if it changed. Use -1 to never check.
+
+        :param listing_prefixes:
+            Iterable of key prefixes used to list a non-indexed dictionary concurrently, one range per prefix, e.g.
+            "0123456789abcdef" for hexadecimal keys. Every key must start with one of them, otherwise it is not listed.
+            None to list the keys sequentially (default).
+
+        :param bloom_filter:
+            True to maintain a Bloom filter of the keys in a blob next to the index, so that lookups of keys that
+            don't exist are answered locally. Its size, refresh and number of shards (blobs, so that a write only
+            uploads the shard of its key) are set by the config parameters 'dictionary.bloom.*'. All the instances
+            writing to the same dictionary must enable it, with the same number of shards.
+
+        :param notification_queues:
+            AzureQueue or list of AzureQueue where change events of the keys written or removed by this instance are
+            published (one queue per subscriber process). Other processes consume them with `subscribe()`.
+            None to not publish changes (default).
+
+        :param track_stats:
+            True to maintain the number of keys and the total bytes of the values in a tiny blob next to the index,
+            so that `len()` and `stats()` don't list the keys. The changes of the writes are accumulated and merged in
+            the blob in a single update every 'dictionary.stats.flush_seconds', and at exit (call `flush_stats()`
+            before to be sure). The blob is created (walking the existing blobs) when first instanced. Removals then
+            read the size of the removed values first. All the instances writing to the same dictionary must enable it.
+
+        :param dedup:
+            True to store the values content-addressed: each distinct value is stored once in an objects area of the
+            dictionary (under the SHA-256 of its serialized bytes), and keys hold small pointers to them. Values whose
+            object already exists are not uploaded again. Reading costs an extra request per value (the pointer).
+            Dictionaries written with dedup can be read by any instance. The bytes of `stats()` count the pointers,
+            not the values.
+        """
         if not folder_name.endswith("/"):
             folder_name += "/"
 
         self._container = container
         self._folder_name = folder_name
         self._context = context
-        self._index_file = container[self.get_url(self.INDEX_NAME)] if indexed else None
+        self._index = self._build_index(index_shards, index_journal) if indexed else None
+        self._cache = ValueCache(cache_bytes, staleness_seconds=cache_staleness_seconds) \
+            if cache_bytes is not None else None
+        self._listing_prefixes = listing_prefixes
+        self._bloom = self._build_bloom() if bloom_filter else None
+        self._publisher = ChangePublisher(notification_queues) if notification_queues is not None else None
+        self._subscribers = []
+        self._stats = self._build_stats() if track_stats else None
+        self._dedup = dedup
+        self._objects = ObjectStore(container, self.get_url(f"{self.INDEX_NAME}.objects/"))
+
+    def _build_index(self, index_shards, index_journal):
+        """
+        Builds the index object for this dictionary.
+        """
+        container = self._container
+
+        if index_shards < 1:
+            raise ValueError("The number of index shards must be at least 1.")
+
+        if index_journal and index_shards > 1:
+            raise ValueError("A journaled index can't be sharded.")
+
+        if index_journal:
+            index = IndexJournal(container,
+                                 checkpoint_name=self.get_url(f"{self.INDEX_NAME}.checkpoint"),
+                                 journal_prefix=self.get_url(f"{self.INDEX_NAME}.journal."),
+                                 context=self.context)
+
+        elif index_shards == 1:
+            index = IndexSingle(container[self.get_url(self.INDEX_NAME)], context=self.context)
+
+        else:
+            files = [container[self.get_url(f"{self.INDEX_NAME}.{i}-{index_shards}")] for i in range(index_shards)]
+            index = IndexSharded(files, context=self.context)
+
+        return index
+
+    def _build_bloom(self):
+        """
+        Builds the Bloom filter object for this dictionary.
+        """
+        config = get_config()
+        container = self._container
+        shards = config.get('dictionary.bloom.shards')
+        seed = (lambda: self.index if self.indexed else self._list_keys())
+
+        if shards < 1:
+            raise ValueError("The number of Bloom filter shards must be at least 1.")
+
+        if shards == 1:
+            return BloomRemote(container[self.get_url(f"{self.INDEX_NAME}.bloom")],
+                               capacity=config.get('dictionary.bloom.capacity'),
+                               error_rate=config.get('dictionary.bloom.error_rate'),
+                               staleness_seconds=config.get('dictionary.bloom.staleness_seconds'),
+                               seed=seed)
+
+        files = [container[self.get_url(f"{self.INDEX_NAME}.bloom.{i}-{shards}")] for i in range(shards)]
+
+        return BloomSharded(files,
+                            capacity=config.get('dictionary.bloom.capacity'),
+                            error_rate=config.get('dictionary.bloom.error_rate'),
+                            staleness_seconds=config.get('dictionary.bloom.staleness_seconds'),
+                            seed=seed)
+
+    def _build_stats(self):
+        """
+        Builds the counters object for this dictionary, creating its blob if it doesn't exist yet.
+        """
+        stats = StatsRemote(self._container[self.get_url(f"{self.INDEX_NAME}.stats")],
+                            seed=lambda: self._measure()[:2],
+                            flush_seconds=get_config().get('dictionary.stats.flush_seconds'))
+        stats.ensure()
+
+        return stats
 
     @classmethod
     def from_connection_string(cls, connection_string, container_name, folder_name, create_container=True, indexed=True, context=None):
@@ -41,96 +202,269 @@ class AzureDictionary:
         return id(self) if self._context is None else self._context
 
     @property
-    def indexed(self):
+    def cache(self):
         """
-        Returns whether this instance is indexed or not.
+        Retrieves the value cache of this dictionary (None if disabled).
+        Its counters `hits`, `misses` and `evictions` can be used to size it.
         """
-        return self._index_file is not None
+        return self._cache
 
     @property
-    def index(self):
+    def bloom_filter(self):
         """
-        Return the index content only if this instance is indexed.
-        A RemoteDict instance is indexed if injected "indexed=True" in the constructor.
-        This property will always retrieve the latest index version.
+        Retrieves the Bloom filter of the keys of this dictionary (None if disabled).
         """
-        if not self.indexed:
-            return None
+        return self._bloom
 
-        index_file = self._index_file
+    def _might_contain(self, key):
+        """
+        Returns False only if the given key is known not to exist (by the Bloom filter).
+        """
+        return self._bloom is None or self._bloom.might_contain(key)
 
-        try:
-            index_file.download().join(tqdm_bar=False)
-            index_content = self._index_file.data
+    def rebuild_bloom_filter(self, capacity=None):
+        """
+        Rebuilds the Bloom filter from the current keys of the dictionary, e.g. once it holds more keys than its
+        capacity. Keys written meanwhile by other processes may be missed, so it should be done while no other process
+        writes to the dictionary.
 
-            if index_content is None:
-                index_content = []
+        :param capacity:
+            Number of keys expected in the new filter. By default, the capacity of the current one.
+        """
+        if self._bloom is None:
+            raise ValueError("No Bloom filter available for this dictionary. Enable it by instancing with "
+                             "bloom_filter=True.")
 
-        except ResourceNotFoundError:
-            index_content = []
+        self._bloom.rebuild(iter(self), capacity=capacity)
 
-        return index_content
+    def _measure(self):
+        """
+        Measures the dictionary by walking its blobs (without downloading the index nor the values).
 
-    @index.setter
-    def index(self, new_content):
+        :return:
+            Tuple (count, bytes, last_modified).
         """
-        Sets the content of the index.
+        folder_name = self._folder_name
+        count = 0
+        size = 0
+        last_modified = None
 
-        If content was updated, before setting, this setter will merge the modifications with the ones in the backend.
+        for blob in self._container.walk(folder_name, delimiter="~", shard_prefixes=self._listing_prefixes,
+                                         ordered=False):
+            if hasattr(blob, 'prefix') or removeprefix(blob['name'], folder_name).startswith(self.INDEX_NAME):
+                continue
+
+            count += 1
+            size += blob['size']
+
+            if last_modified is None or blob['last_modified'] > last_modified:
+                last_modified = blob['last_modified']
+
+        return count, size, to_datetime(last_modified) if last_modified is not None else None
+
+    def stats(self):
         """
-        if not self.indexed:
-            raise KeyError("No index available for this dictionary. Enable indexing by instancing with indexed=True.")
+        Retrieves the number of keys and the total bytes of the values of the dictionary, along with the time of the
+        last write, as a dictionary {"count", "bytes", "last_modified"}.
 
-        index_file = self._index_file
-        idx_old_content = index_file.data
+        The bytes are those stored in the blobs of the keys. For values written in dedup mode, that is the size of their
+        pointers, not of the values: the deduplicated objects are shared between keys and are not accounted.
 
-        if idx_old_content is None:
-            idx_old_content = []
+        With `track_stats=True`, this is a single small download. Otherwise, the blobs of the dictionary are walked
+        (but the index and the values are not downloaded).
+        """
+        stats = self._stats.read() if self._stats is not None else None
 
-        # We try to upload the new index.
-        try:
-            index_file.lock(duration_seconds=60,
-                            context=self.context)
-            index_file.data = new_content
-            index_file.upload(overwrite=True,
-                              allow_changed=False)
+        if stats is None:
+            count, size, last_modified = self._measure()
+            stats = {"count": count, "bytes": size, "last_modified": last_modified}
+
+            if self._stats is not None:
+                self._stats.rebuild(count, size)
+
+        return stats
+
+    def rebuild_stats(self):
+        """
+        Recomputes the counters of `track_stats` from the blobs of the dictionary, e.g. after writes done by instances
+        without `track_stats` or concurrent creations of the same key. Writes of other processes done meanwhile may be
+        missed, so it should be done while no other process writes to the dictionary.
+        """
+        if self._stats is None:
+            raise ValueError("No stats available for this dictionary. Enable them by instancing with track_stats=True.")
+
+        count, size, _ = self._measure()
+        self._stats.rebuild(count, size)
+
+    def _track(self, count_delta, bytes_delta):
+        """
+        Adds the given deltas to the counters, if stats are tracked.
+        """
+        if self._stats is not None:
+            self._stats.add(count_delta, bytes_delta)
+
+    def flush_stats(self):
+        """
+        Merges in the backend the changes of the counters of `track_stats` accumulated by this instance, so other
+        processes see them at once (otherwise, they are merged within 'dictionary.stats.flush_seconds').
+        """
+        if self._stats is not None:
+            self._stats.flush()
+
+    @property
+    def dedup(self):
+        """
+        Retrieves whether the values written by this instance are stored content-addressed.
+        """
+        return self._dedup
+
+    @property
+    def objects(self):
+        """
+        Retrieves the content-addressed store of the values of this dictionary (used in dedup mode).
+        """
+        return self._objects
+
+    def _stored_data(self, datas):
+        """
+        Retrieves the bytes to store in the blobs of the keys for the given serialized values: the values themselves or,
+        in dedup mode, pointers to their objects (uploaded first if they don't exist yet).
+        """
+        if not self._dedup:
+            return datas
+
+        return [encode_pointer(digest) for digest in self._objects.put_many(datas)]
+
+    def _resolve(self, files):
+        """
+        Retrieves the files holding the values of the given (downloaded) files of keys: the same file or, if it holds a
+        pointer, the file of the referenced object. Objects are downloaded in parallel.
+        """
+        result = [self._objects.file_of(decode_pointer(f.data_raw)) if is_pointer(f.data_raw) else f for f in files]
+        progresses = [r.download() for r, f in zip(result, files) if r is not f]
+
+        for progress in progresses:
+            progress.join(tqdm_bar=False)
+
+        return result
 
-        except ResourceModifiedError:
-            # If the content has changed we need to merge changes.
-            index_file.download()
-            idx_latest_content = index_file.data
+    def collect_objects(self, grace_seconds=3600):
+        """
+        Removes the objects of the dedup mode that are no longer referenced by any key (e.g. after keys are removed or
+        overwritten). Only the pointers are read (with ranged reads of their first bytes).
+
+        Objects younger than `grace_seconds` are kept, as they may belong to writes in progress. Still, a write of a
+        value whose object is being removed could be left dangling, so this should be done while no other process
+        writes to the dictionary.
 
-            if idx_latest_content is None:
-                idx_latest_content = []
+        :param grace_seconds:
+            Minimum age of the objects to remove.
+
+        :return:
+            Number of objects removed.
+        """
+        container = self._container
 
-            old_index_set = set(idx_old_content)
-            new_index_set = set(idx_latest_content)
+        def read_pointer(key):
+            try:
+                client = container[self.get_url(key)].file_raw
+                return client.download_blob(offset=0, length=POINTER_SIZE).readall()
 
-            # We take which elements new content added w.r.t. old content:
-            elements_added = [x for x in new_content if x not in old_index_set]
+            except HttpResponseError:
+                # Removed meanwhile, or empty
+                return None
 
-            # We take which elements new content removed w.r.t. old content:
-            elements_removed = set([x for x in idx_old_content if x not in new_content])
+        heads = self.service.pool.map(read_pointer, list(self))
+        referenced = {decode_pointer(h) for h in heads if is_pointer(h)}
 
-            # We take which elements other instances removed w.r.t. old content
-            elements_other_removed = set([x for x in idx_old_content if x not in new_index_set])
+        return self._objects.collect(referenced, grace_seconds=grace_seconds)
 
-            merged_content = [x for x in idx_latest_content if x not in elements_removed]
+    def _publish(self, op, entries):
+        """
+        Publishes a change event in background, if notifications are enabled.
 
-            # We add elements added if they were not removed by others:
-            elements_to_append = [x for x in elements_added if x not in elements_other_removed]
+        :param op:
+            "set" for written keys, "del" for removed keys.
 
-            merged_content.extend(elements_to_append)
+        :param entries:
+            List of tuples (key, etag).
+        """
+        if self._publisher is None or len(entries) == 0:
+            return
 
-            # The index is locked before last download. We are going to have the last version till this line for sure.
+        self.service.pool.submit(self._publisher.publish, self._folder_name, op, entries)
 
-            # Recursive assignment: A new attempt is performed until allowed.
-            # Since the lock is done within the same context, cascading locks is safe (only first is taken into account)
-            index_file.data = merged_content
-            index_file.upload(overwrite=True, allow_changed=True)
+    def subscribe(self, queue, poll_interval_seconds=1):
+        """
+        Starts consuming the change events published by other instances of this dictionary, in a background thread.
 
-        finally:
-            index_file.unlock(context=self.context)
+        Each event invalidates the affected entries of the value cache (unless they already hold the published ETag)
+        and marks the Bloom filter as stale. This allows long staleness windows for the cache without serving stale
+        values for long.
+
+        :param queue:
+            AzureQueue where the events are published for this process. It must not be shared with other subscribers.
+
+        :param poll_interval_seconds:
+            Seconds waited for new events in each poll when the queue is empty.
+
+        :return:
+            The ChangeSubscriber consuming the events. Use `stop()` to stop it.
+        """
+        subscriber = ChangeSubscriber(queue, self._on_change, poll_interval_seconds=poll_interval_seconds)
+        self._subscribers.append(subscriber)
+
+        return subscriber.start()
+
+    def _on_change(self, event):
+        """
+        Applies a change event to the local state of this instance.
+        """
+        if event.get("folder") != self._folder_name:
+            return
+
+        cache = self._cache
+
+        if cache is not None:
+            for key, etag in event["keys"]:
+                entry = cache.get(key)
+
+                if entry is not None and (etag is None or entry['etag'] != etag):
+                    cache.invalidate(key)
+
+        if self._bloom is not None and event["op"] == "set":
+            self._bloom.invalidate()
+
+    @property
+    def indexed(self):
+        """
+        Returns whether this instance is indexed or not.
+        """
+        return self._index is not None
+
+    @property
+    def index(self):
+        """
+        Return the index content only if this instance is indexed.
+        A RemoteDict instance is indexed if injected "indexed=True" in the constructor.
+        This property will always retrieve the latest index version, as a sorted KeySet.
+        """
+        if not self.indexed:
+            return None
+
+        return self._index.read()
+
+    @index.setter
+    def index(self, new_content):
+        """
+        Sets the content of the index.
+
+        If content was updated, before setting, this setter will merge the modifications with the ones in the backend.
+        """
+        if not self.indexed:
+            raise KeyError("No index available for this dictionary. Enable indexing by instancing with indexed=True.")
+
+        self._index.write(new_content)
 
     def lock(self, key, duration_seconds=30, wait_seconds=-1, poll_interval_seconds=0.5, autocreate=False):
         """
@@ -165,6 +499,9 @@ class AzureDictionary:
         item = self.get_url(key)
         container = self.container
 
+        if autocreate and self._bloom is not None:
+            self._bloom.add([key])
+
         try:
             result = container[item].lock(duration_seconds=duration_seconds,
                                           wait_seconds=wait_seconds,
@@ -222,206 +559,1007 @@ class AzureDictionary:
         return self.container.service
 
     def __getitem__(self, key):
-        progresses = self.async_get(key)
-
         is_list = isinstance(key, list)
 
         # Special case: folders as dictionaries
-        if not is_list and type(progresses) is AzureDictionary:
-            return progresses
-
-        if not is_list:
-            progresses = [progresses]
-
-        key_name = None
-        try:
-            for p in progresses:
-                key_name = removeprefix(p.file.name, self._folder_name)
-                p.join(tqdm_bar=False)
+        if not is_list and key.endswith("/") and not self.indexed:
+            return self.async_get(key)
 
-        except ResourceNotFoundError:
-            raise KeyError(f"The key \"{key_name}\" does not exist.") from None
+        keys = key if is_list else [key]
 
-        result = [p.file.data for p in progresses]
-        result = result if is_list else progresses[0].file.data
+        values = self._cache_lookup(keys) if self._cache is not None else {}
+        keys_missing = [k for k in keys if k not in values]
 
-        return result
+        for k in keys_missing:
+            if not self._might_contain(k):
+                raise KeyError(f"The key \"{k}\" does not exist.")
 
-    def async_get(self, key):
-        """
-        Gets a key -> value from the dictionary in an asynchronous operation.
-        It can be retrieved many keys and values at once if lists are specified.
+        if len(keys_missing) > 0:
+            progresses = self.async_get(keys_missing)
 
-        :param key:
-            Key name or list of key names to retrieve values from.
+            key_name = None
+            try:
+                for p in progresses:
+                    key_name = removeprefix(p.file.name, self._folder_name)
+                    p.join(tqdm_bar=False)
 
-        :return:
-            A list of Progress objects or a single Progress if it wasn't a list. The Progress is an object that allows
-            tracking the download operations (speeds, times, sizes, ...).
-        """
-        container = self._container
-        is_list = isinstance(key, list)
+            except ResourceNotFoundError:
+                raise KeyError(f"The key \"{key_name}\" does not exist.") from None
 
-        if not is_list and key.endswith("/") and not self.indexed:
-            # We return a new dictionary instance:
-            return AzureDictionary(container=self._container,
-                                   folder_name=self.get_url(key),
-                                   indexed=False,
-                                   context=self.context)
+            sources = self._resolve([p.file for p in progresses])
 
-        if not is_list:
-            key = [key]
+            for k, p, source in zip(keys_missing, progresses, sources):
+                file = p.file
+                values[k] = self._decode(source)
 
-        # We add the folder prefix to each
-        key = [self.get_url(i) for i in key]
+                if self._cache is not None:
+                    self._cache.put(k, values[k], file.etag, len_nan(source.data_raw, none_len=0))
 
-        if self.indexed:
-            files = [container[f] for f in key]
-        else:
-            files = [container[f] for f in key if not f.endswith("/")]
+        result = [values[k] for k in keys]
+        result = result if is_list else result[0]
 
-        progresses = [f.download() for f in files]
+        return result
 
-        if len(files) < len(key):
-            raise KeyError("Some of the keys are ending in backslash '/'. Accessing folders in bulk are not supported. "
-                           "Please, access one folder at a time since they are converted into an AzureDictionary.")
+    @staticmethod
+    def _decode(file):
+        """
+        Retrieves the value held by the given file, decoding the formats that don't go through the serializer.
+        """
+        if is_chunked_array(file.data_raw):
+            return decode_chunked_array(file.data_raw)
 
-        result = progresses if is_list else progresses[0]
+        if is_parquet_frame(file.data_raw):
+            return decode_parquet_frame(file.data_raw)
 
-        return result
+        return file.data
 
-    def async_set(self, key, value, write_index=False):
+    def array(self, key):
         """
-        Sets a key -> value in the dictionary in an asynchronous operation.
-        It can be set many keys and values at once if lists are specified.
+        Retrieves a sliceable view of an array stored with `set_array()`, without downloading it:
 
-        :param key:
-            Key name or list of key names to set values.
+            ```python
+            rows = d.array("key")[1000:2000, :]
+            ```
 
-        :param value:
-            Value or list of values to asign for each key (if both are lists).
+        Only the chunks holding the requested rows (first axis) are downloaded, in parallel and with ranged reads.
 
-        :param write_index:
-            If True and the instance is indexed, it will be reflected in the index instantly.
-            If False, index won't be altered.
+        :param key:
+            Key of the array.
 
         :return:
-            A list of Progress objects or a single Progress if it wasn't a list. The Progress is an object that allows
-            tracking the upload operations (speeds, times, sizes, ...).
+            An ArrayRemote instance.
         """
-        container = self._container
-        context = self.context
+        return self._open_remote(key, ArrayRemote)
 
-        is_list = isinstance(key, list)
-
-        if not is_list:
-            key = [key]
-            value = [value]
+    def set_array(self, key, array, chunk_rows=None, compression="lz4"):
+        """
+        Stores a numpy array in the chunked format, so that ranges of rows can be read with `array()`.
 
-        progresses = []
+        The array is split along its first axis in chunks (of about 'dictionary.array.chunk_bytes' unless `chunk_rows`
+        is set), each one optionally compressed. Reading the key with `d[key]` retrieves the whole array.
 
-        for k, v in zip(key, value):
-            # We add the folder prefix to each
-            file = container[self.get_url(k)]
-            file.data = v
-            progress = file.upload(overwrite=True,
-                                   allow_changed=True,
-                                   context=context)
-            progresses.append(progress)
+        :param key:
+            Key to set.
 
-        result = progresses if is_list else progresses[0]
+        :param array:
+            numpy ndarray to store (object dtypes are not supported).
 
-        if write_index and self.indexed:
-            idx_content = self.index
-            new_content = [x for x in idx_content if x not in key]
-            new_content.extend(key)
-            self.index = new_content
+        :param chunk_rows:
+            Number of rows per chunk.
 
-        return result
+        :param compression:
+            "lz4" to compress each chunk. None to store the rows raw, so any range of rows is read exactly.
+        """
+        data = encode_chunked_array(array, chunk_rows=chunk_rows, compression=compression,
+                                    chunk_bytes=get_config().get('dictionary.array.chunk_bytes'))
 
-    def __setitem__(self, key, value):
-        is_list = isinstance(key, list)
+        if self._bloom is not None:
+            self._bloom.add([key])
 
-        if not is_list:
-            key = [key]
-            value = [value]
+        if self._cache is not None:
+            self._cache.invalidate(key)
 
-        progresses = self.async_set(key, value, write_index=False)
+        file = self._container[self.get_url(key)]
+        file.data_raw = self._stored_data([data])[0]
+        progress = file.upload(overwrite=True, allow_changed=True, context=self.context)
 
-        write_failed = []
-        write_failed_reasons = []
+        self._join_writes([key], [array], [progress], is_list=False)
 
-        for p, k in zip(progresses, key):
-            try:
-                p.join(tqdm_bar=False)
-            except HttpResponseError as e:
-                write_failed.append(k)
-                write_failed_reasons.append(e.reason)
+    def frame(self, key, columns=None, rows=None):
+        """
+        Retrieves some columns and rows of a DataFrame stored with `set_frame()`:
 
-        if self.indexed:
-            idx_content = self.index
-            exclude_keys = set(key).union(write_failed)
-            new_content = [x for x in idx_content if x not in exclude_keys]
-            new_content.extend(key)
-            self.index = new_content
+            ```python
+            frame = d.frame("key", columns=["price", "volume"], rows=slice(1000, 2000))
+            ```
 
-        if write_failed:
-            if is_list:
-                error = KeyError(f"There were {len(write_failed)} out of {len(key)} keys that couldn't be written."
-                                 f"Access the .keys attribute of this exception to know which keys could not be written "
-                                 f"and the reason.")
+        Only the footer of the frame and the column chunks of the requested columns in the row groups holding the
+        requested rows are downloaded, in parallel and with ranged reads.
 
-                error.keys = list(zip(write_failed, write_failed_reasons))
-            else:
+        :param key:
+            Key of the frame.
 
-                reason = write_failed_reasons[0]
-                error = KeyError(f"The key {write_failed[0]} could not be written. Reason: {reason}.")
-                error.keys = [(write_failed[0], reason)]
+        :param columns:
+            List of column names to read. None to read all the columns. The index is always read.
 
-            raise error
+        :param rows:
+            Slice of the row positions to read. None to read all the rows.
 
-    def __len__(self):
+        :return:
+            pandas DataFrame.
         """
-        Returns the length of the dictionary.
+        return self.frame_remote(key).read(columns=columns, rows=rows)
 
-        Note: len() is an expensive operation in not-indexed dictionaries as it requires walking all the blobs.
+    def frame_remote(self, key):
         """
-        return len(self.keys())
+        Retrieves a queryable view of a DataFrame stored with `set_frame()`, downloading only its footer.
 
-    def __iter__(self):
-        index = self.index
+        :param key:
+            Key of the frame.
 
-        if index is None:
-            folder_name = self._folder_name
+        :return:
+            A FrameRemote instance.
+        """
+        return self._open_remote(key, FrameRemote)
 
-            # We iterate over the blobs
-            for f in self._container.get_files(folder_name, delimiter="~"):
-                name = removeprefix(f.name, folder_name)
+    def _pointed_file(self, file):
+        """
+        Retrieves the file of the object referenced by the given file of a key (with a ranged read of its first bytes),
+        or the same file if it doesn't hold a pointer.
+        """
+        head = file.file_raw.download_blob(offset=0, length=POINTER_SIZE).readall()
 
-                # Index name is excluded
-                if name == self.INDEX_NAME:
-                    continue
+        return self._objects.file_of(decode_pointer(head)) if is_pointer(head) else file
+
+    def _open_remote(self, key, remote_class):
+        """
+        Opens a ranged-read view (ArrayRemote, FrameRemote) over the value of the given key, following its pointer if
+        it was written in dedup mode.
+        """
+        if not self._might_contain(key):
+            raise KeyError(f"The key \"{key}\" does not exist.")
+
+        file = self._container[self.get_url(key)]
+
+        try:
+            if self._dedup:
+                file = self._pointed_file(file)
+
+            try:
+                return remote_class(file)
+
+            except ValueError:
+                # The key may have been written in dedup mode by other instance
+                pointed = self._pointed_file(file)
+
+                if pointed is file:
+                    raise
+
+                return remote_class(pointed)
+
+        except ResourceNotFoundError:
+            raise KeyError(f"The key \"{key}\" does not exist.") from None
+
+    def set_frame(self, key, frame, row_group_rows=None, compression="lz4"):
+        """
+        Stores a pandas DataFrame in the columnar (Parquet) format, so that some columns and rows can be read with
+        `frame()`. Requires pyarrow.
+
+        Within each row group (of 'dictionary.frame.row_group_rows' rows unless `row_group_rows` is set), each column
+        is stored separately, optionally compressed. Reading the key with `d[key]` retrieves the whole frame.
+
+        :param key:
+            Key to set.
+
+        :param frame:
+            pandas DataFrame to store.
+
+        :param row_group_rows:
+            Number of rows per row group.
+
+        :param compression:
+            Compression codec of the columns ("lz4", "snappy", "zstd", ...). None to store them uncompressed.
+        """
+        if row_group_rows is None:
+            row_group_rows = get_config().get('dictionary.frame.row_group_rows')
+
+        data = encode_parquet_frame(frame, row_group_rows=row_group_rows, compression=compression)
+
+        if self._bloom is not None:
+            self._bloom.add([key])
+
+        if self._cache is not None:
+            self._cache.invalidate(key)
+
+        file = self._container[self.get_url(key)]
+        file.data_raw = self._stored_data([data])[0]
+        progress = file.upload(overwrite=True, allow_changed=True, context=self.context)
+
+        self._join_writes([key], [frame], [progress], is_list=False)
+
+    def _get_size(self, key):
+        """
+        Retrieves the size in bytes of the value of the given key in the backend. None if it doesn't exist.
+        """
+        try:
+            size = self._container[self.get_url(key)].metadata.get('size')
+
+        except ResourceNotFoundError:
+            size = None
+
+        return size
+
+    def _get_etag(self, key):
+        """
+        Retrieves the ETag of the given key in the backend. None if it doesn't exist.
+        """
+        try:
+            etag = self._container[self.get_url(key)].metadata.get('etag')
+
+        except ResourceNotFoundError:
+            etag = None
+
+        return etag
+
+    def _cache_lookup(self, keys):
+        """
+        Retrieves the values of the given keys that are available in the cache.
+
+        Entries older than the staleness window are revalidated (in parallel) with a conditional download each, which
+        also retrieves the new value of the keys that changed.
+
+        :return:
+            Dictionary {key: value} with the keys found in the cache (or refreshed).
+        """
+        cache = self._cache
+        values = {}
+        stale = {}
+
+        for k in keys:
+            entry = cache.get(k)
+
+            if entry is None:
+                cache.miss()
+
+            elif cache.needs_revalidation(entry):
+                stale[k] = entry
+
+            else:
+                cache.hit()
+                values[k] = entry['value']
+
+        if len(stale) > 0:
+            values.update(self._revalidate(list(stale.items())))
+
+        return values
+
+    def _revalidate(self, stale):
+        """
+        Revalidates the given stale cache entries. Each one costs a single conditional download (If-None-Match with the
+        cached ETag), which transfers the value only if it changed. Blocks until completed, so it must not run in the
+        service pool.
+
+        :param stale:
+            List of tuples (key, cache entry).
+
+        :return:
+            Dictionary {key: value} with the latest value of each key that still exists.
+        """
+        cache = self._cache
+        container = self._container
+
+        files = [container[self.get_url(k)] for k, _ in stale]
+        progresses = [f.download(etag=entry['etag']) for f, (_, entry) in zip(files, stale)]
+
+        values = {}
+        changed = []
+
+        for (k, entry), file, progress in zip(stale, files, progresses):
+            try:
+                modified = progress.join(tqdm_bar=False)
+
+            except ResourceNotFoundError:
+                cache.invalidate(k)
+                cache.miss()
+                continue
+
+            if modified:
+                cache.invalidate(k)
+                cache.miss()
+                changed.append((k, file))
+
+            else:
+                cache.touch(k)
+                cache.hit()
+                values[k] = entry['value']
+
+        sources = self._resolve([file for _, file in changed])
+
+        for (k, file), source in zip(changed, sources):
+            values[k] = self._decode(source)
+            cache.put(k, values[k], file.etag, len_nan(source.data_raw, none_len=0))
+
+        return values
+
+    def async_get(self, key):
+        """
+        Gets a key -> value from the dictionary in an asynchronous operation.
+        It can be retrieved many keys and values at once if lists are specified.
+
+        :param key:
+            Key name or list of key names to retrieve values from.
+
+        :return:
+            A list of Progress objects or a single Progress if it wasn't a list. The Progress is an object that allows
+            tracking the download operations (speeds, times, sizes, ...).
+        """
+        container = self._container
+        is_list = isinstance(key, list)
+
+        if not is_list and key.endswith("/") and not self.indexed:
+            # We return a new dictionary instance:
+            return AzureDictionary(container=self._container,
+                                   folder_name=self.get_url(key),
+                                   indexed=False,
+                                   context=self.context)
+
+        if not is_list:
+            key = [key]
+
+        # We add the folder prefix to each
+        key = [self.get_url(i) for i in key]
+
+        if self.indexed:
+            files = [container[f] for f in key]
+        else:
+            files = [container[f] for f in key if not f.endswith("/")]
+
+        progresses = [f.download() for f in files]
+
+        if len(files) < len(key):
+            raise KeyError("Some of the keys are ending in backslash '/'. Accessing folders in bulk are not supported. "
+                           "Please, access one folder at a time since they are converted into an AzureDictionary.")
+
+        result = progresses if is_list else progresses[0]
+
+        return result
+
+    def async_set(self, key, value, write_index=False, tags=None):
+        """
+        Sets a key -> value in the dictionary in an asynchronous operation.
+        It can be set many keys and values at once if lists are specified.
+
+        :param key:
+            Key name or list of key names to set values.
+
+        :param value:
+            Value or list of values to asign for each key (if both are lists).
 
-                yield name
+        :param write_index:
+            If True and the instance is indexed, it will be reflected in the index instantly.
+            If False, index won't be altered.
+
+        :param tags:
+            Dictionary of tags {name: value} to attach to the key, replacing the previous ones. If keys are a list, it
+            can also be a list of dictionaries, one per key. Tagged keys can be found with `find()`.
+
+        :return:
+            A list of Progress objects or a single Progress if it wasn't a list. The Progress is an object that allows
+            tracking the upload operations (speeds, times, sizes, ...).
+        """
+        container = self._container
+        context = self.context
+
+        is_list = isinstance(key, list)
+
+        if not is_list:
+            key = [key]
+            value = [value]
+
+        progresses = []
+
+        if self._bloom is not None:
+            # Keys are added before they exist, so the filter never misses them
+            self._bloom.add(key)
+
+        tags_list = tags if isinstance(tags, list) else [tags] * len(key)
+
+        if self._dedup:
+            serializer = self.service.serializer
+            stored = self._stored_data([serializer.serialize(v) if serializer is not None else v for v in value])
+        else:
+            stored = None
+
+        for i, (k, v, t) in enumerate(zip(key, value, tags_list)):
+            # We add the folder prefix to each
+            file = container[self.get_url(k)]
+
+            if stored is None:
+                file.data = v
+            else:
+                file.data_raw = stored[i]
+
+            progress = file.upload(overwrite=True,
+                                   allow_changed=True,
+                                   tags=t,
+                                   context=context)
+            progresses.append(progress)
+
+        result = progresses if is_list else progresses[0]
+
+        if self._cache is not None:
+            # The new values are not known to be stored until the progresses are joined.
+            self._cache.invalidate(key)
+
+        if write_index and self.indexed:
+            self._index.update(added=key)
+
+        return result
+
+    def __setitem__(self, key, value):
+        is_list = isinstance(key, list)
+
+        if not is_list:
+            key = [key]
+            value = [value]
+
+        progresses = self.async_set(key, value, write_index=False)
+
+        self._join_writes(key, value, progresses, is_list=is_list)
+
+    def set(self, key, value, tags=None):
+        """
+        Sets a key -> value in the dictionary, attaching tags to it. Tags are indexed by the backend, so keys can be
+        found by their tags with `find()` without scanning the dictionary:
+
+            ```python
+            d.set("model-1", model, tags={"status": "ready", "owner": "team-a"})
+            ```
+
+        Tags belong to each write: writing the key again without tags removes them. Up to 9 tags can be set per key
+        (one more is used to store the serializer).
+
+        :param key:
+            Key name or list of key names to set values.
+
+        :param value:
+            Value or list of values to asign for each key (if both are lists).
+
+        :param tags:
+            Dictionary of tags {name: value}, or a list of dictionaries (one per key) if keys are a list.
+        """
+        is_list = isinstance(key, list)
+
+        if not is_list:
+            key = [key]
+            value = [value]
+
+        progresses = self.async_set(key, value, write_index=False, tags=tags)
+
+        self._join_writes(key, value, progresses, is_list=is_list)
+
+    def get_tags(self, key):
+        """
+        Retrieves the tags attached to the given key, as a dictionary {name: value}.
+        """
+        try:
+            tags = self._container[self.get_url(key)].tags
+
+        except ResourceNotFoundError:
+            raise KeyError(f"The key \"{key}\" does not exist.") from None
+
+        return {k: v for k, v in tags.items() if k != "serializer"}
+
+    def find(self, tags_filter):
+        """
+        Retrieves the keys whose tags match the given filter, using the tag index of the backend.
+
+        Note that the backend evaluates the filter over the whole container; keys of other folders are discarded here.
+
+        :param tags_filter:
+            Dictionary {name: value} of tags that must match, or a tag query string such as
+            `"\"status\"='ready' and \"version\" >= '3'"`.
+
+        :return:
+            Sorted list of keys.
+        """
+        if isinstance(tags_filter, dict):
+            tags_filter = " and ".join(f"\"{k}\"='{v}'" for k, v in tags_filter.items())
+
+        folder_name = self._folder_name
+        result = []
+
+        for file in self._container.query(tags_filter):
+            if not file.name.startswith(folder_name):
+                continue
+
+            name = removeprefix(file.name, folder_name)
+
+            if not name.startswith(self.INDEX_NAME):
+                result.append(name)
+
+        return sorted(result)
+
+    def find_items(self, tags_filter, window=16):
+        """
+        Iterates over the (key, value) pairs whose tags match the given filter (see `find()`), downloading up to
+        `window` values in parallel. Pairs are yielded as their downloads complete.
+        """
+        for k, v in self.get_many(self.find(tags_filter), window=window):
+            if isinstance(v, KeyError):
+                continue
+
+            yield k, v
+
+    def _join_writes(self, key, value, progresses, is_list=True):
+        """
+        Waits for the uploads of the given keys and reflects them in the index and the cache.
+
+        :param key:
+            List of keys written.
+
+        :param value:
+            List of values written, one per key.
+
+        :param progresses:
+            List of upload Progress objects, one per key.
+
+        :param is_list:
+            Whether the write was requested for a list of keys (affects the error raised).
+
+        :raises KeyError:
+            If any of the keys could not be written. The attribute `.keys` of the exception contains a list of tuples
+            (key, reason) for each key not written.
+        """
+        write_failed = []
+        write_failed_reasons = []
+        written = []
+        count_delta = 0
+        bytes_delta = 0
+
+        for p, k, v in zip(progresses, key, value):
+            try:
+                p.join(tqdm_bar=False)
+            except HttpResponseError as e:
+                write_failed.append(k)
+                write_failed_reasons.append(e.reason)
+                continue
+
+            written.append((k, p.file.etag))
+
+            # Stored bytes of the blob of the key: the pointer in dedup mode, as measured by `_measure()`
+            replaced_size = p.file.replaced_size
+            count_delta += 1 if replaced_size is None else 0
+            bytes_delta += len_nan(p.file.data_raw, none_len=0) - (replaced_size or 0)
+
+            # Pointers of the dedup mode don't tell the size of the values, so they are cached when read
+            if self._cache is not None and not is_pointer(p.file.data_raw):
+                file = p.file
+                self._cache.put(k, v, file.etag, len_nan(file.data_raw, none_len=0))
+
+        if self.indexed:
+            write_failed_set = set(write_failed)
+            self._index.update(added=[k for k in key if k not in write_failed_set])
+
+        self._publish("set", written)
+        self._track(count_delta, bytes_delta)
+
+        if write_failed:
+            if is_list:
+                error = KeyError(f"There were {len(write_failed)} out of {len(key)} keys that couldn't be written."
+                                 f"Access the .keys attribute of this exception to know which keys could not be written "
+                                 f"and the reason.")
+
+                error.keys = list(zip(write_failed, write_failed_reasons))
+            else:
+
+                reason = write_failed_reasons[0]
+                error = KeyError(f"The key {write_failed[0]} could not be written. Reason: {reason}.")
+                error.keys = [(write_failed[0], reason)]
+
+            raise error
+
+    def batch(self, max_items=None, max_bytes=None, max_delay=None):
+        """
+        Retrieves a write-back buffer for this dictionary, to be used in a `with` block:
+
+            ```python
+            with d.batch(max_items=1000) as b:
+                for k, v in records:
+                    b[k] = v
+            ```
+
+        Writes are collected locally (repeated writes of the same key are collapsed) and flushed as parallel uploads
+        followed by a single index update. A flush happens when any of the thresholds is met, on exiting the `with`
+        block and on explicit calls to `flush()`.
+
+        :param max_items:
+            Number of buffered keys that triggers a flush. None for no limit.
+
+        :param max_bytes:
+            Number of buffered bytes (serialized) that triggers a flush. None for no limit.
+
+        :param max_delay:
+            Maximum number of seconds a write is kept buffered before being flushed. None for no limit.
+
+        :return:
+            A BatchWriter instance.
+        """
+        return BatchWriter(self, max_items=max_items, max_bytes=max_bytes, max_delay=max_delay)
+
+    def __len__(self):
+        """
+        Returns the length of the dictionary.
+
+        With `track_stats=True`, it is read from the counters in O(1). Otherwise, note that len() requires downloading
+        the index, and it is an expensive operation in not-indexed dictionaries as it requires walking all the blobs.
+        """
+        if self._stats is not None:
+            return self.stats()["count"]
+
+        index = self.index
+
+        return len(index) if index is not None else sum(1 for _ in self._list_keys())
+
+    def __iter__(self):
+        index = self.index
+
+        if index is None:
+            yield from self._list_keys()
 
         else:
             # We have an index to retrieve in one shot
             yield from index
 
-    def keys(self):
-        return [x for x in self]
+    def _list_keys(self, prefix="", ordered=False):
+        """
+        Lists the keys of the dictionary that start with the given prefix by walking the blobs.
+        If ordered, keys are listed sorted; otherwise, listing prefixes are walked concurrently in any order.
+        """
+        folder_name = self._folder_name
+
+        # Listing prefixes only partition the whole key space
+        shard_prefixes = self._listing_prefixes if prefix == "" else None
+
+        # We iterate over the blobs, concurrently by prefix ranges if configured
+        for f in self._container.get_files(f"{folder_name}{prefix}", delimiter="~", shard_prefixes=shard_prefixes,
+                                           ordered=ordered):
+            name = removeprefix(f.name, folder_name)
+
+            # Index files are excluded
+            if name.startswith(self.INDEX_NAME):
+                continue
+
+            yield name
+
+    def keys(self, prefix=None, start=None, stop=None, limit=None):
+        """
+        Retrieves the keys of the dictionary. If any filter is given, keys are retrieved sorted.
+
+        Indexed dictionaries find the range of keys by binary search on the (sorted) index, in O(log n + k).
+        Non-indexed dictionaries list only the blobs starting with the prefix (or the common prefix of start and stop),
+        and stop listing once `stop` or `limit` is reached.
+
+        :param prefix:
+            Prefix the keys must start with. None for any.
+
+        :param start:
+            First key of the range (inclusive). None for no lower bound.
+
+        :param stop:
+            Last key of the range (exclusive). None for no upper bound.
+
+        :param limit:
+            Maximum number of keys to retrieve. None for no limit.
+
+        :return:
+            List of keys.
+        """
+        if prefix is None and start is None and stop is None and limit is None:
+            return [x for x in self]
+
+        return list(self._iter_range(prefix=prefix, start=start, stop=stop, limit=limit))
+
+    def _iter_range(self, prefix=None, start=None, stop=None, limit=None):
+        """
+        Iterates over the keys that start with the given prefix and are within [start, stop), sorted.
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        index = self.index
+
+        if index is not None:
+            lo, hi = index.key_range(prefix=prefix, start=start, stop=stop)
+
+            if limit is not None:
+                hi = min(hi, lo + limit)
+
+            yield from index[lo:hi]
+            return
+
+        # All the keys within [start, stop) share the common prefix of both bounds
+        listing_prefix = prefix or ""
+
+        if start is not None and stop is not None:
+            bounds_prefix = os.path.commonprefix([start, stop])
+
+            if bounds_prefix.startswith(listing_prefix):
+                listing_prefix = bounds_prefix
 
-    def values(self):
-        for x in self:
-            yield self[x]
+            elif not listing_prefix.startswith(bounds_prefix):
+                return
+
+        count = 0
+
+        for k in self._list_keys(listing_prefix, ordered=True):
+            if stop is not None and k >= stop:
+                break
+
+            if start is not None and k < start:
+                continue
+
+            yield k
+            count += 1
+
+            if limit is not None and count >= limit:
+                break
+
+    def values(self, window=16, prefix=None, start=None, stop=None, limit=None):
+        """
+        Iterates over the values of the dictionary, downloading up to `window` values in parallel.
+        Values are yielded as their downloads complete (not in the order of the keys).
+
+        The keys can be filtered as in `keys()`.
+        """
+        for _, v in self.items(window=window, prefix=prefix, start=start, stop=stop, limit=limit):
+            yield v
+
+    def items(self, window=16, prefix=None, start=None, stop=None, limit=None):
+        """
+        Iterates over the (key, value) pairs of the dictionary, downloading up to `window` values in parallel.
+        Pairs are yielded as their downloads complete (not in the order of the keys).
+
+        The keys can be filtered as in `keys()`, so a range of keys is read without listing the whole dictionary:
+
+            ```python
+            for k, v in d.items(start="2023-01", stop="2023-02"):
+                ...
+            ```
+
+        Keys removed between listing and downloading them are skipped.
+        """
+        if prefix is None and start is None and stop is None and limit is None:
+            keys = iter(self)
+        else:
+            keys = self._iter_range(prefix=prefix, start=start, stop=stop, limit=limit)
+
+        for k, v in self.get_many(keys, window=window):
+            if isinstance(v, KeyError):
+                continue
 
-    def items(self):
-        for k, v in zip(self.keys(), self.values()):
             yield k, v
 
+    def _fetch_source(self, key):
+        """
+        Downloads the given key and, if it holds a pointer, the object it points to right after. Blocks until
+        completed, so it must not run in the service pool.
+
+        :return:
+            Tuple (file of the key, file holding the value).
+
+        :raises ResourceNotFoundError:
+            If the key does not exist.
+        """
+        progress = self.async_get(key)
+        progress.join(tqdm_bar=False)
+
+        file = progress.file
+        source, = self._resolve([file])
+
+        return file, source
+
+    def _get_fresh(self, key, entry=None):
+        """
+        Retrieves the value of the given key, unless its (stale) cache entry is still valid. Blocks until completed, so
+        it must not run in the service pool.
+
+        :param entry:
+            Cache entry of the key pending of revalidation, if any.
+
+        :raises ResourceNotFoundError:
+            If the key does not exist.
+        """
+        cache = self._cache
+
+        if entry is not None:
+            values = self._revalidate([(key, entry)])
+
+            if key not in values:
+                raise ResourceNotFoundError(f"The key \"{key}\" does not exist.")
+
+            return values[key]
+
+        if cache is not None:
+            cache.miss()
+
+        file, source = self._fetch_source(key)
+        value = self._decode(source)
+
+        if cache is not None:
+            cache.put(key, value, file.etag, len_nan(source.data_raw, none_len=0))
+
+        return value
+
+    def get_many(self, keys, window=16, default=_MISSING):
+        """
+        Retrieves the values of many keys, keeping a bounded number of downloads in flight.
+
+        Pairs (key, value) are yielded as the downloads complete, so the order is not guaranteed to be the order of
+        the keys. A pair is yielded for each key given, even if repeated. Keys are consumed lazily, so `keys` can be
+        a generator.
+
+        :param keys:
+            Iterable of keys to retrieve.
+
+        :param window:
+            Maximum number of downloads (or revalidations of cached values) in flight at the same time.
+
+        :param default:
+            Value to yield for keys that don't exist. If not set, a KeyError instance is yielded as value instead,
+            so missing keys are reported without aborting the iteration.
+
+        :return:
+            Generator of tuples (key, value).
+        """
+        cache = self._cache
+        in_flight = {}
+        keys = iter(keys)
+        keys_exhausted = False
+
+        def missing(key):
+            return KeyError(f"The key \"{key}\" does not exist.") if default is _MISSING else default
+
+        # A pool of its own: each task joins downloads of the service pool (of the key and, chained, of its object)
+        executor = ThreadPoolExecutor(max_workers=max(1, window))
+
+        try:
+            while not keys_exhausted or len(in_flight) > 0:
+
+                # We fill the window
+                while not keys_exhausted and len(in_flight) < window:
+                    key = next(keys, _MISSING)
+
+                    if key is _MISSING:
+                        keys_exhausted = True
+                        break
+
+                    # Special case: folders as dictionaries
+                    if key.endswith("/") and not self.indexed:
+                        yield key, self.async_get(key)
+                        continue
+
+                    entry = cache.get(key) if cache is not None else None
+
+                    if entry is not None and not cache.needs_revalidation(entry):
+                        cache.hit()
+                        yield key, entry['value']
+                        continue
+
+                    if entry is None and not self._might_contain(key):
+                        if cache is not None:
+                            cache.miss()
+
+                        yield key, missing(key)
+                        continue
+
+                    in_flight[executor.submit(self._get_fresh, key, entry)] = key
+
+                if len(in_flight) == 0:
+                    continue
+
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+
+                for promise in done:
+                    key = in_flight.pop(promise)
+
+                    try:
+                        value = promise.result()
+
+                    except ResourceNotFoundError:
+                        value = missing(key)
+
+                    yield key, value
+
+        finally:
+            # Downloads not started yet are discarded if the consumer stops early
+            for promise in in_flight:
+                promise.cancel()
+
+            executor.shutdown(wait=False)
+
     def __contains__(self, item):
+        cache = self._cache
+
+        if cache is not None:
+            entry = cache.get(item)
+
+            if entry is not None and not cache.needs_revalidation(entry):
+                return True
+
+        if not self._might_contain(item):
+            return False
+
         return self._container[self.get_url(item)].exists
 
+    def contains_many(self, keys):
+        """
+        Checks the existence of many keys at once.
+
+        Indexed dictionaries answer from a single read of the index. Non-indexed dictionaries check small batches with
+        parallel HEAD requests in the service pool, and larger batches by listing the blobs under the common prefix of
+        the keys. The threshold is set by the config parameter 'dictionary.contains_many.max_heads'. Large batches are
+        checked with HEAD requests too if the keys share no prefix, or if the dictionary tracks its stats and listing
+        it takes more requests (pages) than the keys to check.
+
+        :param keys:
+            Iterable of keys to check.
+
+        :return:
+            List of booleans, True for each key that exists in the dictionary (in the same order as the keys).
+        """
+        keys = list(keys)
+        result = {}
+        cache = self._cache
+
+        if cache is not None:
+            for k in keys:
+                entry = cache.get(k)
+
+                if entry is not None and not cache.needs_revalidation(entry):
+                    result[k] = True
+
+        pending = [k for k in dict.fromkeys(keys) if k not in result]
+
+        if self._bloom is not None and not self.indexed:
+            result.update({k: False for k in pending if not self._might_contain(k)})
+            pending = [k for k in pending if k not in result]
+
+        if len(pending) == 0:
+            return [result[k] for k in keys]
+
+        if self.indexed:
+            index = self.index
+            result.update({k: k in index for k in pending})
+
+        elif len(pending) > get_config().get('dictionary.contains_many.max_heads') and \
+                self._listing_is_cheaper(pending):
+            found = set(self._list_keys(os.path.commonprefix(pending)))
+            result.update({k: k in found for k in pending})
+
+        else:
+            etags = self.service.pool.map(self._get_etag, pending)
+            result.update({k: etag is not None for k, etag in zip(pending, etags)})
+
+        return [result[k] for k in keys]
+
+    def _listing_is_cheaper(self, keys):
+        """
+        Checks whether listing the blobs under the common prefix of the given keys takes fewer requests than checking
+        them one by one. The size of the listing is bounded by the count of the stats, if tracked.
+        """
+        if os.path.commonprefix(keys) == "":
+            return False
+
+        stats = self._stats.read() if self._stats is not None else None
+
+        if stats is None:
+            return True
+
+        pages = math.ceil(stats["count"] / get_config().get('blob.query.results_per_page'))
+
+        return pages < len(keys)
+
     def setdefault(self, key, default=None):
         """
         Sets a default value for a given key in case it doesn't exist, and returns the existing value for the key.
@@ -453,6 +1591,140 @@ class AzureDictionary:
 
         return result
 
+    def get_with_etag(self, key):
+        """
+        Retrieves the value of the given key along with the ETag of its blob, to be used in `compare_and_set()`.
+
+        The value is always read from the backend (with a conditional download if it was read before), never from the
+        cache, so it can be modified freely.
+
+        :param key:
+            Key to retrieve.
+
+        :return:
+            Tuple (value, etag).
+        """
+        if not self._might_contain(key):
+            raise KeyError(f"The key \"{key}\" does not exist.")
+
+        try:
+            file, source = self._fetch_source(key)
+
+        except ResourceNotFoundError:
+            raise KeyError(f"The key \"{key}\" does not exist.") from None
+
+        return self._decode(source), file.etag
+
+    def compare_and_set(self, key, value, expected_etag):
+        """
+        Sets the value of the given key only if its blob was not modified since it was read, without locking it.
+
+        The condition is evaluated by the backend (If-Match, or If-None-Match when creating the key), so the write costs
+        a single request.
+
+        :param key:
+            Key to set.
+
+        :param value:
+            Value to set.
+
+        :param expected_etag:
+            ETag the blob of the key must have (as retrieved by `get_with_etag()`).
+            None to set the value only if the key does not exist.
+
+        :return:
+            The new ETag of the key if the value was set. None if the key was modified (or created, or removed) by
+            other process meanwhile.
+        """
+        file = self._container[self.get_url(key)]
+        created = expected_etag is None
+
+        if created and self._bloom is not None:
+            self._bloom.add([key])
+
+        replaced_size = 0
+
+        if not created and self._stats is not None:
+            # Size of the version being replaced, for the counters. Checked in the backend unless known locally.
+            replaced_size = len_nan(file.data_raw, none_len=0) if file.etag == expected_etag else \
+                self._get_size(key) or 0
+
+        if self._dedup:
+            serializer = self.service.serializer
+            file.data_raw = self._stored_data([serializer.serialize(value) if serializer is not None else value])[0]
+        else:
+            file.data = value
+
+        try:
+            if created:
+                file.upload(overwrite=False, context=self.context).join(tqdm_bar=False)
+            else:
+                file.upload(overwrite=True, context=self.context, etag=expected_etag).join(tqdm_bar=False)
+
+        except (ResourceModifiedError, ResourceExistsError, ResourceNotFoundError):
+            # The local data was not stored, so it must not be served as the backend version
+            file.reset_status()
+
+            if self._cache is not None:
+                self._cache.invalidate(key)
+
+            return None
+
+        etag = file.etag
+
+        if self._cache is not None:
+            if self._dedup:
+                self._cache.invalidate(key)
+            else:
+                self._cache.put(key, value, etag, len_nan(file.data_raw, none_len=0))
+
+        if created and self.indexed:
+            self._index.update(added=[key])
+
+        self._publish("set", [(key, etag)])
+        self._track(1 if created else 0, len_nan(file.data_raw, none_len=0) - replaced_size)
+
+        return etag
+
+    def update_with(self, key, fn, retries=10, default=_MISSING):
+        """
+        Updates the value of the given key with a read-modify-write loop based on `compare_and_set()`.
+
+        The function is applied to the latest value and the result is written only if nobody modified the key
+        meanwhile; otherwise, it is retried with the new value. Useful for contended counters and small records.
+
+        :param key:
+            Key to update.
+
+        :param fn:
+            Function receiving the current value and returning the new one. It can be called several times.
+
+        :param retries:
+            Maximum number of attempts.
+
+        :param default:
+            Value passed to `fn` if the key does not exist (then it is created). If not set, a KeyError is raised.
+
+        :return:
+            The new value stored.
+        """
+        for _ in range(retries):
+            try:
+                value, etag = self.get_with_etag(key)
+
+            except KeyError:
+                if default is _MISSING:
+                    raise
+
+                value, etag = default, None
+
+            new_value = fn(value)
+
+            if self.compare_and_set(key, new_value, etag) is not None:
+                return new_value
+
+        raise ResourceModifiedError(f"The key \"{key}\" was modified by other process in all the {retries} attempts.")
+
     def __delitem__(self, key):
         """
         Deletes one or many items from the dictionary.
@@ -475,6 +1747,12 @@ class AzureDictionary:
 
         files = [container[self.get_url(k)] for k in key]
 
+        if self._cache is not None:
+            self._cache.invalidate(key)
+
+        # The sizes of the values are needed to update the counters (None for keys that don't exist)
+        sizes = dict(zip(key, self.service.pool.map(self._get_size, key))) if self._stats is not None else {}
+
         keys_not_removed = []
         keys_not_removed_reasons = []
 
@@ -499,9 +1777,12 @@ class AzureDictionary:
             exception = e
 
         if self.indexed:
-            index_content = self.index
-            index_content = [k for k in index_content if k not in keys_removed]
-            self.index = index_content
+            self._index.update(removed=keys_removed)
+
+        self._publish("del", [(k, None) for k in keys_removed])
+
+        existing_removed = [sizes[k] for k in keys_removed if sizes.get(k) is not None]
+        self._track(-len(existing_removed), -sum(existing_removed))
 
         if len(keys_not_removed) > 0 and exception is not None:
             if is_list:
@@ -517,6 +1798,76 @@ class AzureDictionary:
 
             raise error
 
+    def freeze(self, target, container=None, bloom_filter=True, window=64):
+        """
+        Exports all the entries of the dictionary into an immutable sorted table, to be read with a
+        `AzureFrozenDictionary` (returned).
+
+        Records are written sorted by key in blocks (of 'dictionary.frozen.block_bytes') packed in a few large blobs
+        (of 'dictionary.frozen.part_bytes'), plus a small index with the first key of each block. Values are copied as
+        stored, without deserializing them. Writes done to this dictionary while freezing may be missed.
+
+        :param target:
+            Folder where the table is written. A previous table in the same folder is replaced.
+
+        :param container:
+            Container where the table is written. By default, the container of this dictionary.
+
+        :param bloom_filter:
+            True to store a Bloom filter of the keys in the index, so that lookups of missing keys don't read any block.
+
+        :param window:
+            Number of values downloaded in parallel.
+
+        :return:
+            AzureFrozenDictionary opened on the table.
+        """
+        config = get_config()
+        container = container if container is not None else self._container
+
+        keys = list(self.index) if self.indexed else sorted(self._list_keys())
+
+        bloom = BloomFilter(max(1, len(keys)), config.get('dictionary.bloom.error_rate')) if bloom_filter else None
+
+        writer = FrozenTableWriter(container, target,
+                                   block_bytes=config.get('dictionary.frozen.block_bytes'),
+                                   part_bytes=config.get('dictionary.frozen.part_bytes'),
+                                   bloom_filter=bloom)
+
+        def fetch(key):
+            try:
+                _, source = self._fetch_source(key)
+
+            except ResourceNotFoundError:
+                # Removed after being listed
+                return None
+
+            return source.data_raw
+
+        def write(key, promise):
+            data = promise.result()
+
+            if data is not None:
+                writer.add(key, data)
+
+        # A pool of its own, as each task joins downloads of the service pool. Values are written in order as they
+        # complete, keeping `window` downloads in flight.
+        with ThreadPoolExecutor(max_workers=max(1, window)) as executor:
+            pending = deque()
+
+            for k in keys:
+                pending.append((k, executor.submit(fetch, k)))
+
+                if len(pending) >= window:
+                    write(*pending.popleft())
+
+            while len(pending) > 0:
+                write(*pending.popleft())
+
+        writer.close()
+
+        return AzureFrozenDictionary(container, target)
+
     def clear(self):
         """
         Clears the current dictionary. All the elements are marked to remove.
@@ -527,16 +1878,15 @@ class AzureDictionary:
 
         else:
             index_content = self.index
-            del self[index_content]
+            del self[list(index_content)]
             self.index = []
 
     def __str__(self):
         indexed = self.indexed
 
-        if indexed:
-            indexed_string = f"(Indexed: True; Num elements: {len(self)})"
-        else:
-            indexed_string = f"(Indexed: False)"
+        # The number of elements is only shown when it is cheap to retrieve (from the index or the stats)
+        num_elements = f"; Num elements: {len(self)}" if indexed or self._stats is not None else ""
+        indexed_string = f"(Indexed: {indexed}{num_elements})"
 
         string_repr = f"[Azure dictionary {indexed_string}]"
 
@@ -0,0 +1,225 @@
+from bisect import bisect_right
+from threading import Lock
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from cloudspeak.azure.arrays import decode_chunked_array, is_chunked_array
+from cloudspeak.azure.frames import decode_parquet_frame, is_parquet_frame
+from cloudspeak.azure.frozen import FrozenTableWriter, parse_block
+
+
+class AzureFrozenDictionary:
+    """
+    Read-only remote dictionary stored as an immutable sorted table (see `AzureDictionary.freeze()`).
+
+    Opening it downloads only the index of the table: the first key of each block and, optionally, a Bloom filter of
+    the keys. A lookup is then a single ranged read of the block that may hold the key (none if the Bloom filter rules
+    the key out), and a full scan is a sequential download of each part of the table.
+    """
+
+    def __init__(self, container, folder_name):
+        """
+        Instances a read-only dictionary over a frozen table.
+
+        :param container:
+            Container where the table is stored.
+
+        :param folder_name:
+            Folder within the container that holds the table.
+        """
+        if not folder_name.endswith("/"):
+            folder_name += "/"
+
+        self._container = container
+        self._folder_name = folder_name
+        self._index_file = container[f"{folder_name}{FrozenTableWriter.INDEX_NAME}"]
+
+        self._lock = Lock()
+        self._index = None
+
+    @property
+    def container(self):
+        return self._container
+
+    @property
+    def service(self):
+        return self._container.service
+
+    @property
+    def folder_name(self):
+        return self._folder_name
+
+    @property
+    def index(self):
+        """
+        Retrieves the index of the table, downloading it the first time.
+        """
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+
+            return self._index
+
+    def _load_index(self):
+        file = self._index_file
+
+        try:
+            file.download().join(tqdm_bar=False)
+
+        except ResourceNotFoundError:
+            raise KeyError(f"No frozen table found at {self._folder_name}.") from None
+
+        self._index = file.data
+
+    def refresh(self):
+        """
+        Reloads the index of the table, in case it was frozen again.
+        """
+        with self._lock:
+            self._load_index()
+
+    def _deserialize(self, data):
+        if is_chunked_array(data):
+            return decode_chunked_array(data)
+
+        if is_parquet_frame(data):
+            return decode_parquet_frame(data)
+
+        serializer = self.service.serializer
+        return serializer.deserialize(data) if serializer is not None else data
+
+    def _read_block(self, index, block):
+        part = index["parts"][index["block_parts"][block]]
+        client = self._container[f"{self._folder_name}{part}"].file_raw
+
+        stream = client.download_blob(offset=index["block_offsets"][block], length=index["block_lengths"][block])
+        return parse_block(stream.readall())
+
+    def _block_of(self, index, key):
+        """
+        Retrieves the number of the block that may hold the given key. None if the key is known not to exist.
+        """
+        bloom = index["bloom"]
+
+        if bloom is not None and key not in bloom:
+            return None
+
+        block = bisect_right(index["first_keys"], key) - 1
+
+        return block if block >= 0 else None
+
+    def _lookup(self, keys):
+        """
+        Retrieves the serialized values of the given keys that exist, as a dictionary {key: data}.
+        """
+        index = self.index
+        blocks = {}
+
+        for k in keys:
+            block = self._block_of(index, k)
+
+            if block is not None:
+                blocks.setdefault(block, []).append(k)
+
+        block_numbers = list(blocks)
+        contents = self.service.pool.map(lambda b: self._read_block(index, b), block_numbers)
+
+        result = {}
+
+        for block, records in zip(block_numbers, contents):
+            wanted = set(blocks[block])
+            result.update({k: data for k, data in records if k in wanted})
+
+        return result
+
+    def __getitem__(self, key):
+        is_list = isinstance(key, list)
+        keys = key if is_list else [key]
+
+        try:
+            found = self._lookup(keys)
+
+        except ResourceNotFoundError:
+            # The table was frozen again and the parts of our index were removed
+            self.refresh()
+            found = self._lookup(keys)
+
+        for k in keys:
+            if k not in found:
+                raise KeyError(f"The key \"{k}\" does not exist.")
+
+        values = {k: self._deserialize(data) for k, data in found.items()}
+        result = [values[k] for k in keys]
+
+        return result if is_list else result[0]
+
+    def __contains__(self, key):
+        return key in self._lookup([key])
+
+    def get(self, key, default=None):
+        try:
+            result = self[key]
+
+        except KeyError:
+            result = default
+
+        return result
+
+    def __len__(self):
+        return self.index["count"]
+
+    def _scan(self):
+        """
+        Iterates over the records (key, serialized value) of the table, downloading each part sequentially in chunks.
+        """
+        index = self.index
+        block_parts = index["block_parts"]
+        block_lengths = index["block_lengths"]
+        block = 0
+
+        for part_number, part in enumerate(index["parts"]):
+            client = self._container[f"{self._folder_name}{part}"].file_raw
+            buffer = bytearray()
+
+            for chunk in client.download_blob().chunks():
+                buffer += chunk
+
+                # Complete blocks are decoded as soon as they are downloaded
+                while block < len(block_parts) and block_parts[block] == part_number and \
+                        len(buffer) >= block_lengths[block]:
+                    yield from parse_block(bytes(buffer[:block_lengths[block]]))
+                    del buffer[:block_lengths[block]]
+                    block += 1
+
+    def __iter__(self):
+        """
+        Iterates over the keys, sorted. Note that keys are stored along with the values, so this scans the table.
+        """
+        for k, _ in self._scan():
+            yield k
+
+    def keys(self):
+        return [k for k in self]
+
+    def items(self):
+        """
+        Iterates over the (key, value) pairs, sorted by key, with a sequential scan of the table.
+        """
+        for k, data in self._scan():
+            yield k, self._deserialize(data)
+
+    def values(self):
+        for _, v in self.items():
+            yield v
+
+    def __setitem__(self, key, value):
+        raise TypeError("Frozen dictionaries are read-only.")
+
+    def __delitem__(self, key):
+        raise TypeError("Frozen dictionaries are read-only.")
+
+    def __str__(self):
+        return f"[Frozen Remote Dictionary at {self._container}/{self._folder_name}]"
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,670 @@
+import logging
+import time
+import uuid
+import weakref
+from threading import Lock, Thread, Timer
+
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+
+from cloudspeak.azure.packed import PackedSegment, PackedSegmentWriter
+from cloudspeak.config import get_config
+from cloudspeak.utils.exit import register_exit
+
+_instances = weakref.WeakSet()
+
+
+def _flush_all():
+    """
+    Flushes the writes still buffered in all the packed dictionaries before the process exits.
+    """
+    for dictionary in list(_instances):
+        try:
+            dictionary.flush()
+
+        except Exception as e:
+            dictionary._logger.warning(f"Flush of the packed dictionary at exit failed: {e}")
+
+
+register_exit(_flush_all)
+
+
+class AzurePackedDictionary:
+    """
+    Remote dictionary for small values, packed in segment blobs (LSM-style).
+
+    Writes are buffered locally and flushed as a new segment blob holding many records plus an offset table, so bulk
+    loads take one request per segment instead of one per key. Buffered writes are not durable nor visible to other
+    processes until flushed: once a size threshold is met, `flush_seconds` after the first of them, on `flush()` or at
+    exit. The list of segments is kept in a manifest blob, updated
+    with optimistic concurrency (If-Match). Reads locate the record in the offset tables of the segments (newest
+    first) and fetch it with a ranged download.
+
+    A compactor merges the segments into a single one, dropping overwritten and removed records. It runs in background
+    once the number of segments reaches the threshold 'dictionary.packed.compaction_segments' of the config.
+    """
+    MANIFEST_NAME = "__--PACKED--MANIFEST--__"
+    SEGMENT_PREFIX = "__--PACKED--SEGMENT--__."
+
+    def __init__(self, container, folder_name, segment_items=None, segment_bytes=None, compaction_segments=None,
+                 staleness_seconds=None, flush_seconds=None):
+        """
+        Instances a new packed dictionary.
+
+        :param container:
+            Container where the dictionary is stored.
+
+        :param folder_name:
+            Folder within the container that holds the segments of the dictionary.
+
+        :param segment_items:
+            Number of buffered writes that triggers a flush into a new segment.
+            If not set, retrieved from config parameter 'dictionary.packed.segment_items'.
+
+        :param segment_bytes:
+            Number of buffered bytes (serialized) that triggers a flush into a new segment.
+            If not set, retrieved from config parameter 'dictionary.packed.segment_bytes'.
+
+        :param compaction_segments:
+            Number of segments that triggers a background compaction. None to disable the automatic compaction.
+            If not set, retrieved from config parameter 'dictionary.packed.compaction_segments'.
+
+        :param staleness_seconds:
+            Number of seconds the manifest is used without checking for new segments of other processes.
+            Use 0 to check always and -1 to check only on `refresh()`.
+            If not set, retrieved from config parameter 'dictionary.packed.staleness_seconds'.
+
+        :param flush_seconds:
+            Maximum number of seconds a write is kept buffered before being flushed.
+            If not set, retrieved from config parameter 'dictionary.packed.flush_seconds' (None there for no limit).
+        """
+        config = get_config()
+
+        if not folder_name.endswith("/"):
+            folder_name += "/"
+
+        self._logger = logging.getLogger("cs-packed-dict")
+        self._container = container
+        self._folder_name = folder_name
+
+        self._segment_items = segment_items if segment_items is not None \
+            else config.get('dictionary.packed.segment_items')
+        self._segment_bytes = segment_bytes if segment_bytes is not None \
+            else config.get('dictionary.packed.segment_bytes')
+        self._compaction_segments = compaction_segments if compaction_segments is not None \
+            else config.get('dictionary.packed.compaction_segments')
+        self._staleness_seconds = staleness_seconds if staleness_seconds is not None \
+            else config.get('dictionary.packed.staleness_seconds')
+        self._flush_seconds = flush_seconds if flush_seconds is not None \
+            else config.get('dictionary.packed.flush_seconds')
+
+        self._manifest_file = container[f"{folder_name}{self.MANIFEST_NAME}"]
+
+        self._lock = Lock()
+        self._manifest_lock = Lock()
+        self._flush_lock = Lock()
+        self._compaction_lock = Lock()
+
+        self._pending = {}
+        self._pending_bytes = 0
+        self._timer = None
+
+        self._segments = []
+        self._segments_by_name = {}
+        self._manifest_timestamp = None
+
+        self._compaction_thread = None
+
+        _instances.add(self)
+
+    @property
+    def container(self):
+        return self._container
+
+    @property
+    def service(self):
+        return self._container.service
+
+    @property
+    def segments(self):
+        """
+        Retrieves the list of segments of the dictionary, from oldest to newest.
+        """
+        return list(self._get_segments())
+
+    @property
+    def pending_bytes(self):
+        """
+        Retrieves the number of bytes written but not flushed yet.
+        """
+        return self._pending_bytes
+
+    # Manifest
+
+    def _read_manifest(self):
+        """
+        Downloads the latest manifest (conditionally) and retrieves its list of segment entries.
+        Must be called with the manifest lock held.
+        """
+        file = self._manifest_file
+
+        try:
+            file.download().join(tqdm_bar=False)
+
+        except ResourceNotFoundError:
+            pass
+
+        content = file.data if file.etag is not None else None
+
+        return content["segments"] if content is not None else []
+
+    def _set_segments(self, entries):
+        """
+        Sets the local list of segments from manifest entries, keeping the tables already loaded.
+        """
+        segments = []
+
+        for entry in entries:
+            segment = self._segments_by_name.get(entry["name"])
+
+            if segment is None:
+                segment = PackedSegment.from_dict(entry)
+
+            segments.append(segment)
+
+        self._segments = segments
+        self._segments_by_name = {s.name: s for s in segments}
+        self._manifest_timestamp = time.time()
+
+    def refresh(self):
+        """
+        Retrieves the latest list of segments from the backend.
+        """
+        with self._manifest_lock:
+            self._set_segments(self._read_manifest())
+
+    def _get_segments(self):
+        timestamp = self._manifest_timestamp
+        staleness_seconds = self._staleness_seconds
+
+        if timestamp is None or (staleness_seconds != -1 and time.time() - timestamp >= staleness_seconds):
+            self.refresh()
+
+        return self._segments
+
+    def _update_manifest(self, fn):
+        """
+        Updates the manifest with optimistic concurrency.
+
+        :param fn:
+            Function receiving the latest list of segment entries and returning the new one, or None to abort.
+            It is called again if other process updated the manifest meanwhile.
+
+        :return:
+            True if the manifest was updated. False if aborted.
+        """
+        file = self._manifest_file
+
+        with self._manifest_lock:
+            while True:
+                entries = self._read_manifest()
+                new_entries = fn(entries)
+
+                if new_entries is None:
+                    self._set_segments(entries)
+                    return False
+
+                etag = file.etag
+                file.data = {"segments": new_entries}
+
+                try:
+                    if etag is None:
+                        file.upload(overwrite=False).join(tqdm_bar=False)
+                    else:
+                        file.upload(overwrite=True, etag=etag).join(tqdm_bar=False)
+
+                except (ResourceModifiedError, ResourceExistsError):
+                    file.reset_status()
+                    continue
+
+                self._set_segments(new_entries)
+                return True
+
+    # Segments
+
+    def _segment_file(self, name):
+        return self._container[f"{self._folder_name}{name}"]
+
+    def _read_range(self, name, offset, length):
+        """
+        Downloads a range of bytes of the given segment.
+        """
+        if length == 0:
+            return b""
+
+        client = self._segment_file(name).file_raw
+        return client.download_blob(offset=offset, length=length).readall()
+
+    def _load_tables(self, segments):
+        """
+        Loads (in parallel) the offset tables of the given segments that were not loaded yet.
+        """
+        missing = [s for s in segments if s.table is None]
+
+        if len(missing) == 0:
+            return
+
+        tables = self.service.pool.map(lambda s: self._read_range(s.name, s.table_offset, s.table_length), missing)
+
+        for segment, table in zip(missing, tables):
+            segment.load_table(table)
+
+    def _locate(self, keys):
+        """
+        Locates the records of the given keys.
+
+        :return:
+            Dictionary {key: location}, where location is either ("pending", data) for values not flushed yet, or
+            (segment name, offset, length). Keys that don't exist (or were removed) are not included.
+        """
+        result = {}
+        keys = list(keys)
+
+        with self._lock:
+            pending = self._pending
+
+            for k in keys:
+                if k in pending:
+                    result[k] = ("pending", pending[k])
+
+        remaining = [k for k in keys if k not in result]
+
+        if len(remaining) > 0:
+            segments = self._get_segments()
+            self._load_tables(segments)
+
+            for k in remaining:
+                for segment in reversed(segments):
+                    location = segment.table.get(k)
+
+                    if location is not None:
+                        result[k] = (segment.name,) + tuple(location)
+                        break
+
+        return {k: v for k, v in result.items() if v[-1] is not None and v[-1] != -1}
+
+    def _fetch(self, location):
+        if location[0] == "pending":
+            return location[1]
+
+        return self._read_range(*location)
+
+    def _deserialize(self, data):
+        serializer = self.service.serializer
+        return serializer.deserialize(data) if serializer is not None else data
+
+    def _serialize(self, value):
+        serializer = self.service.serializer
+        return serializer.serialize(value) if serializer is not None else value
+
+    # Dictionary interface
+
+    def __getitem__(self, key):
+        is_list = isinstance(key, list)
+        keys = key if is_list else [key]
+
+        values = self._read(self._get_values, keys)
+
+        return values if is_list else values[0]
+
+    def _read(self, fn, *args):
+        """
+        Calls the given read function, again with the latest manifest if a segment of ours was not found.
+        """
+        try:
+            return fn(*args)
+
+        except ResourceNotFoundError:
+            # A compaction removed a segment of our manifest. We retry with the latest one.
+            self.refresh()
+            return fn(*args)
+
+    def _get_values(self, keys):
+        locations = self._locate(keys)
+
+        for k in keys:
+            if k not in locations:
+                raise KeyError(f"The key \"{k}\" does not exist.")
+
+        unique_keys = list(dict.fromkeys(keys))
+        data = self.service.pool.map(self._fetch, [locations[k] for k in unique_keys])
+        values = {k: self._deserialize(d) for k, d in zip(unique_keys, data)}
+
+        return [values[k] for k in keys]
+
+    def __setitem__(self, key, value):
+        is_list = isinstance(key, list)
+
+        if not is_list:
+            key = [key]
+            value = [value]
+
+        records = [(k, self._serialize(v)) for k, v in zip(key, value)]
+
+        self._buffer(records)
+
+    def __delitem__(self, key):
+        is_list = isinstance(key, list)
+
+        if not is_list:
+            key = [key]
+
+        locations = self._read(self._locate, key)
+
+        # Tombstones hide the records of the older segments. Keys that exist are removed even if others don't.
+        removed = [(k, None) for k in dict.fromkeys(key) if k in locations]
+
+        if len(removed) > 0:
+            self._buffer(removed)
+
+        missing = [k for k in key if k not in locations]
+
+        if len(missing) > 0:
+            if is_list:
+                error = KeyError(f"Only {len(key) - len(missing)} out of {len(key)} keys could be removed, as the rest "
+                                 f"don't exist. Access the .keys attribute of this exception to know which keys.")
+
+            else:
+                error = KeyError(f"The key \"{missing[0]}\" does not exist.")
+
+            error.keys = missing
+            raise error
+
+    def _buffer(self, records):
+        with self._lock:
+            for k, data in records:
+                previous = self._pending.pop(k, None)
+
+                if previous is not None:
+                    self._pending_bytes -= len(previous)
+
+                self._pending[k] = data
+                self._pending_bytes += len(data) if data is not None else 0
+
+            threshold_met = len(self._pending) >= self._segment_items or self._pending_bytes >= self._segment_bytes
+
+            if not threshold_met:
+                self._schedule()
+
+        if threshold_met:
+            self.flush()
+
+    def _schedule(self):
+        """
+        Starts the timer of the delayed flush, if not running. Must be called with the lock acquired.
+        """
+        if self._flush_seconds is not None and self._timer is None:
+            self._timer = Timer(self._flush_seconds, self._flush_delayed)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_delayed(self):
+        try:
+            self.flush()
+
+        except Exception as e:
+            # The records were kept buffered: they are retried by the next flush
+            self._logger.warning(f"Delayed flush of the packed dictionary failed ({e}); {len(self._pending)} keys kept "
+                                 f"pending")
+
+    def __contains__(self, key):
+        return len(self._read(self._locate, [key])) > 0
+
+    def get(self, key, default=None):
+        try:
+            result = self[key]
+
+        except KeyError:
+            result = default
+
+        return result
+
+    def _live_keys(self):
+        """
+        Retrieves the sorted list of keys that exist, including the ones not flushed yet.
+        """
+        segments = self._get_segments()
+        self._load_tables(segments)
+
+        lengths = {}
+
+        for segment in segments:
+            lengths.update({k: n for k, (o, n) in segment.table.items()})
+
+        with self._lock:
+            lengths.update({k: (-1 if data is None else len(data)) for k, data in self._pending.items()})
+
+        return sorted(k for k, n in lengths.items() if n != -1)
+
+    def __iter__(self):
+        yield from self._read(self._live_keys)
+
+    def __len__(self):
+        return len(self._read(self._live_keys))
+
+    def keys(self):
+        return self._read(self._live_keys)
+
+    def items(self, chunk_size=256):
+        """
+        Iterates over the (key, value) pairs of the dictionary, sorted by key.
+        Values are fetched in chunks of ranged reads done in parallel.
+        """
+        keys = self._read(self._live_keys)
+
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i:i + chunk_size]
+            values = self[chunk]
+
+            yield from zip(chunk, values)
+
+    def values(self, chunk_size=256):
+        for _, v in self.items(chunk_size=chunk_size):
+            yield v
+
+    # Flush and compaction
+
+    def flush(self):
+        """
+        Writes the buffered records into a new segment and registers it in the manifest.
+
+        If it fails, the records are kept buffered to be retried by the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = {}
+                self._pending_bytes = 0
+
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            if len(pending) == 0:
+                return
+
+            try:
+                self._write_segment(sorted(pending.items()))
+
+            except Exception:
+                # The records are kept buffered, unless they were written again meanwhile
+                with self._lock:
+                    for k, data in pending.items():
+                        if k not in self._pending:
+                            self._pending[k] = data
+                            self._pending_bytes += len(data) if data is not None else 0
+
+                    self._schedule()
+                raise
+
+        compaction_segments = self._compaction_segments
+
+        if compaction_segments is not None and len(self._segments) >= compaction_segments:
+            self.compact_background()
+
+    def _new_segment_name(self):
+        return f"{self.SEGMENT_PREFIX}{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+    def _write_segment(self, records):
+        """
+        Uploads a new segment with the given records (sorted by key) and appends it to the manifest.
+        """
+        segment, blob = PackedSegment.build(self._new_segment_name(), records)
+
+        file = self._segment_file(segment.name)
+        file.data_raw = blob
+        file.upload(overwrite=False).join(tqdm_bar=False)
+
+        # The table is already known, so it is not downloaded again
+        self._segments_by_name[segment.name] = segment
+        self._update_manifest(lambda entries: entries + [segment.to_dict()])
+
+        self._logger.debug(f"Flushed {segment}")
+
+        return segment
+
+    def compact_background(self):
+        """
+        Starts a compaction in a background thread, unless one is already running for this instance.
+        """
+        with self._lock:
+            thread = self._compaction_thread
+
+            if thread is not None and thread.is_alive():
+                return
+
+            thread = Thread(target=self._compact_silent, daemon=True)
+            self._compaction_thread = thread
+
+        thread.start()
+
+    def _compact_silent(self):
+        try:
+            self.compact()
+
+        except ResourceNotFoundError:
+            self._logger.debug("Compaction discarded: the segments were compacted by other process.")
+
+        except Exception as e:
+            self._logger.warning(f"Compaction of the packed dictionary failed: {e}")
+
+    def _merge_records(self, segments, owned, writer):
+        """
+        Generator of the bytes of a merged segment: the records of the given keys of each segment, followed by the
+        offset table.
+
+        :param segments:
+            Iterable of the segments to merge, in the order their records are written.
+
+        :param owned:
+            Dictionary {segment name: keys whose records are taken from that segment}.
+
+        :param writer:
+            PackedSegmentWriter of the merged segment, closed once the generator is exhausted.
+        """
+        chunk_bytes = get_config().get('blob.stream.chunk_bytes')
+
+        for segment in segments:
+            table = segment.table
+            keys = sorted(owned[segment.name], key=lambda k: table[k][0])
+
+            def end_of(k):
+                offset, length = table[k]
+                return offset + length
+
+            # Records close to each other are fetched together, in ranged reads of up to a chunk
+            i = 0
+
+            while i < len(keys):
+                start = table[keys[i]][0]
+                j = i + 1
+
+                while j < len(keys) and end_of(keys[j]) - start <= chunk_bytes:
+                    j += 1
+
+                data = self._read_range(segment.name, start, end_of(keys[j - 1]) - start)
+
+                for k in keys[i:j]:
+                    offset, length = table[k]
+                    yield writer.add(k, data[offset - start:offset - start + length])
+
+                i = j
+
+        _, table = writer.close()
+        yield table
+
+    def compact(self):
+        """
+        Merges all the segments into a single one, dropping overwritten and removed records.
+
+        Segments written by other processes meanwhile are kept after the merged one. If other process compacted the
+        same segments first, this compaction is discarded (or ResourceNotFoundError is raised if their blobs were
+        already removed).
+        """
+        with self._compaction_lock:
+            self.refresh()
+            segments = list(self._segments)
+
+            if len(segments) < 2:
+                return
+
+            self._load_tables(segments)
+
+            # The newest record of each key wins. Nothing is older than the merged segments, so tombstones are dropped.
+            seen = set()
+            owned = {}
+
+            for segment in reversed(segments):
+                keys = [k for k in segment.table if k not in seen]
+                seen.update(keys)
+                owned[segment.name] = [k for k in keys if segment.table[k][1] != -1]
+
+            writer = PackedSegmentWriter(self._new_segment_name())
+            new_file = self._segment_file(writer.name)
+
+            # The records are streamed into the new blob, so only a chunk of a segment is held in memory at a time
+            new_file.upload_from(self._merge_records(reversed(segments), owned, writer),
+                                 overwrite=False).join(tqdm_bar=False)
+            new_segment = writer.segment
+
+            names = [s.name for s in segments]
+
+            def replace(entries):
+                if [e["name"] for e in entries[:len(names)]] != names:
+                    return None
+
+                return [new_segment.to_dict()] + entries[len(names):]
+
+            self._segments_by_name[new_segment.name] = new_segment
+
+            if not self._update_manifest(replace):
+                new_file.delete(changed_ok=True)
+                self._logger.debug("Compaction discarded: the segments were compacted by other process.")
+                return
+
+            # Readers with an older manifest retry after refreshing it
+            self._container.delete_many_files([self._segment_file(n) for n in names], changed_ok=True,
+                                              raise_errors=False)
+
+            self._logger.debug(f"Compacted {len(names)} segments into {new_segment}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def __str__(self):
+        return f"[Packed Remote Dictionary at {self._container}/{self._folder_name}; {len(self._segments)} segments]"
+
+    def __repr__(self):
+        return str(self)
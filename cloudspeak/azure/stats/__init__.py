@@ -0,0 +1,5 @@
+from cloudspeak.azure.stats.stats_remote import StatsRemote
+
+__all__ = [
+    "StatsRemote",
+]
@@ -0,0 +1,266 @@
+import json
+import logging
+import weakref
+from threading import Lock, Timer
+
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+
+from cloudspeak.utils.exit import register_exit
+from cloudspeak.utils.time import now, to_datetime
+
+_instances = weakref.WeakSet()
+
+
+def _flush_all():
+    """
+    Merges the deltas still pending of all the counters before the process exits.
+    """
+    for stats in list(_instances):
+        try:
+            stats.flush()
+
+        except Exception as e:
+            stats._logger.warning(f"Counters of {stats.file.name} could not be updated at exit ({e}); they may be "
+                                  f"wrong until rebuilt")
+
+
+register_exit(_flush_all)
+
+
+class StatsRemote:
+    """
+    Counters of a remote dictionary (number of keys and total bytes of the values), persisted in a tiny blob.
+
+    Writes update the counters with deltas merged with optimistic concurrency: the latest counters are downloaded
+    (conditionally, so nothing is transferred if they didn't change), the delta is applied and they are uploaded only if
+    nobody changed them in between; otherwise, the process is retried. Reading them is a single small download.
+
+    Deltas can be accumulated locally and merged in a single update every few seconds, so writers don't compete for the
+    blob on every write. They are merged anyway before the process exits.
+    """
+
+    def __init__(self, file, seed=None, flush_seconds=None):
+        """
+        Instances new remote counters.
+
+        :param file:
+            AzureFile where the counters are stored.
+
+        :param seed:
+            Callable retrieving the exact counters as a tuple (count, bytes), used when the blob is created.
+
+        :param flush_seconds:
+            Maximum number of seconds the deltas are accumulated locally before being merged in the backend. None to
+            merge each delta as soon as it is added.
+        """
+        self._logger = logging.getLogger("cs-stats")
+        self._file = file
+        self._seed = seed
+        self._flush_seconds = flush_seconds
+        self._lock = Lock()
+
+        self._pending_lock = Lock()
+        self._pending_count = 0
+        self._pending_bytes = 0
+        self._timer = None
+
+        _instances.add(self)
+
+    @property
+    def file(self):
+        return self._file
+
+    def _download(self):
+        """
+        Retrieves the counters stored in the backend. None if the blob does not exist.
+        """
+        file = self._file
+
+        try:
+            file.download().join(tqdm_bar=False)
+
+        except ResourceNotFoundError:
+            return None
+
+        if file.etag is None:
+            return None
+
+        return json.loads(bytes(file.data_raw).decode("utf-8"))
+
+    def _upload(self, stats, create):
+        file = self._file
+        file.data_raw = json.dumps(stats).encode("utf-8")
+        file.upload(overwrite=not create, allow_changed=False).join(tqdm_bar=False)
+
+    def read(self):
+        """
+        Retrieves the counters as a dictionary {"count", "bytes", "last_modified"}. None if they were never stored.
+        """
+        with self._lock:
+            stats = self._download()
+
+        if stats is None:
+            return None
+
+        # The deltas of this process not merged yet are accounted too
+        with self._pending_lock:
+            count_pending, bytes_pending = self._pending_count, self._pending_bytes
+
+        return {
+            "count": max(0, stats["count"] + count_pending),
+            "bytes": max(0, stats["bytes"] + bytes_pending),
+            "last_modified": to_datetime(stats["last_modified"]),
+        }
+
+    def ensure(self):
+        """
+        Creates the counters blob with the exact counters (retrieved from the seed) if it does not exist yet.
+
+        This must be done before the first counted write: otherwise, writes completed before the blob is created would
+        be counted twice (in the seed and in their deltas).
+        """
+        with self._lock:
+            if self._download() is not None:
+                return
+
+            count, size = self._seed() if self._seed is not None else (0, 0)
+
+            try:
+                self._upload({"count": count, "bytes": size, "last_modified": now().isoformat()}, create=True)
+
+            except ResourceExistsError:
+                # Other process created it first
+                pass
+
+    def add(self, count_delta, bytes_delta):
+        """
+        Adds the given deltas to the counters. They are merged in the backend within `flush_seconds`, along with the
+        other deltas added meanwhile (at once if not set).
+
+        :param count_delta:
+            Number of keys added (negative if removed).
+
+        :param bytes_delta:
+            Number of bytes added (negative if removed).
+        """
+        if self._flush_seconds is None:
+            self._apply(count_delta, bytes_delta)
+            return
+
+        with self._pending_lock:
+            self._pending_count += count_delta
+            self._pending_bytes += bytes_delta
+            self._schedule()
+
+    def _schedule(self):
+        """
+        Starts the timer of the delayed flush, if not running. Must be called with the pending lock acquired.
+        """
+        if self._timer is None:
+            self._timer = Timer(self._flush_seconds, self._flush_delayed)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _take_pending(self):
+        with self._pending_lock:
+            count, size = self._pending_count, self._pending_bytes
+            self._pending_count = 0
+            self._pending_bytes = 0
+
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        return count, size
+
+    def flush(self):
+        """
+        Merges the deltas accumulated locally in the backend, in a single update.
+        If it fails, the deltas are kept to be merged in the next flush.
+        """
+        count, size = self._take_pending()
+
+        if count == 0 and size == 0:
+            return
+
+        try:
+            self._apply(count, size)
+
+        except Exception:
+            with self._pending_lock:
+                self._pending_count += count
+                self._pending_bytes += size
+                self._schedule()
+
+            raise
+
+    def _flush_delayed(self):
+        try:
+            self.flush()
+
+        except Exception as e:
+            self._logger.warning(f"Could not merge the counters of {self._file.name} ({e}); retrying later")
+
+    def _apply(self, count_delta, bytes_delta):
+        """
+        Applies the given deltas to the counters in the backend.
+
+        If the blob does not exist yet, it is created with the exact counters (retrieved from the seed) instead.
+
+        :param count_delta:
+            Number of keys added (negative if removed).
+
+        :param bytes_delta:
+            Number of bytes added (negative if removed).
+        """
+        with self._lock:
+            while True:
+                stats = self._download()
+                create = stats is None
+
+                if create:
+                    count, size = self._seed() if self._seed is not None else (0, 0)
+                    stats = {"count": count, "bytes": size}
+
+                elif count_delta == 0 and bytes_delta == 0:
+                    return
+
+                else:
+                    stats["count"] = max(0, stats["count"] + count_delta)
+                    stats["bytes"] = max(0, stats["bytes"] + bytes_delta)
+
+                stats["last_modified"] = now().isoformat()
+
+                try:
+                    self._upload(stats, create)
+
+                except (ResourceModifiedError, ResourceExistsError):
+                    # Other process updated the counters. We apply our delta over its version.
+                    continue
+
+                break
+
+    def rebuild(self, count, size):
+        """
+        Replaces the counters in the backend by the given ones.
+
+        :param count:
+            Number of keys.
+
+        :param size:
+            Total number of bytes of the values.
+        """
+        # Deltas pending of this process are already accounted by the given counters
+        self._take_pending()
+
+        with self._lock:
+            stats = {"count": count, "bytes": size, "last_modified": now().isoformat()}
+            file = self._file
+            file.data_raw = json.dumps(stats).encode("utf-8")
+            file.upload(overwrite=True, allow_changed=True).join(tqdm_bar=False)
+
+    def __str__(self):
+        return f"[Remote stats; {self._file.name}]"
+
+    def __repr__(self):
+        return str(self)
@@ -2,6 +2,29 @@ _config = {
     "blob.max_concurrency_upload": 2,
     "blob.max_concurrency_download": 2,
     "blob.query.results_per_page": 1000,
+    "blob.stream.chunk_bytes": 16 * 1024 * 1024,
+    "blob.stream.max_concurrency": None,
+    "blob.mmap.dir": None,
+    "blob.mmap.max_bytes": None,
+    "blob.incremental.block_bytes": 4 * 1024 * 1024,
+    "blob.incremental.min_bytes": None,
+    "dictionary.index.journal.compaction_bytes": 4 * 1024 * 1024,
+    "dictionary.index.journal.compaction_appends": 10000,
+    "dictionary.contains_many.max_heads": 64,
+    "dictionary.bloom.capacity": 100000,
+    "dictionary.bloom.error_rate": 0.01,
+    "dictionary.bloom.staleness_seconds": 10,
+    "dictionary.bloom.shards": 16,
+    "dictionary.packed.segment_items": 100000,
+    "dictionary.packed.segment_bytes": 64 * 1024 * 1024,
+    "dictionary.packed.compaction_segments": 16,
+    "dictionary.packed.staleness_seconds": 10,
+    "dictionary.packed.flush_seconds": 5,
+    "dictionary.stats.flush_seconds": 1,
+    "dictionary.frozen.block_bytes": 64 * 1024,
+    "dictionary.frozen.part_bytes": 256 * 1024 * 1024,
+    "dictionary.array.chunk_bytes": 4 * 1024 * 1024,
+    "dictionary.frame.row_group_rows": 64 * 1024,
 }
 
 
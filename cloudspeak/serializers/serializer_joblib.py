@@ -1,4 +1,5 @@
 import io
+import os
 
 import joblib
 
@@ -8,7 +9,8 @@ class JoblibSerializer:
     JoblibSerializer provides serialization and deserialization of data using the Joblib library.
 
     Args:
-        algorithm (str, optional): The compression algorithm to use (default is "lz4").
+        algorithm (str, optional): The compression algorithm to use (default is "lz4"). None for no compression,
+            which allows arrays to be memory-mapped when loaded from a file.
         level (int, optional): The compression level (1 to 9) to use with lz4 compression (default is 1).
         protocol (int, optional): The pickling protocol to use (default is 4).
 
@@ -19,7 +21,8 @@ class JoblibSerializer:
         Initializes an instance of JoblibSerializer with the provided configuration.
 
         Args:
-            algorithm (str, optional): The compression algorithm to use (default is "lz4").
+            algorithm (str, optional): The compression algorithm to use (default is "lz4"). None for no
+                compression, which allows arrays to be memory-mapped when loaded from a file.
             level (int, optional): The compression level (1 to 9) to use with lz4 compression (default is 1).
             protocol (int, optional): The pickling protocol to use (default is 4).
 
@@ -44,7 +47,8 @@ class JoblibSerializer:
             None
         """
         with io.BytesIO() as b:
-            joblib.dump(data, b, compress=(self._algorithm, self._level), protocol=self._protocol)
+            compress = (self._algorithm, self._level) if self._algorithm is not None else 0
+            joblib.dump(data, b, compress=compress, protocol=self._protocol)
             b.seek(0)
             data_bytes = b.read()
         return data_bytes
@@ -70,6 +74,26 @@ class JoblibSerializer:
 
         return data
 
+    def deserialize_file(self, path, mmap_mode=None):
+        """
+        Deserialize data from a local file using Joblib.
+
+        Args:
+            path (str): Path of the file containing the serialized data.
+            mmap_mode (str, optional): Memory-map mode for the arrays ("r" for read-only), so their pages are loaded
+                lazily and shared with other processes mapping the same file. Only effective for uncompressed data.
+
+        Returns:
+            Any: The deserialized data.
+
+        Raises:
+            None
+        """
+        if os.path.getsize(path) == 0:
+            return None
+
+        return joblib.load(path, mmap_mode=mmap_mode)
+
     def __str__(self):
         """
         Returns a string representation of the JoblibSerializer.
@@ -0,0 +1,5 @@
+from cloudspeak.storage.azure.blob.checkpoints.transfer_checkpoint import TransferCheckpoint
+
+__all__ = [
+    "TransferCheckpoint"
+]
@@ -0,0 +1,110 @@
+import json
+import os
+
+
+class TransferCheckpoint:
+    """
+    Small local file recording the progress of a transfer, so it can be resumed by a later run of the same transfer.
+
+    The file is a journal of JSON lines: a header describing the transfer, followed by one line per step completed.
+    Steps are appended and flushed as they complete, so saving them costs the same regardless of the transfer size, and
+    a line left partial by an interrupted process is simply ignored when loading.
+    """
+    def __init__(self, path, kind, blob_url):
+        """
+        Instances a checkpoint.
+
+        :param path:
+            Path of the local checkpoint file.
+
+        :param kind:
+            Kind of transfer ("upload" or "download"). A checkpoint of other kind is ignored.
+
+        :param blob_url:
+            URL of the blob transferred. A checkpoint of other blob is ignored.
+        """
+        self._path = os.fspath(path)
+        self._kind = kind
+        self._blob_url = blob_url
+        self._stream = None
+
+    @property
+    def path(self):
+        return self._path
+
+    def load(self):
+        """
+        Retrieves the header and the list of steps saved for this transfer.
+        (None, []) if there is no checkpoint, or it belongs to other transfer.
+        """
+        try:
+            with open(self._path, "r") as f:
+                lines = f.read().splitlines()
+
+        except FileNotFoundError:
+            return None, []
+
+        entries = []
+
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+
+            except ValueError:
+                # Partially written by an interrupted process
+                break
+
+        if len(entries) == 0:
+            return None, []
+
+        header = entries[0]
+
+        if header.get("kind") != self._kind or header.get("blob") != self._blob_url:
+            return None, []
+
+        return header, entries[1:]
+
+    def start(self, header, entries=None):
+        """
+        Begins a new checkpoint with the given header (replacing any previous one), followed by the given steps.
+        """
+        self.close()
+        header = dict(header, kind=self._kind, blob=self._blob_url)
+        path_tmp = f"{self._path}.tmp"
+
+        with open(path_tmp, "w") as f:
+            for entry in [header] + list(entries if entries is not None else []):
+                f.write(json.dumps(entry) + "\n")
+
+        os.replace(path_tmp, self._path)
+        self._stream = open(self._path, "a")
+
+    def append(self, entry):
+        """
+        Saves a completed step of the transfer.
+        """
+        self._stream.write(json.dumps(entry) + "\n")
+        self._stream.flush()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def clear(self):
+        """
+        Removes the checkpoint, once the transfer is completed.
+        """
+        self.close()
+
+        try:
+            os.remove(self._path)
+
+        except FileNotFoundError:
+            pass
+
+    def __str__(self):
+        return f"[Checkpoint of {self._kind} of {self._blob_url}: {self._path}]"
+
+    def __repr__(self):
+        return str(self)
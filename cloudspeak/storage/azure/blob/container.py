@@ -7,6 +7,9 @@ from cloudspeak.storage.interface.blob.container import Container
 from cloudspeak.config import get_config
 from cloudspeak.utils.time import now
 
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
 import weakref
 import time
 
@@ -154,7 +157,117 @@ class AzureContainer(Container):
                               autorenew_seconds=30,
                               lease_expire_seconds=duration_seconds)
 
-    def get_files(self, prefix, delimiter="/"):
+    @staticmethod
+    def _put(output, x, cancel_event):
+        """
+        Puts an item in the given bounded queue, waiting for room unless the walk is cancelled.
+
+        :return:
+            True if the item was put. False if the walk was cancelled.
+        """
+        while not cancel_event.is_set():
+            try:
+                output.put(x, timeout=0.1)
+                return True
+
+            except queue.Full:
+                pass
+
+        return False
+
+    def _walk_shard(self, name_starts_with, delimiter, output, cancel_event):
+        """
+        Lists the blobs of the given prefix into the output queue. A sentinel `None` is put at the end.
+        If the listing fails, the exception is put instead of the sentinel.
+        """
+        try:
+            for x in self._client.walk_blobs(name_starts_with=name_starts_with, delimiter=delimiter):
+                if not self._put(output, x, cancel_event):
+                    return
+
+        except Exception as e:
+            self._put(output, e, cancel_event)
+            return
+
+        self._put(output, None, cancel_event)
+
+    def walk(self, prefix, delimiter="/", shard_prefixes=None, ordered=True):
+        """
+        Walks the blobs (and folder prefixes) under the given prefix, as returned by the backend.
+
+        If shard prefixes are given, the key space is split into one range per shard prefix, and the ranges are listed
+        concurrently (in threads of their own, so the service pool stays free for the transfers of the caller). Results
+        are merged into a lazily consumed stream; each range buffers at most a page of results
+        ('blob.query.results_per_page') ahead of the consumer.
+
+        :param prefix:
+            Prefix that blobs should have to be fetched.
+
+        :param delimiter:
+            Delimiter of the hierarchy.
+
+        :param shard_prefixes:
+            Iterable of prefixes (relative to `prefix`) to split the listing. None to list sequentially.
+            A string is treated as a set of single-character prefixes, e.g. "0123456789abcdef".
+            Only blobs whose name (after `prefix`) starts with one of them are listed, so they must cover all the
+            names. Shard prefixes can't be prefix of each other nor contain the delimiter.
+
+        :param ordered:
+            True to keep the lexicographic order of the backend listing. False to yield results as soon as any range
+            produces them (faster for the first results).
+        """
+        if shard_prefixes is None:
+            yield from self._client.walk_blobs(name_starts_with=prefix, delimiter=delimiter)
+            return
+
+        shard_prefixes = sorted(set(shard_prefixes))
+
+        for previous, current in zip(shard_prefixes, shard_prefixes[1:]):
+            if current.startswith(previous):
+                raise ValueError(f"Shard prefix '{previous}' is prefix of '{current}'. Results would be duplicated.")
+
+        if delimiter is not None and any(delimiter in p for p in shard_prefixes):
+            raise ValueError(f"Shard prefixes can't contain the delimiter '{delimiter}'.")
+
+        cancel_event = threading.Event()
+        maxsize = max(1, get_config().get('blob.query.results_per_page') or 1)
+
+        if ordered:
+            outputs = [queue.Queue(maxsize=maxsize) for _ in shard_prefixes]
+        else:
+            outputs = [queue.Queue(maxsize=maxsize)] * len(shard_prefixes)
+
+        # A pool of its own, as the walkers block while the consumer is behind
+        executor = ThreadPoolExecutor(max_workers=len(shard_prefixes))
+
+        for shard_prefix, output in zip(shard_prefixes, outputs):
+            executor.submit(self._walk_shard, f"{prefix}{shard_prefix}", delimiter, output, cancel_event)
+
+        try:
+            pending = len(shard_prefixes)
+            output_index = 0
+
+            while pending > 0:
+                x = outputs[output_index].get()
+
+                if isinstance(x, Exception):
+                    raise x
+
+                if x is None:
+                    pending -= 1
+
+                    if ordered:
+                        output_index += 1
+
+                    continue
+
+                yield x
+
+        finally:
+            cancel_event.set()
+            executor.shutdown(wait=False)
+
+    def get_files(self, prefix, delimiter="/", shard_prefixes=None, ordered=True):
         """
         Retrieves all the files by the given pattern.
 
@@ -167,10 +280,14 @@ class AzureContainer(Container):
         :param delimiter:
             Delimiter that files should have to be fetched.
 
-        """
-        client = self._client
+        :param shard_prefixes:
+            Iterable of prefixes (relative to `prefix`) to list concurrently. None to list sequentially.
+            Check `walk()` for details.
 
-        for x in client.walk_blobs(name_starts_with=prefix, delimiter=delimiter):
+        :param ordered:
+            True to keep the lexicographic order when listing concurrently.
+        """
+        for x in self.walk(prefix, delimiter=delimiter, shard_prefixes=shard_prefixes, ordered=ordered):
 
             # We discard the special case: folder prefix. AzBlobStorage reports some prefix items for folders.
             if hasattr(x, 'prefix'):
@@ -178,7 +295,7 @@ class AzureContainer(Container):
 
             yield self[x['name']]
 
-    def get_folder_names(self, prefix):
+    def get_folder_names(self, prefix, shard_prefixes=None, ordered=True):
         """
         Retrieves all the folders by the given prefix.
 
@@ -188,11 +305,16 @@ class AzureContainer(Container):
         :param prefix:
             Prefix that files should have to be fetched.
 
+        :param shard_prefixes:
+            Iterable of prefixes (relative to `prefix`) to list concurrently. None to list sequentially.
+            Check `walk()` for details.
+
+        :param ordered:
+            True to keep the lexicographic order when listing concurrently.
         """
-        client = self._client
         delimiter = "/"
 
-        for x in client.walk_blobs(name_starts_with=prefix, delimiter=delimiter):
+        for x in self.walk(prefix, delimiter=delimiter, shard_prefixes=shard_prefixes, ordered=ordered):
 
             # We discard the special case: folder prefix. AzBlobStorage reports some prefix items for folders.
             if not hasattr(x, 'prefix'):
@@ -279,9 +401,9 @@ class AzureContainer(Container):
 
         # We append the MATCH condition (in case) or remove the etag
         for b in blobs:
-            if changed_ok and 'etag' in b:
-                del b['etag']
-            else:
+            if changed_ok:
+                b.pop('etag', None)
+            elif 'etag' in b:
                 b['match_condition'] = MatchConditions.IfNotModified
 
             # If a single blob of the list is a snapshot, we can't pass include_snapshots to the backend.
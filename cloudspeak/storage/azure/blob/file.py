@@ -1,10 +1,19 @@
+import hashlib
+import mmap
+import os
+import tempfile
 import time
+import uuid
 import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from threading import Lock
 
 from azure.core import MatchConditions
-from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError, \
+    ResourceNotModifiedError
+from azure.storage.blob import BlobBlock
 
+from cloudspeak.storage.azure.blob.checkpoints import TransferCheckpoint
 from cloudspeak.storage.azure.blob.progress import ProgressSingle
 from cloudspeak.storage.azure.blob.snapshots import Snapshots
 from cloudspeak.storage.interface.blob.file import File
@@ -14,6 +23,30 @@ from cloudspeak.utils.basics import len_nan
 from cloudspeak.utils.time import to_datetime
 
 
+class _ViewWriter:
+    """
+    Writable stream over a memoryview, so the SDK writes the responses straight into a buffer.
+    """
+    def __init__(self, view):
+        self._view = view
+        self._position = 0
+
+    def write(self, data):
+        size = len(data)
+        self._view[self._position:self._position + size] = data
+        self._position += size
+        return size
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self._position
+
+
 class AzureFile(File):
     def __init__(self, container, name, snapshot_id=None,
                  max_concurrency_download=None, max_concurrency_upload=None,
@@ -56,8 +89,10 @@ class AzureFile(File):
         self._progresses = weakref.WeakValueDictionary()
 
         self._data = None
+        self._mmap_path = None
         self._etag = None
         self._md5sum = None
+        self._replaced_size = None
 
         self._max_concurrency_download = max_concurrency_download
         self._max_concurrency_upload = max_concurrency_upload
@@ -113,11 +148,82 @@ class AzureFile(File):
         """
         return self._client
 
-    def _upload(self, progress, overwrite=False, allow_changed=False, tags=None, context=None):
+    def _use_incremental(self, incremental):
+        """
+        Resolves whether an upload of the internal data is done block by block.
+        """
+        if incremental is not None:
+            return incremental
+
+        min_bytes = get_config().get('blob.incremental.min_bytes')
+        return min_bytes is not None and len_nan(self._data, none_len=0) >= min_bytes
+
+    def _committed_blocks(self):
+        """
+        Retrieves the IDs of the blocks committed in the backend. Empty if the blob doesn't exist.
+        """
+        try:
+            committed, _ = self._client.get_block_list("committed")
+
+        except ResourceNotFoundError:
+            return set()
+
+        return {b.id for b in committed}
+
+    @staticmethod
+    def _block_id(index, block):
+        """
+        Retrieves the ID of a block from its position and content. All the IDs have the same length, as required.
+        """
+        return f"{index:06d}-{hashlib.sha256(block).hexdigest()[:48]}"
+
+    def _upload_blocks(self, progress, tags, **kwargs):
+        """
+        Uploads the internal data as a list of blocks, staging only the blocks whose content is not committed already.
+
+        The data is split in blocks of 'blob.incremental.block_bytes'. The ID of each block holds its position and the
+        hash of its content, so the blocks committed in the backend tell which ones changed without downloading them.
+        Unchanged blocks are reused in the new block list; the bytes not transferred are reported in the progress.
+        """
+        data = memoryview(self._data)
+        block_bytes = get_config().get('blob.incremental.block_bytes')
+        committed = self._committed_blocks()
+
+        block_ids = []
+        to_stage = []
+
+        for i, offset in enumerate(range(0, len(data), block_bytes)):
+            block = data[offset:offset + block_bytes]
+            block_id = self._block_id(i, block)
+            block_ids.append(block_id)
+
+            if block_id not in committed:
+                to_stage.append((block_id, block))
+
+        total = len(data)
+        transferred = total - sum(len(block) for _, block in to_stage)
+
+        progress.tick_saved(transferred)
+        progress.tick_update(transferred, total)
+
+        # A pool of its own, as this already runs in the service pool
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency_upload)) as executor:
+            promises = {executor.submit(self._client.stage_block, block_id, block, length=len(block)): len(block)
+                        for block_id, block in to_stage}
+
+            for promise in as_completed(promises):
+                promise.result()
+                transferred += promises[promise]
+                progress.tick_update(transferred, total)
+
+        return self._client.commit_block_list([BlobBlock(block_id=b) for b in block_ids], tags=tags, **kwargs)
+
+    def _upload(self, progress, overwrite=False, allow_changed=False, tags=None, context=None, etag=None,
+                incremental=None):
         context = context if context is not None else self._context
 
-        if tags is None:
-            tags = {}
+        # Copied, so the tags given by the caller are not altered
+        tags = dict(tags) if tags is not None else {}
 
         # The serializer is added as tag
         serializer = self.service.serializer
@@ -127,7 +233,15 @@ class AzureFile(File):
 
         kwargs = {}
 
-        if not allow_changed and self._etag is not None:
+        if etag is not None:
+            kwargs['etag'] = etag
+            kwargs['match_condition'] = MatchConditions.IfNotModified
+
+        elif not overwrite:
+            # Created only if missing (If-None-Match: *)
+            kwargs['match_condition'] = MatchConditions.IfMissing
+
+        elif not allow_changed and self._etag is not None:
             kwargs['etag'] = self._etag
             kwargs['match_condition'] = MatchConditions.IfNotModified
 
@@ -137,28 +251,38 @@ class AzureFile(File):
             kwargs['lease'] = lease
 
         try:
-            if not overwrite and self.exists:
-                raise ResourceExistsError("Resource already exists in backend.")
+            # With an explicit ETag or when creating, the backend is the only judge of the conditions: no extra requests
+            # are done.
+            replaced_size = None
 
-            try:
-                modified = self.modified
+            if etag is None and overwrite:
+                try:
+                    metadata = self.metadata
+                    modified = metadata.get("etag") != self._etag or self._assigned
+                    replaced_size = metadata.get('size', 0)
 
-            except ResourceNotFoundError:
-                modified = True
+                except ResourceNotFoundError:
+                    modified = True
 
-            if not modified:
-                raise ValueError("Resource already stored without changes.")
+                if not modified:
+                    self._replaced_size = replaced_size
+                    raise ValueError("Resource already stored without changes.")
 
-            result = self._client.upload_blob(self._data,
-                                              overwrite=overwrite,
-                                              max_concurrency=self.max_concurrency_upload,
-                                              progress_hook=progress.tick_update,
-                                              tags=tags,
-                                              **kwargs)
+            if self._use_incremental(incremental):
+                result = self._upload_blocks(progress, tags, **kwargs)
+
+            else:
+                result = self._client.upload_blob(self._data,
+                                                  overwrite=overwrite,
+                                                  max_concurrency=self.max_concurrency_upload,
+                                                  progress_hook=progress.tick_update,
+                                                  tags=tags,
+                                                  **kwargs)
 
             self._etag = result.get('etag')
             self._md5sum = result.get('content_md5')
             self._assigned = False
+            self._replaced_size = replaced_size
 
         except ValueError:
             pass
@@ -172,10 +296,196 @@ class AzureFile(File):
 
             progress.tick_update(total_progress, total_progress)
 
-    def _download(self, progress, offset=None, length=None, chunk_size=1024*1024*100):
+    @staticmethod
+    def _iter_source(source, block_size):
+        """
+        Reads the given source incrementally, as a generator of blocks of `block_size` bytes (the last one may be
+        smaller).
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                yield from iter(lambda: f.read(block_size), b"")
+
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source)
+            yield from (view[o:o + block_size] for o in range(0, len(view), block_size))
+
+        elif hasattr(source, "read"):
+            yield from iter(lambda: source.read(block_size), b"")
+
+        else:
+            # Iterable of chunks of any size, regrouped in blocks
+            buffer = bytearray()
+
+            for chunk in source:
+                buffer += chunk
+
+                while len(buffer) >= block_size:
+                    yield bytes(buffer[:block_size])
+                    del buffer[:block_size]
+
+            if len(buffer) > 0:
+                yield bytes(buffer)
+
+    @staticmethod
+    def _source_size(source):
+        """
+        Retrieves the number of bytes of the given source, or None if it can't be known before reading it.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            return os.path.getsize(source)
+
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return memoryview(source).nbytes
+
+        if hasattr(source, "seekable") and source.seekable():
+            position = source.tell()
+            end = source.seek(0, os.SEEK_END)
+            source.seek(position)
+            return end - position
+
+        return None
+
+    def _staged_blocks(self, checkpoint, block_size):
+        """
+        Retrieves the blocks staged by a previous run of an upload, from its checkpoint, as a dictionary
+        {index: block ID}. Only those still pending of commit in the backend are retrieved (they expire after a week).
+        """
+        header, entries = checkpoint.load()
+
+        if header is None or header.get("block_size") != block_size or len(entries) == 0:
+            return {}
+
+        try:
+            _, uncommitted = self._client.get_block_list("uncommitted")
+
+        except ResourceNotFoundError:
+            return {}
+
+        available = {b.id for b in uncommitted}
+
+        return {e["index"]: e["id"] for e in entries if e["id"] in available}
+
+    def _upload_from(self, progress, source, block_size=None, concurrency=None, overwrite=False,
+                     allow_changed=False, tags=None, context=None, etag=None, checkpoint=None):
+        context = context if context is not None else self._context
+        block_size = block_size if block_size is not None else get_config().get('blob.stream.chunk_bytes')
+        concurrency = concurrency if concurrency is not None else get_config().get('blob.stream.max_concurrency')
+        concurrency = concurrency if concurrency is not None else min(32, (os.cpu_count() or 1) * 4)
+
+        kwargs = {}
+
+        if etag is not None:
+            kwargs['etag'] = etag
+            kwargs['match_condition'] = MatchConditions.IfNotModified
+
+        elif not overwrite:
+            kwargs['match_condition'] = MatchConditions.IfMissing
+
+        elif not allow_changed and self._etag is not None:
+            kwargs['etag'] = self._etag
+            kwargs['match_condition'] = MatchConditions.IfNotModified
+
+        lease = self.get_current_lease(context=context)
+
+        if lease is not None:
+            kwargs['lease'] = lease
+
+        uploaded = 0
+        saved = 0
+        checkpoint = TransferCheckpoint(checkpoint, "upload", self.url) if checkpoint is not None else None
+
+        try:
+            # Fails fast instead of after uploading all the blocks. The commit checks it again.
+            if etag is None and not overwrite and self.exists:
+                raise ResourceExistsError("Resource already exists in backend.")
+
+            staged = {}
+
+            if checkpoint is not None:
+                staged = self._staged_blocks(checkpoint, block_size)
+                checkpoint.start({"block_size": block_size},
+                                 [{"index": i, "offset": i * block_size, "id": b} for i, b in staged.items()])
+
+            total = self._source_size(source)
+            read = 0
+            block_ids = []
+
+            def stage(index, block):
+                # Hashed in the pool too, so it scales with the cores
+                block_ids[index] = self._block_id(index, block)
+
+                # The ID holds the hash of the content: a block staged by a previous run is reused only if unchanged
+                if staged.get(index) == block_ids[index]:
+                    return index, len(block), True
+
+                self._client.stage_block(block_ids[index], block, length=len(block))
+                return index, len(block), False
+
+            def account(promise):
+                nonlocal uploaded, saved
+                index, length, reused = promise.result()
+                uploaded += length
+
+                if reused:
+                    saved += length
+                    progress.tick_saved(saved)
+
+                elif checkpoint is not None:
+                    checkpoint.append({"index": index, "offset": index * block_size, "id": block_ids[index]})
+
+            # A pool of its own, as this already runs in the service pool. At most `concurrency` blocks are being
+            # staged while the next ones are read, so memory stays bounded regardless of the source size.
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+                pending = set()
+
+                for i, block in enumerate(self._iter_source(source, block_size)):
+                    if len(pending) >= concurrency:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                        for promise in done:
+                            account(promise)
+
+                        # While the size of the source is unknown, the total is the size read so far (and not reached)
+                        progress.tick_update(uploaded, total if total is not None else read + 1)
+
+                    block_ids.append(None)
+                    pending.add(executor.submit(stage, i, block))
+                    read += len(block)
+
+                for promise in as_completed(pending):
+                    account(promise)
+                    progress.tick_update(uploaded, total if total is not None else read + 1)
+
+            result = self._client.commit_block_list([BlobBlock(block_id=b) for b in block_ids], tags=tags, **kwargs)
+
+            # The content is not kept in memory, but its ETag is: later conditional writes keep protecting this version
+            self._data = None
+            self._mmap_path = None
+            self._etag = result.get('etag')
+            self._md5sum = result.get('content_md5')
+            self._assigned = False
+
+            if checkpoint is not None:
+                checkpoint.clear()
+
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+            progress.tick_update(uploaded, uploaded)
+
+        return result.get('etag')
+
+    def _download(self, progress, offset=None, length=None, chunk_size=1024*1024*100, etag=None):
         kwargs = {}
 
-        if self._etag is not None:
+        if etag is not None:
+            kwargs['etag'] = etag
+            kwargs['match_condition'] = MatchConditions.IfModified
+
+        # Without data (e.g. after `upload_from`), the known version must be downloaded even if not modified
+        elif self._etag is not None and self._data is not None:
             kwargs['etag'] = self._etag
             kwargs['match_condition'] = MatchConditions.IfModified
 
@@ -195,31 +505,312 @@ class AzureFile(File):
                     chunks.append(chunk)
 
                 self._data = b"".join(chunks)
+                self._mmap_path = None
 
-            except ResourceNotFoundError as e:
+            except ResourceNotFoundError:
                 if self._etag is not None:
                     # The item was deleted
                     self.reset_status()
 
-                else:
-                    # Otherwise it is an unknown element.
-                    raise e
+                raise
 
             finally:
                 total_progress = len_nan(self._data, none_len=-1)
                 progress.tick_update(total_progress, total_progress)
 
-            metadata = self.metadata
+            # The properties of the response belong to the version downloaded, so no extra request is needed
+            properties = stream.properties
 
-            self._etag = metadata.get('etag')
-            self._md5sum = metadata.get('content_settings', {}).get('content_md5')
+            self._etag = properties.get('etag')
+            self._md5sum = (properties.get('content_settings') or {}).get('content_md5')
             self._assigned = False
 
-        except ResourceModifiedError:
+        except (ResourceModifiedError, ResourceNotModifiedError):
             total_progress = len(self._data) if self._data is not None else 0
             progress.tick_update(total_progress, total_progress)
+            return False
+
+        return True
+
+    def _download_range(self, offset, length, etag):
+        stream = self._client.download_blob(offset=offset,
+                                            length=length,
+                                            etag=etag,
+                                            match_condition=MatchConditions.IfNotModified)
+        return stream.readall()
+
+    def _download_range_into(self, offset, view, etag):
+        stream = self._client.download_blob(offset=offset,
+                                            length=len(view),
+                                            etag=etag,
+                                            match_condition=MatchConditions.IfNotModified)
+        return stream.readinto(_ViewWriter(view))
+
+    def _download_into(self, progress, view, offset=None, length=None, chunk_size=None):
+        chunk_size = chunk_size if chunk_size is not None else get_config().get('blob.stream.chunk_bytes')
+        written = 0
+
+        try:
+            properties = self._client.get_blob_properties()
+            etag = properties.etag
+
+            begin = offset if offset is not None else 0
+            end = properties.size if length is None else min(begin + length, properties.size)
+            total = max(0, end - begin)
+
+            if total > len(view):
+                raise ValueError(f"The buffer ({len(view)} bytes) is smaller than the data ({total} bytes).")
+
+            progress.tick_update(0, total)
+
+            # A pool of its own, as this already runs in the service pool. Each range is written in its own slice of
+            # the buffer, so they are fetched in parallel in any order.
+            with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency_download)) as executor:
+                promises = [executor.submit(self._download_range_into,
+                                            o,
+                                            view[o - begin:min(o + chunk_size, end) - begin],
+                                            etag)
+                            for o in range(begin, end, chunk_size)]
+
+                for promise in as_completed(promises):
+                    written += promise.result()
+                    progress.tick_update(written, total)
+
+        finally:
+            progress.tick_update(written, written)
+
+        return view[:written]
+
+    @staticmethod
+    def _mmap_folder():
+        folder = get_config().get('blob.mmap.dir')
+        return folder if folder is not None else os.path.join(tempfile.gettempdir(), "cloudspeak-mmap")
+
+    def _mmap_path_of(self, etag, offset, length):
+        """
+        Retrieves the local path of the file mapping the given version and range of the blob.
+
+        The path only depends on them, so all the processes of a node map the same file. The versions of the same range
+        are kept in the same folder, so the superseded ones can be found.
+        """
+        blob_key = hashlib.sha256(f"{self.url}|{offset}|{length}".encode("utf-8")).hexdigest()
+        version_key = hashlib.sha256(f"{etag}".encode("utf-8")).hexdigest()
+
+        folder = os.path.join(self._mmap_folder(), blob_key)
+        os.makedirs(folder, exist_ok=True)
+
+        return os.path.join(folder, version_key)
+
+    def _evict_mmaps(self, path):
+        """
+        Removes the mapped files not needed anymore, after the given one was published: the superseded versions of the
+        same blob range, and the least recently used files of other blobs beyond 'blob.mmap.max_bytes' (if set).
+
+        Processes already mapping a removed file keep their mapping, as the OS only releases it once unmapped.
+        """
+        def remove(file_path):
+            try:
+                os.remove(file_path)
+
+            except OSError:
+                # Removed by other process, or in use (in systems where mapped files can't be removed)
+                pass
+
+        folder = os.path.dirname(path)
+
+        for name in os.listdir(folder):
+            if not name.endswith(".tmp") and os.path.join(folder, name) != path:
+                remove(os.path.join(folder, name))
+
+        max_bytes = get_config().get('blob.mmap.max_bytes')
+
+        if max_bytes is None:
+            return
+
+        files = []
+
+        for root, _, names in os.walk(self._mmap_folder()):
+            for name in names:
+                file_path = os.path.join(root, name)
+
+                if name.endswith(".tmp"):
+                    continue
+
+                try:
+                    stat = os.stat(file_path)
+
+                except FileNotFoundError:
+                    continue
+
+                files.append((stat.st_mtime, stat.st_size, file_path))
+
+        total_bytes = sum(size for _, size, _ in files)
+
+        for _, size, file_path in sorted(files):
+            if total_bytes <= max_bytes:
+                break
+
+            if file_path != path:
+                remove(file_path)
+                total_bytes -= size
+
+    @staticmethod
+    def _map_file(path, size):
+        if size == 0:
+            return b""
+
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _download_mmap(self, progress, offset=None, length=None):
+        try:
+            properties = self._client.get_blob_properties()
+            etag = properties.etag
+
+            if etag == self._etag and isinstance(self._data, mmap.mmap) and not self._assigned:
+                # Already mapped without changes
+                return
+
+            begin = offset if offset is not None else 0
+            end = properties.size if length is None else min(begin + length, properties.size)
+            size = max(0, end - begin)
+            path = self._mmap_path_of(etag, offset, length)
+            data = None
+
+            try:
+                # Downloaded by other process (or instance) of the node
+                data = self._map_file(path, size) if os.path.exists(path) else None
+                os.utime(path)
+                progress.tick_saved(size)
+
+            except FileNotFoundError:
+                # Evicted meanwhile
+                data = None
+
+            if data is None:
+                path_tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+
+                try:
+                    with open(path_tmp, "w+b") as f:
+                        # Sparse file, filled in parallel by ranges
+                        f.truncate(size)
+
+                        if size > 0:
+                            with mmap.mmap(f.fileno(), size) as mapping:
+                                with memoryview(mapping) as view:
+                                    self._download_into(progress, view, offset=begin, length=size).release()
+
+                                mapping.flush()
+
+                    # Mapped before being published, so an eviction by other process can't make it vanish meanwhile
+                    data = self._map_file(path_tmp, size)
+
+                    # Published once complete, so other processes never map partial files
+                    os.replace(path_tmp, path)
+
+                finally:
+                    if os.path.exists(path_tmp):
+                        os.remove(path_tmp)
+
+                self._evict_mmaps(path)
+
+            self._data = data
+
+            # Only whole blobs can be deserialized from the file
+            self._mmap_path = path if offset is None and length is None else None
+            self._etag = etag
+            self._md5sum = properties.get('content_settings', {}).get('content_md5')
+            self._assigned = False
+
+        finally:
+            total_progress = len_nan(self._data, none_len=-1)
+            progress.tick_update(total_progress, total_progress)
+
+    @staticmethod
+    def _downloaded_bytes(checkpoint, header, path):
+        """
+        Retrieves the number of bytes already written in the given path by a previous run of a download, from its
+        checkpoint. Only a previous run of the same range of the same version (ETag) of the blob is resumed.
+        """
+        header_saved, entries = checkpoint.load()
+
+        if header_saved is None or any(header_saved.get(k) != v for k, v in header.items()) or len(entries) == 0 \
+                or not os.path.exists(path):
+            return 0
+
+        return min(entries[-1]["written"], os.path.getsize(path))
+
+    def _download_to(self, progress, sink, offset=None, length=None, chunk_size=None, checkpoint=None):
+        chunk_size = chunk_size if chunk_size is not None else get_config().get('blob.stream.chunk_bytes')
+        written = 0
+        close_sink = isinstance(sink, (str, os.PathLike))
+        checkpoint = TransferCheckpoint(checkpoint, "download", self.url) if checkpoint is not None else None
+
+        try:
+            properties = self._client.get_blob_properties()
+            etag = properties.etag
+
+            begin = offset if offset is not None else 0
+            end = properties.size if length is None else min(begin + length, properties.size)
+            total = max(0, end - begin)
+
+            if checkpoint is not None:
+                header = {"etag": etag, "offset": begin, "end": end}
+                written = self._downloaded_bytes(checkpoint, header, sink)
+                checkpoint.start(header, [{"written": written}])
+
+            ranges = [(o, min(chunk_size, end - o)) for o in range(begin + written, end, chunk_size)]
+
+            progress.tick_saved(written)
+            progress.tick_update(written, total)
+
+            if close_sink:
+                sink = open(sink, "r+b" if written > 0 else "wb")
+                sink.seek(written)
+                sink.truncate()
+
+            try:
+                concurrency = max(1, self.max_concurrency_download)
 
-    def upload(self, overwrite=False, allow_changed=False, tags=None, context=None):
+                # A pool of its own, as this already runs in the service pool. Chunks are written in order, keeping at
+                # most `concurrency` chunks in flight, so any writable object is a valid sink and memory stays bounded.
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    pending = [executor.submit(self._download_range, o, l, etag) for o, l in ranges[:concurrency]]
+                    ranges = ranges[concurrency:]
+
+                    while len(pending) > 0:
+                        chunk = pending.pop(0).result()
+
+                        if len(ranges) > 0:
+                            pending.append(executor.submit(self._download_range, *ranges.pop(0), etag))
+
+                        sink.write(chunk)
+                        written += len(chunk)
+                        del chunk
+
+                        if checkpoint is not None:
+                            # The bytes must be in the file before the checkpoint tells so
+                            sink.flush()
+                            checkpoint.append({"written": written})
+
+                        progress.tick_update(written, total)
+
+            finally:
+                if close_sink:
+                    sink.close()
+
+            if checkpoint is not None:
+                checkpoint.clear()
+
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+            progress.tick_update(written, written)
+
+        return written
+
+    def upload(self, overwrite=False, allow_changed=False, tags=None, context=None, etag=None, incremental=None):
         """
         Uploads the internal `data` to the blob storage.
         This is an async method.
@@ -239,6 +830,17 @@ class AzureFile(File):
             Dictionary containing k:v for tags to store in the file.
             Note that tags are useful for making queries in container-level.
 
+        :param etag:
+            ETag that the blob must have in the backend for the upload to succeed (If-Match), instead of the one known
+            by this instance. The upload is sent directly, without checking for changes first, and raises
+            ResourceModifiedError if the blob has a different ETag.
+
+        :param incremental:
+            True to upload the data block by block, transferring only the blocks that changed since the blob was last
+            uploaded incrementally (the bytes saved are reported in the progress as `saved`). False to upload it whole.
+            None to upload incrementally the data of at least 'blob.incremental.min_bytes' (None in the config for
+            never).
+
         :returns:
             A Progress object that can be used to track the operation progress.
         """
@@ -250,7 +852,8 @@ class AzureFile(File):
         with self._progresses_lock:
             progress = self._progresses.get(f"upload_{self._etag}")
 
-            if progress is not None and not progress.finished:
+            # Conditional uploads are never merged with others, as they may carry different data
+            if etag is None and progress is not None and not progress.finished:
                 return progress
 
             progress = ProgressSingle(self, operation_type="upload")
@@ -258,14 +861,125 @@ class AzureFile(File):
                                                progress=progress,
                                                overwrite=overwrite,
                                                allow_changed=allow_changed,
-                                               context=context)
+                                               tags=tags,
+                                               context=context,
+                                               etag=etag,
+                                               incremental=incremental)
             progress.set_promise(promise)
 
             self._progresses[f"upload_{self._etag}"] = progress
 
         return progress
 
-    def download(self, offset=None, length=None, chunk_size=1024*1024*100):
+    def download_into(self, buffer, offset=None, length=None, chunk_size=None):
+        """
+        Downloads the blob storage data straight into the given buffer, without keeping it in `data`.
+        This is an async method.
+
+        The blob is fetched with parallel range requests whose responses are written directly in their slice of the
+        buffer, with no intermediate copies. Reusing the same buffer to refresh a blob repeatedly does not allocate.
+        All the ranges are requested for the version of the blob found when the download begins; ResourceModifiedError
+        is raised if it changes meanwhile.
+
+        A progress object is returned, which can be used to track the operation progress.
+        To catch exceptions and/or block the thread, join the progress object `progress.join()`.
+
+        :param buffer:
+            Contiguous writable buffer (bytearray, memoryview, NumPy array...) of at least the size of the data.
+
+        :param offset:
+            Byte offset to begin download from.
+
+        :param length:
+            Size of the data to download.
+
+        :param chunk_size:
+            Size of each range request. By default, 'blob.stream.chunk_bytes'.
+
+        :returns:
+            A Progress object that can be used to track the operation progress.
+            Joining it retrieves a memoryview of the bytes of the buffer filled.
+        """
+        view = memoryview(buffer).cast("B")
+
+        if view.readonly:
+            raise ValueError("The buffer is read-only.")
+
+        progress = ProgressSingle(self, operation_type="download")
+        promise = self.service.pool.submit(self._download_into,
+                                           progress=progress,
+                                           view=view,
+                                           offset=offset,
+                                           length=length,
+                                           chunk_size=chunk_size)
+        progress.set_promise(promise)
+
+        return progress
+
+    def upload_from(self, source, block_size=None, concurrency=None, overwrite=False, allow_changed=False, tags=None,
+                    context=None, etag=None, checkpoint=None):
+        """
+        Uploads the content of a file, a readable object or an iterable of bytes to the blob storage, without loading
+        it in `data`.
+        This is an async method.
+
+        The source is read incrementally and staged as blocks in parallel, which are committed at the end as the new
+        content of the blob. The conditions (`overwrite`, `allow_changed`, `etag` and the lease of the context) are
+        checked at commit time, so the blob is left untouched if they are not met.
+
+        A progress object is returned, which can be used to track the operation progress.
+        To catch exceptions and/or block the thread, join the progress object `progress.join()`.
+
+        :param source:
+            Path of a file, bytes-like object, object with a `read(size)` method or iterable of bytes chunks.
+
+        :param block_size:
+            Size of each block. By default, 'blob.stream.chunk_bytes'.
+
+        :param concurrency:
+            Number of blocks staged in parallel (and kept in memory). By default, 'blob.stream.max_concurrency', or
+            4 per core (up to 32) if not set.
+
+        :param overwrite:
+            True to overwrite the backend content in case there is already data with the same blob name.
+            False to raise an Exception if data found in backend with the same name.
+
+        :param allow_changed:
+            True to replace data (if `overwrite` is also True) even if other process updated it before we knew.
+            False to raise an exception.
+
+        :param tags:
+            Dictionary containing k:v for tags to store in the file.
+
+        :param etag:
+            ETag that the blob must have in the backend for the commit to succeed (If-Match).
+
+        :param checkpoint:
+            Path of a local file where the staged blocks are saved, to make the upload resumable. Running the same
+            upload again only stages the blocks not staged by the previous run (or whose content changed since then).
+            The checkpoint is removed once the upload is committed.
+
+        :returns:
+            A Progress object that can be used to track the operation progress.
+            Joining it retrieves the ETag of the new content.
+        """
+        progress = ProgressSingle(self, operation_type="upload")
+        promise = self.service.pool.submit(self._upload_from,
+                                           progress=progress,
+                                           source=source,
+                                           block_size=block_size,
+                                           concurrency=concurrency,
+                                           overwrite=overwrite,
+                                           allow_changed=allow_changed,
+                                           tags=tags,
+                                           context=context,
+                                           etag=etag,
+                                           checkpoint=checkpoint)
+        progress.set_promise(promise)
+
+        return progress
+
+    def download(self, offset=None, length=None, chunk_size=1024*1024*100, memory_map=False, etag=None):
         """
         Downloads the blob storage data into the internal `data`.
         This is an async method.
@@ -282,29 +996,102 @@ class AzureFile(File):
         :param chunk_size:
             Chunk size in case of internal chunkizing due to large size.
 
+        :param memory_map:
+            True to download the data into a local file (in 'blob.mmap.dir', or the temp folder if not set) and map it
+            in memory read-only, instead of holding it in the process. `data_raw` is then the mapping, whose pages are
+            loaded lazily by the OS, and `data` lets the serializer map the arrays of the file too (Joblib, when
+            uncompressed). The file is named after the blob version, so processes of the same node mapping the same
+            version share the file (and its pages) and download it once. Files of superseded versions are removed
+            when a new one is mapped, and the least recently used ones beyond 'blob.mmap.max_bytes' (if set).
+
+        :param etag:
+            ETag of a version of the blob already held by the caller (e.g. in a cache). The blob is downloaded only if
+            it has a different one (If-None-Match), in a single request. Not supported with `memory_map`.
+
         :returns:
             A Progress object that can be used to track the operation progress.
+            Joining it retrieves True if the data was transferred, False if it was not modified.
             NOTE: The data is stored in `file.data` after this progress finishes.
         """
+        if etag is not None and memory_map:
+            raise ValueError("Conditional downloads by ETag can't be memory-mapped.")
+
         with self._progresses_lock:
             progress = self._progresses.get(f"download_{self._etag}")
 
-            if progress is not None and not progress.finished:
+            # Conditional downloads are never merged with others, as they are checked against a different version
+            if etag is None and progress is not None and not progress.finished:
                 return progress
 
             progress = ProgressSingle(self, operation_type="download")
 
-            promise = self.service.pool.submit(self._download,
-                                               progress=progress,
-                                               offset=offset,
-                                               chunk_size=chunk_size,
-                                               length=length)
+            if memory_map:
+                promise = self.service.pool.submit(self._download_mmap,
+                                                   progress=progress,
+                                                   offset=offset,
+                                                   length=length)
+
+            else:
+                promise = self.service.pool.submit(self._download,
+                                                   progress=progress,
+                                                   offset=offset,
+                                                   chunk_size=chunk_size,
+                                                   length=length,
+                                                   etag=etag)
             progress.set_promise(promise)
 
         self._progresses[f"download_{self._etag}"] = progress
 
         return progress
 
+    def download_to(self, sink, offset=None, length=None, chunk_size=None, checkpoint=None):
+        """
+        Downloads the blob storage data straight into a file or a writable object, without keeping it in `data`.
+        This is an async method.
+
+        The blob is fetched in chunks with parallel range requests and written in order as they arrive, so memory is
+        bounded by `max_concurrency_download` chunks regardless of the blob size. All the chunks are requested for the
+        version of the blob found when the download begins; ResourceModifiedError is raised if it changes meanwhile.
+
+        A progress object is returned, which can be used to track the operation progress.
+        To catch exceptions and/or block the thread, join the progress object `progress.join()`.
+
+        :param sink:
+            Path of the file to write (created or truncated), or an object with a `write(bytes)` method.
+
+        :param offset:
+            Byte offset to begin download from.
+
+        :param length:
+            Size of the data to download.
+
+        :param chunk_size:
+            Size of each range request. By default, 'blob.stream.chunk_bytes'.
+
+        :param checkpoint:
+            Path of a local file where the progress is saved, to make the download resumable (the sink must be a path).
+            Running the same download again continues where the previous run stopped, as long as the blob kept the
+            same ETag; otherwise, it begins from zero. The checkpoint is removed once the download finishes.
+
+        :returns:
+            A Progress object that can be used to track the operation progress.
+            Joining it retrieves the number of bytes written.
+        """
+        if checkpoint is not None and not isinstance(sink, (str, os.PathLike)):
+            raise ValueError("Resumable downloads require a path as sink.")
+
+        progress = ProgressSingle(self, operation_type="download")
+        promise = self.service.pool.submit(self._download_to,
+                                           progress=progress,
+                                           sink=sink,
+                                           offset=offset,
+                                           length=length,
+                                           chunk_size=chunk_size,
+                                           checkpoint=checkpoint)
+        progress.set_promise(promise)
+
+        return progress
+
     @property
     def url(self):
         """
@@ -339,7 +1126,20 @@ class AzureFile(File):
 
     @property
     def data(self):
+        if self._data is None:
+            return None
+
         serializer = self.service.serializer
+
+        # Memory-mapped blobs are loaded from their file, so the serializer can map their arrays too
+        if serializer is not None and self._mmap_path is not None and hasattr(serializer, "deserialize_file"):
+            try:
+                return serializer.deserialize_file(self._mmap_path, mmap_mode="r")
+
+            except FileNotFoundError:
+                # Evicted by a newer version: the mapping of this instance is still valid
+                pass
+
         data = serializer.deserialize(self._data) if serializer is not None else self._data
         return data
 
@@ -348,8 +1148,34 @@ class AzureFile(File):
         serializer = self.service.serializer
         self._assigned = True
         self._md5sum = None
+        self._mmap_path = None
         self._data = serializer.serialize(new_data) if serializer is not None else new_data
 
+    @property
+    def data_raw(self):
+        """
+        Retrieves the internal data as bytes, as stored in the backend (without deserializing).
+        """
+        return self._data
+
+    @data_raw.setter
+    def data_raw(self, new_data):
+        """
+        Sets the internal data as bytes, as they will be stored in the backend (without serializing).
+        """
+        self._assigned = True
+        self._md5sum = None
+        self._mmap_path = None
+        self._data = new_data
+
+    @property
+    def etag(self):
+        """
+        ETag of the last version of the blob known by this instance (downloaded or uploaded).
+        None if unknown.
+        """
+        return self._etag
+
     @property
     def locked(self):
         """
@@ -547,6 +1373,14 @@ class AzureFile(File):
 
         self.reset_status()
 
+    @property
+    def replaced_size(self):
+        """
+        Retrieves the size of the blob replaced by the last upload. None if the blob didn't exist, or if the upload was
+        sent with an explicit ETag (the backend is not checked first).
+        """
+        return self._replaced_size
+
     @property
     def size(self):
         return self.metadata.get('size', 0) if not self._assigned else len_nan(self._data, none_len=0)
@@ -685,3 +1519,4 @@ class AzureFile(File):
         self._etag = None
         self._md5sum = None
         self._data = None
+        self._mmap_path = None
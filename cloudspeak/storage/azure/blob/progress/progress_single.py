@@ -15,6 +15,7 @@ class ProgressSingle:
 
         self._total = None
         self._progress = 0
+        self._saved = 0
         self._bar = None
 
         self._time_begin = time.time()
@@ -78,6 +79,36 @@ class ProgressSingle:
         time_spent = self.time_spent
         return divide_no_nan(self.progress, time_spent)
 
+    @property
+    def saved(self):
+        """
+        Retrieves the number of bytes of the progress that didn't need to be transferred (e.g. blocks already stored
+        in incremental uploads). They are accounted in `progress`.
+        """
+        return self._saved
+
+    @property
+    def transferred(self):
+        """
+        Retrieves the number of bytes actually transferred.
+        """
+        return self._progress - self._saved
+
+    @property
+    def time_saved(self):
+        """
+        Retrieves an estimation of the seconds saved by not transferring the `saved` bytes, at the average throughput
+        of the transferred ones.
+        """
+        return divide_no_nan(self._saved, divide_no_nan(self.transferred, self.time_spent)) if self.transferred > 0 \
+            else 0
+
+    def tick_saved(self, saved):
+        """
+        Sets the number of bytes of the progress that didn't need to be transferred.
+        """
+        self._saved = saved
+
     @property
     def throughput_tick(self):
         """
@@ -0,0 +1,20 @@
+import atexit
+import threading
+
+# Imported first, so that the shutdown of the thread pools is registered before our functions
+import concurrent.futures.thread  # noqa: F401
+
+
+def register_exit(fn):
+    """
+    Registers a function to be called when the process exits, while the thread pools still accept tasks.
+
+    Since python 3.9, the thread pools are shut down before the `atexit` functions are called, so functions that upload
+    through them must be registered in the same (earlier) stage. Functions of both stages are called in reverse order
+    of registration, so ours run before the shutdown of the pools.
+
+    :param fn:
+        Function without arguments to call.
+    """
+    register = getattr(threading, "_register_atexit", atexit.register)
+    register(fn)
@@ -29,6 +29,9 @@ setup(
         "pandas==1.5.2",
         "lz4==4.0.0",
     ],
+    extras_require={
+        "frames": ["pyarrow>=10.0.0"],
+    },
     classifiers=[],
     test_suite='nose.collector',
     tests_require=['nose'],